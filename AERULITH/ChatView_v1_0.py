@@ -0,0 +1,155 @@
+from PySide6.QtCore import (QAbstractListModel, QModelIndex, QRect, QSize, Qt, QTimer)
+from PySide6.QtGui import (QColor, QFontMetrics, QPen)
+from PySide6.QtWidgets import (QAbstractItemView, QListView, QStyle, QStyledItemDelegate)
+import json
+import os
+
+ROLE_KIND = Qt.UserRole + 1
+
+# H I S T O R Y    M O D E L
+class AERULITH_HistoryModel(QAbstractListModel):
+    """
+    Bounded list of (kind, text) messages for a QListView. Appends and
+    streamed text are staged and applied together once per frame. Past
+    max_rows, the oldest spill_rows messages are appended to a JSONL spill
+    file and dropped from memory. Messages are addressed by a message id
+    that stays valid while older rows are spilled.
+    """
+    def __init__(self, spill_path=None, max_rows=2000, spill_rows=500, frame_ms=16, parent=None):
+        super().__init__(parent)
+        self.spill_path = spill_path
+        self.max_rows = max_rows
+        self.spill_rows = spill_rows
+        self.rows = []
+        self.first_id = 0
+        self.next_id = 0
+        self.spilled = 0
+        self._new = []
+        self._edits = {}
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(frame_ms)
+        self._timer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        kind, text = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return text
+        if role == ROLE_KIND:
+            return kind
+        return None
+
+    def append(self, text, kind="log"):
+        # Returns the message id; the row itself appears on the next flush
+        message_id = self.next_id
+        self.next_id += 1
+        self._new.append([kind, text])
+        self._schedule()
+        return message_id
+
+    def append_text(self, message_id, piece):
+        self._edits[message_id] = self._edits.get(message_id, "") + piece
+        self._schedule()
+
+    def _schedule(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        if self._new:
+            start = len(self.rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(self._new) - 1)
+            self.rows.extend(self._new)
+            self.endInsertRows()
+            self._new = []
+        if self._edits:
+            changed = []
+            for message_id, piece in self._edits.items():
+                row = message_id - self.first_id
+                if 0 <= row < len(self.rows):
+                    self.rows[row][1] += piece
+                    changed.append(row)
+            self._edits = {}
+            if changed:
+                self.dataChanged.emit(self.index(min(changed)), self.index(max(changed)), [Qt.DisplayRole])
+        if len(self.rows) > self.max_rows:
+            self._spill(len(self.rows) - self.max_rows + self.spill_rows)
+
+    def _spill(self, n):
+        if self.spill_path:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                for kind, text in self.rows[:n]:
+                    f.write(json.dumps({"kind": kind, "text": text}) + "\n")
+        self.beginRemoveRows(QModelIndex(), 0, n - 1)
+        del self.rows[:n]
+        self.endRemoveRows()
+        self.first_id += n
+        self.spilled += n
+
+# M E S S A G E    D E L E G A T E
+class AERULITH_MessageDelegate(QStyledItemDelegate):
+    COLORS = {"user": QColor("#4a8bd6"), "reply": QColor("#d8d8d8"), "log": QColor("#9aa5a0")}
+    PADDING = 4
+
+    def _text_rect(self, option):
+        return option.rect.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        painter.setFont(option.font)
+        painter.setPen(QPen(self.COLORS.get(index.data(ROLE_KIND), option.palette.text().color())))
+        painter.drawText(self._text_rect(option), Qt.TextWordWrap | Qt.AlignLeft | Qt.AlignTop,
+                         index.data(Qt.DisplayRole) or "")
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        width = max(option.rect.width(), 50) - 2 * self.PADDING
+        bounds = QFontMetrics(option.font).boundingRect(QRect(0, 0, width, 1_000_000), Qt.TextWordWrap,
+                                                        index.data(Qt.DisplayRole) or " ")
+        return QSize(width, bounds.height() + 2 * self.PADDING)
+
+# H I S T O R Y    V I E W
+class AERULITH_HistoryView(QListView):
+    """
+    QListView for AERULITH_HistoryModel. Only visible rows are painted,
+    layout runs in batches, and the view follows new rows while it is
+    scrolled to the bottom.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setItemDelegate(AERULITH_MessageDelegate(self))
+        self.setWordWrap(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(64)
+        self.setResizeMode(QListView.Adjust)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self._follow = True
+        self.verticalScrollBar().valueChanged.connect(self._track_bottom)
+        self.verticalScrollBar().rangeChanged.connect(self._stick_to_bottom)
+
+    def setModel(self, model):
+        super().setModel(model)
+        # Streamed text changes a row's height, so its size hint must be re-read
+        model.dataChanged.connect(self._rows_changed)
+
+    def _rows_changed(self, top, bottom, roles=()):
+        delegate = self.itemDelegate()
+        for row in range(top.row(), bottom.row() + 1):
+            delegate.sizeHintChanged.emit(self.model().index(row))
+
+    def _track_bottom(self, value):
+        self._follow = value >= self.verticalScrollBar().maximum() - 4
+
+    def _stick_to_bottom(self, lo, hi):
+        if self._follow:
+            self.verticalScrollBar().setValue(hi)
@@ -0,0 +1,68 @@
+from PySide6.QtCore import (QObject, QTimer, Slot)
+
+# D A S H B O A R D
+class AERULITH_Dashboard(QObject):
+    """
+    Drives the stats panel from a TelemetryFeed. The pipeline records into
+    the feed only while it is enabled, so start() turns recording on and
+    stop() turns it off. Widgets are refreshed from a QTimer on the GUI
+    thread; the pipeline never waits on the UI.
+    """
+    def __init__(self, ui, feed, bot=None, generator=None, interval_ms=500, window=10.0, parent=None):
+        super().__init__(parent)
+        self.ui = ui
+        self.feed = feed
+        self.bot = bot
+        self.generator = generator
+        self.window = window
+        self._shown = {}
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.refresh)
+
+    def start(self):
+        self.feed.enable()
+        self.ui.level_progress.setFormat("%p% known")
+        self.timer.start()
+        self.refresh()
+
+    def stop(self):
+        self.timer.stop()
+        self.feed.disable()
+        self._set_text(self.ui.perf_value, "Telemetry off")
+
+    def _external_caches(self):
+        # Caches that count for themselves are read here rather than on their hot path
+        caches = {}
+        tokenizer = getattr(self.generator, 'tokenizer', None)
+        if hasattr(tokenizer, 'cache_info'):
+            caches['bpe'] = tokenizer.cache_info()
+        return caches
+
+    def _set_text(self, widget, text):
+        # Unchanged text would still trigger a relayout
+        if self._shown.get(widget) != text:
+            self._shown[widget] = text
+            widget.setText(text)
+
+    @Slot()
+    def refresh(self):
+        stats = self.feed.snapshot(self.window, self._external_caches())
+        rates = stats['cache_hit_rate']
+        if stats['confidence'] is not None:
+            self.ui.confidence_value.display(f"{stats['confidence'] * 100:.1f}")
+        self.ui.error_value.display(f"{stats['error_rate'] * 100:.1f}")
+        if 'prompt_index' in rates:
+            self.ui.level_progress.setValue(round(rates['prompt_index'] * 100))
+
+        lines = [f"{stats['rps']:.1f} req/s",
+                 f"p50 {stats['p50_ms']:.1f} ms  p99 {stats['p99_ms']:.1f} ms",
+                 f"{stats['tokens_per_sec']:.1f} tok/s"]
+        lines += [f"{name} cache {rate * 100:.0f}%" for name, rate in sorted(rates.items())]
+        self._set_text(self.ui.perf_value, "\n".join(lines))
+
+        # dict() copies in one step, so a worker binding a patch cannot break it
+        patches = dict(self.bot.loaded_patches) if self.bot is not None else {}
+        self._set_text(self.ui.modules_list,
+                       "\n".join(f"{name}  {func_hash[:8]}" for name, func_hash in sorted(patches.items()))
+                       or "None loaded")
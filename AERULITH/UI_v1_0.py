@@ -3,6 +3,7 @@ from PySide6.QtGui import (QFont, QIcon, QPixmap)
 from PySide6.QtWidgets import (QGridLayout, QGroupBox, QHBoxLayout, QLCDNumber, QLabel, QPlainTextEdit, QProgressBar, QScrollArea, 
                                QSizePolicy, QDoubleSpinBox, QStatusBar, QVBoxLayout, QWidget)
 import random
+from ChatView_v1_0 import AERULITH_HistoryView
 
 # U I    F R A M E W O R K
 class AERULITH_MainWindow(object):
@@ -83,13 +84,8 @@ class AERULITH_MainWindow(object):
         self.output_label.setAlignment(Qt.AlignmentFlag.AlignLeading|Qt.AlignmentFlag.AlignLeft|Qt.AlignmentFlag.AlignVCenter)
         self.output_label.setFont(font_ul)
         self.output_inner_layout = QVBoxLayout(self.output_label)
-        self.chatbox = QScrollArea(self.output_label)
+        self.chatbox = AERULITH_HistoryView(self.output_label)
         self.chatbox.setFont(font_nl)
-        self.chatbox.setWidgetResizable(True)
-        self.scroll_widget = QWidget()
-        self.scroll_widget.setFont(font_nl)
-        self.scroll_widget.setGeometry(QRect(0,0,344,269))
-        self.chatbox.setWidget(self.scroll_widget)
         self.output_inner_layout.addWidget(self.chatbox)
 
         self.input_label = QGroupBox(self.center_column)
@@ -134,6 +130,7 @@ class AERULITH_MainWindow(object):
         self.temp_value.setRange(0.0, 1.0)
         self.temp_value.setSingleStep(0.05)
         self.temp_value.setDecimals(2)
+        self.temp_value.setValue(1.0)
 
         self.top_p_label = QLabel(self.right_column)
         self.top_p_label.setFont(font_ul)
@@ -142,6 +139,12 @@ class AERULITH_MainWindow(object):
         self.top_p_value.setRange(0.0, 1.0)
         self.top_p_value.setSingleStep(0.05)
         self.top_p_value.setDecimals(2)
+        self.top_p_value.setValue(1.0)
+
+        self.perf_label = QLabel(self.right_column)
+        self.perf_label.setFont(font_ul)
+        self.perf_value = QLabel(self.right_column)
+        self.perf_value.setFont(font_nl)
 
         self.module_box = QGroupBox(self.right_column)
         self.module_box.setFont(font_ul)
@@ -151,19 +154,20 @@ class AERULITH_MainWindow(object):
         self.module_scroll = QWidget()
         self.module_scroll.setFont(font_nl)
         self.module_scroll.setGeometry(QRect(0,0,344,54))
+        self.module_scroll_layout = QVBoxLayout(self.module_scroll)
+        self.modules_list = QLabel(self.module_scroll)
+        self.modules_list.setFont(font_nl)
+        self.modules_list.setAlignment(Qt.AlignmentFlag.AlignLeft|Qt.AlignmentFlag.AlignTop)
+        self.module_scroll_layout.addWidget(self.modules_list)
         self.modules_value.setWidget(self.module_scroll)
+        self.modules_value.setWidgetResizable(True)
         self.module_box_layout.addWidget(self.modules_value)
 
         self.CTL_box = QGroupBox(self.right_column)
         self.CTL_box.setFont(font_ul)
         self.CTL_horizontal_layout = QHBoxLayout(self.CTL_box)
-        self.CTL_value = QScrollArea(self.CTL_box)
+        self.CTL_value = AERULITH_HistoryView(self.CTL_box)
         self.CTL_value.setFont(font_nl)
-        self.CTL_value.setWidgetResizable(True)
-        self.CTL_scrollbox = QWidget()
-        self.CTL_scrollbox.setFont(font_nl)
-        self.CTL_scrollbox.setGeometry(0,0,344,133)
-        self.CTL_value.setWidget(self.CTL_scrollbox)
         self.CTL_horizontal_layout.addWidget(self.CTL_value)
 
         self.right_grid_layout.addWidget(self.CTL_box,0,0,1,2)
@@ -177,7 +181,9 @@ class AERULITH_MainWindow(object):
         self.right_grid_layout.addWidget(self.temp_value,4,1,1,1)
         self.right_grid_layout.addWidget(self.top_p_label,5,0,1,1)
         self.right_grid_layout.addWidget(self.top_p_value,5,1,1,1)
-        self.right_grid_layout.addWidget(self.module_box,6,0,1,2)
+        self.right_grid_layout.addWidget(self.perf_label,6,0,1,1)
+        self.right_grid_layout.addWidget(self.perf_value,6,1,1,1)
+        self.right_grid_layout.addWidget(self.module_box,7,0,1,2)
         
         self.right_grid_layout.setRowStretch(0,10)
         self.right_grid_layout.setColumnStretch(0, 1)
@@ -224,3 +230,5 @@ class AERULITH_MainWindow(object):
         self.CTL_box.setTitle("Cognitive Track Log")
         self.model_label.setText("Current Model")
         self.top_p_label.setText("Top P")
+        self.perf_label.setText("Performance")
+        self.perf_value.setText("Telemetry off")
@@ -0,0 +1,318 @@
+from PySide6.QtCore import (QObject, QRunnable, QThreadPool, Qt, Signal, Slot)
+from PySide6.QtGui import (QKeySequence, QShortcut)
+from PySide6.QtWidgets import (QDialog, QDialogButtonBox, QFormLayout, QLabel, QLineEdit, QPlainTextEdit)
+from ChatView_v1_0 import AERULITH_HistoryModel
+from Dashboard_v1_0 import AERULITH_Dashboard
+import abc
+import itertools
+import threading
+import time
+
+# W O R K E R    S I G N A L S
+class AERULITH_JobSignals(QObject):
+    # Every signal carries the job id; emitted from pool threads, delivered queued
+    started = Signal(int)
+    token = Signal(int, str)
+    finished = Signal(int, object)
+    failed = Signal(int, str)
+    cancelled = Signal(int)
+
+# W O R K E R    J O B S
+class AERULITH_Job(QRunnable):
+    _ids = itertools.count(1)
+
+    # The pool owns and deletes the runnable; signals belong to the controller
+    def __init__(self, signals):
+        # Shiboken's metaclass skips ABC's instantiation check, so it is made here
+        if getattr(type(self).work, '__isabstractmethod__', False):
+            raise TypeError(f"Can't instantiate {type(self).__name__} without a work() method")
+        super().__init__()
+        self.job_id = next(self._ids)
+        self.signals = signals
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @abc.abstractmethod
+    def work(self):
+        """Runs on a pool thread; the return value is delivered with finished."""
+
+    def run(self):
+        if self.cancel_event.is_set():
+            self.signals.cancelled.emit(self.job_id)
+            return
+        self.signals.started.emit(self.job_id)
+        try:
+            result = self.work()
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, f"{type(e).__name__}: {e}")
+            return
+        if self.cancel_event.is_set():
+            self.signals.cancelled.emit(self.job_id)
+        else:
+            self.signals.finished.emit(self.job_id, result)
+
+class AERULITH_PipelineJob(AERULITH_Job):
+    # Runs one DynamicBot call; it cannot be interrupted once started
+    def __init__(self, signals, fn, *args, **kwargs):
+        super().__init__(signals)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def work(self):
+        return self.fn(*self.args, **self.kwargs)
+
+class AERULITH_GenerationJob(AERULITH_Job):
+    # Streams NACJAC_Generator output piece by piece; cancel stops after the token in flight
+    def __init__(self, signals, generator, prompt, max_tokens=None, stop=None, temperature=1.0, top_p=1.0):
+        super().__init__(signals)
+        self.generator = generator
+        self.prompt = prompt
+        self.max_tokens = max_tokens
+        self.stop = stop
+        self.temperature = temperature
+        self.top_p = top_p
+
+    def work(self):
+        pieces = []
+        for piece in self.generator.stream_text(self.prompt, self.max_tokens, self.stop, self.cancel_event,
+                                                self.temperature, self.top_p):
+            pieces.append(piece)
+            self.signals.token.emit(self.job_id, piece)
+        return "".join(pieces)
+
+# T E A C H I N G
+class AERULITH_Teacher(QObject):
+    """
+    Replaces IntentParser's console prompt while the bot runs on a pool
+    thread. The pool thread posts the prompt to the GUI thread, where a
+    dialog asks for the spec, and waits for the answer. Declining the
+    dialog, or shutting down, fails the pipeline job instead of leaving
+    it blocked on input().
+    """
+    requested = Signal(str, object)
+
+    def __init__(self, window, parent=None):
+        super().__init__(parent)
+        self.window = window
+        self.closing = threading.Event()
+        self.requested.connect(self._on_requested, Qt.QueuedConnection)
+
+    def __call__(self, prompt):
+        if threading.current_thread() is threading.main_thread():
+            raise RuntimeError("Teaching is only requested from pipeline jobs")
+        answer = {'done': threading.Event(), 'spec': None}
+        self.requested.emit(prompt, answer)
+        while not answer['done'].wait(0.1):
+            if self.closing.is_set():
+                raise RuntimeError("Teaching abandoned: shutting down")
+        if answer['spec'] is None:
+            raise RuntimeError(f"Not taught how to '{prompt}'")
+        return answer['spec']
+
+    @Slot(str, object)
+    def _on_requested(self, prompt, answer):
+        try:
+            if not self.closing.is_set():
+                answer['spec'] = self.ask(prompt)
+        finally:
+            answer['done'].set()
+
+    def ask(self, prompt):
+        # Same three answers the console prompt collects; None when declined
+        dialog = QDialog(self.window)
+        dialog.setWindowTitle("Teach TAMA")
+        name = QLineEdit(dialog)
+        args = QLineEdit(dialog)
+        args.setPlaceholderText("space separated")
+        body = QPlainTextEdit(dialog)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, dialog)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        form = QFormLayout(dialog)
+        form.addRow(QLabel(f"Not sure how to: {prompt}", dialog))
+        form.addRow("Function name", name)
+        form.addRow("Arguments", args)
+        form.addRow("Body", body)
+        form.addRow(buttons)
+        try:
+            if dialog.exec() != QDialog.Accepted or not name.text().strip():
+                return None
+            return {'name': name.text().strip(), 'args': args.text().split(), 'body': body.toPlainText()}
+        finally:
+            dialog.deleteLater()
+
+# C O N T R O L L E R
+class AERULITH_Controller(QObject):
+    """
+    Connects AERULITH_MainWindow to a DynamicBot and a NACJAC_Generator
+    (either may be None) without ever running them on the GUI thread.
+    Ctrl+Return submits the prompt; Escape cancels running jobs. Chat and
+    log history beyond max_rows spill to JSONL files under history_dir.
+    Given a telemetry feed, the stats panel shows live pipeline metrics.
+    Instructions the bot cannot parse are taught through a dialog.
+    """
+    def __init__(self, ui, bot=None, generator=None, max_tokens=None, history_dir="History",
+                 max_rows=2000, feed=None, parent=None):
+        super().__init__(parent)
+        self.ui = ui
+        self.bot = bot
+        self.generator = generator
+        self.max_tokens = max_tokens
+        # One thread each: the bot and the model are not shared between jobs
+        self.pipeline_pool = QThreadPool(self)
+        self.pipeline_pool.setMaxThreadCount(1)
+        self.generation_pool = QThreadPool(self)
+        self.generation_pool.setMaxThreadCount(1)
+        self.jobs = {}
+        self.kinds = {}
+        self.replies = {}
+        self.started_at = {}
+        self.token_counts = {}
+
+        self.chat = AERULITH_HistoryModel(f"{history_dir}/chat.jsonl", max_rows, parent=self)
+        self.ctl = AERULITH_HistoryModel(f"{history_dir}/ctl.jsonl", max_rows, parent=self)
+        ui.chatbox.setModel(self.chat)
+        ui.CTL_value.setModel(self.ctl)
+        self.feed = feed
+        self.dashboard = None
+        if feed is not None:
+            self.dashboard = AERULITH_Dashboard(ui, feed, bot, generator, parent=self)
+            self.dashboard.start()
+        main_window = ui.outer_widget.window()
+        self.teacher = AERULITH_Teacher(main_window, self)
+        if bot is not None:
+            bot.intent_parser.teacher = self.teacher
+        QShortcut(QKeySequence("Ctrl+Return"), main_window, self.submit)
+        QShortcut(QKeySequence(Qt.Key_Escape), main_window, self.cancel)
+
+    def log(self, text):
+        return self.ctl.append(text, "log")
+
+    def say(self, text, kind="reply"):
+        return self.chat.append(text, kind)
+
+    def _signals(self):
+        signals = AERULITH_JobSignals(self)
+        signals.started.connect(self._on_started, Qt.QueuedConnection)
+        signals.token.connect(self._on_token, Qt.QueuedConnection)
+        signals.finished.connect(self._on_finished, Qt.QueuedConnection)
+        signals.failed.connect(self._on_failed, Qt.QueuedConnection)
+        signals.cancelled.connect(self._on_cancelled, Qt.QueuedConnection)
+        return signals
+
+    def _start(self, job, kind, pool):
+        # Keep only the cancel event and signals; the runnable may be gone after run()
+        self.jobs[job.job_id] = (job.cancel_event, job.signals)
+        self.kinds[job.job_id] = kind
+        pool.start(job)
+        return job.job_id
+
+    @Slot()
+    def submit(self):
+        prompt = self.ui.input_value.toPlainText().strip()
+        if not prompt:
+            return
+        self.ui.input_value.clear()
+        self.say(f"> {prompt}", "user")
+        if self.bot is not None:
+            self.run_pipeline(self.bot.learn, prompt)
+        if self.generator is not None:
+            self.run_generation(prompt)
+
+    def run_pipeline(self, fn, *args, **kwargs):
+        job = AERULITH_PipelineJob(self._signals(), fn, *args, **kwargs)
+        self.log(f"[Pipeline #{job.job_id}] queued {getattr(fn, '__name__', 'job')}{args}")
+        return self._start(job, "Pipeline", self.pipeline_pool)
+
+    def run_generation(self, prompt, stop=None):
+        # Sampling controls are read here, on the GUI thread
+        job = AERULITH_GenerationJob(self._signals(), self.generator, prompt, self.max_tokens, stop,
+                                     self.ui.temp_value.value(), self.ui.top_p_value.value())
+        self.replies[job.job_id] = self.say("")
+        self.log(f"[Generate #{job.job_id}] temp {job.temperature:.2f} top_p {job.top_p:.2f}")
+        return self._start(job, "Generate", self.generation_pool)
+
+    @Slot()
+    def cancel(self, job_id=None):
+        """
+        Cancels one job, or every queued and running job. Queued jobs report
+        cancelled when the pool reaches them.
+        """
+        for jid, (cancel_event, _) in self.jobs.items():
+            if job_id is None or jid == job_id:
+                cancel_event.set()
+
+    def _done(self, job_id, message):
+        _, signals = self.jobs.pop(job_id)
+        signals.deleteLater()
+        started = self.started_at.pop(job_id, None)
+        seconds = time.perf_counter() - started if started is not None else None
+        elapsed = f" in {seconds:.2f}s" if seconds is not None else ""
+        kind = self.kinds.pop(job_id)
+        # Counted pieces, which match tokens unless a stop sequence holds text back
+        tokens = self.token_counts.pop(job_id, 0)
+        if self.feed is not None and self.feed.enabled and kind == "Generate" and seconds:
+            self.feed.record_generation(tokens, seconds)
+        self.log(f"[{kind} #{job_id}] {message}{elapsed}")
+        self.replies.pop(job_id, None)
+        if not self.jobs:
+            self.ui.statusbar.clearMessage()
+
+    @Slot(int)
+    def _on_started(self, job_id):
+        self.started_at[job_id] = time.perf_counter()
+        self.ui.statusbar.showMessage("Working... (Esc to cancel)")
+
+    @Slot(int, str)
+    def _on_token(self, job_id, piece):
+        self.token_counts[job_id] = self.token_counts.get(job_id, 0) + 1
+        message_id = self.replies.get(job_id)
+        if message_id is not None:
+            self.chat.append_text(message_id, piece)
+
+    @Slot(int, object)
+    def _on_finished(self, job_id, result):
+        self._done(job_id, f"done: {result!r}" if self.kinds[job_id] == "Pipeline" else "done")
+
+    @Slot(int, str)
+    def _on_failed(self, job_id, error):
+        self._done(job_id, f"failed: {error}")
+
+    @Slot(int)
+    def _on_cancelled(self, job_id):
+        self._done(job_id, "cancelled")
+
+    def shutdown(self):
+        if self.dashboard is not None:
+            self.dashboard.stop()
+        self.teacher.closing.set()
+        self.cancel()
+        self.pipeline_pool.waitForDone()
+        self.generation_pool.waitForDone()
+
+if __name__ == "__main__":
+    import os
+    import sys
+    from PySide6.QtWidgets import QApplication, QMainWindow
+    from UI_v1_0 import AERULITH_MainWindow
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path[:0] = [root, os.path.join(root, "CIRRETH")]
+    from core import DynamicBot
+    from NACJAC_configurator import NACJAC_Config
+    from NACJAC_netrun import NACJAC_Generator
+    from telemetry import feed
+
+    app = QApplication(sys.argv)
+    window = QMainWindow()
+    ui = AERULITH_MainWindow()
+    ui.UI_Setup(window)
+    config = NACJAC_Config()
+    generator = NACJAC_Generator(config) if os.path.exists(config.model_path) else None
+    controller = AERULITH_Controller(ui, DynamicBot(), generator, feed=feed)
+    app.aboutToQuit.connect(controller.shutdown)
+    window.show()
+    sys.exit(app.exec())
@@ -1,27 +1,71 @@
+import numpy as np
 import torch
 from NACJAC_configurator import NACJAC_Config
 from NACJAC_tokeniser import NACJAC_Tokeniser
+from NACJAC_corpus import NACJAC_Corpus
+from NACJAC_sampler import NACJAC_BatchSampler
 
 class NACJAC_Dataloader:
-    def __init__(self, config: NACJAC_Config, tokeniser: NACJAC_Tokeniser):
+    def __init__(self, config: NACJAC_Config, tokeniser: NACJAC_Tokeniser, rank = 0):
         self.config = config
         self.tokeniser = tokeniser
+        self.rank = rank
         self.data = self._load_data()
         self.train_data, self.val_data = self._split_data()
+        self.samplers = {}
 
     def _load_data(self):
-        with open(self.config.data_path, 'r', encoding = 'utf-8') as f:
-            text = f.read()
-        encoded = self.tokeniser.encode(text)
-        return torch.tensor(encoded, dtype = torch.long)
+        if NACJAC_Corpus.is_stale(self.config.current_datapath, self.config.corpus_path, self.tokeniser):
+            print(f"Tokenizing {self.config.current_datapath} -> {self.config.corpus_path}")
+            NACJAC_Corpus.build(self.config.current_datapath, self.config.corpus_path, self.tokeniser)
+        return NACJAC_Corpus(self.config.corpus_path).tokens
     def _split_data(self):
         n = int(0.8 * len(self.data))
         return self.data[:n], self.data[n:]
     
-    def _get_batch(self, split = 'train'):
+    def _sampler(self, split):
+        if split not in self.samplers:
+            data_ = self.train_data if split=='train' else self.val_data
+            self.samplers[split] = NACJAC_BatchSampler(
+                data_, self.config.batch_size, self.config.block_size,
+                prefetch=self.config.prefetch_batches, pin_memory=self.config.pin_memory,
+                seed=self._seed(split)).start()
+        return self.samplers[split]
+
+    def _seed(self, split):
+        # Each rank (and split) draws its own stream over the shared corpus
+        if self.config.seed is None:
+            return None
+        return (self.config.seed, self.rank, split == 'train')
+
+    def get_batch(self, split = 'train'):
+        x, y = self._sampler(split).next()
+        non_blocking = self.config.pin_memory
+        return x.to(self.config.device, non_blocking=non_blocking), y.to(self.config.device, non_blocking=non_blocking)
+
+    def eval_batches(self, split = 'val'):
+        """
+        Yields the same config.eval_windows windows of `split` on every
+        call, evenly spaced over it, in batches of config.eval_batch_size.
+        """
         data_ = self.train_data if split=='train' else self.val_data
-        ix = torch.randint(len(data_) - self.config.block_size, (self.config.block_size,))
-        x = torch.stack([data_[i:i+self.config.block_size] for i in ix])
-        y = torch.stack([data_[i+1:i+self.config.block_size+1] for i in ix])
-        return x.to(self.config.device), y.to(self.config.device)
-        
+        windows = np.lib.stride_tricks.sliding_window_view(data_, self.config.block_size + 1)
+        ix = np.linspace(0, len(windows) - 1, min(self.config.eval_windows, len(windows))).astype(np.int64)
+        for start in range(0, len(ix), self.config.eval_batch_size):
+            batch = torch.from_numpy(windows[ix[start:start + self.config.eval_batch_size]].astype(np.int64))
+            yield batch[:, :-1].contiguous().to(self.config.device), batch[:, 1:].contiguous().to(self.config.device)
+
+    def state(self):
+        """
+        Position of each split's sampling stream, for checkpoints.
+        """
+        return {split: sampler.state() for split, sampler in self.samplers.items()}
+
+    def set_state(self, state):
+        for split, sampler_state in state.items():
+            self._sampler(split).set_state(sampler_state)
+
+    def close(self):
+        for sampler in self.samplers.values():
+            sampler.close()
+        self.samplers = {}
@@ -0,0 +1,175 @@
+import queue
+import threading
+import torch
+from concurrent.futures import Future
+from NACJAC_netrun import NACJAC_Generator
+from NACJAC_model import NACJAC_kv_window, NACJAC_sample
+
+class NACJAC_Request:
+    def __init__(self, tokens, max_tokens):
+        self.tokens = tokens
+        self.max_tokens = max_tokens
+        self.generated = []
+        self.future = Future()
+        self.slot = None
+        self.length = 0
+
+class NACJAC_BatchEngine:
+    """
+    Continuous-batching inference over one NACJAC_Generator's model.
+    Requests queue up and join the running batch between decode steps.
+    Each one holds a slot in a shared per-layer key/value buffer. Prompts
+    of different lengths are right-padded into one prefill. Decode steps
+    attend over the padded buffer under per-row attention masks.
+    """
+    def __init__(self, generator: NACJAC_Generator, max_batch_size=8, max_queue=256):
+        self.generator = generator
+        self.model = generator.model
+        self.tokenizer = generator.tokenizer
+        self.config = generator.config
+        self.max_batch_size = max_batch_size
+        self.requests = queue.Queue(maxsize=max_queue)
+        self._running = False
+        self._thread = None
+
+        n_heads = self.config.n_heads
+        head_size = self.config.n_embed // n_heads
+        shape = (max_batch_size, n_heads, self.config.block_size, head_size)
+        device = self.config.device
+        self.k_cache = [torch.zeros(shape, device=device) for _ in range(self.config.n_layers)]
+        self.v_cache = [torch.zeros(shape, device=device) for _ in range(self.config.n_layers)]
+        self.free_slots = list(range(max_batch_size))
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="NACJAC_BatchEngine", daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self, wait=True):
+        """
+        Stops admitting new work; queued and running requests still finish.
+        """
+        self._running = False
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def submit(self, prompt: str, max_tokens=None, timeout=None) -> Future:
+        """
+        Queues a prompt and returns a Future resolving to its continuation.
+        Blocks (up to `timeout`) while the queue is full, raising queue.Full
+        after that. The Future can be cancelled until the request joins the
+        batch; a cancelled request never takes a slot.
+        """
+        if not self._running:
+            raise RuntimeError("NACJAC_BatchEngine is not running")
+        tokens = self.tokenizer.encode(prompt)
+        if not tokens:
+            raise ValueError("Prompt must encode to at least one token")
+        request = NACJAC_Request(tokens, max_tokens or self.config.max_tokens)
+        self.requests.put(request, timeout=timeout)
+        return request.future
+
+    def _admit(self, request, admitted):
+        # False once the caller cancelled; such requests are dropped here
+        if request.future.set_running_or_notify_cancel():
+            request.slot = self.free_slots.pop()
+            admitted.append(request)
+
+    def _release(self, request, result=None, error=None):
+        if not request.future.done():
+            if error is not None:
+                request.future.set_exception(error)
+            else:
+                request.future.set_result(result)
+        self.free_slots.append(request.slot)
+
+    def _loop(self):
+        active = []
+        while self._running or active or not self.requests.empty():
+            admitted = []
+            while self.free_slots and not self.requests.empty():
+                self._admit(self.requests.get_nowait(), admitted)
+            if not active and not admitted:
+                try:
+                    request = self.requests.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                self._admit(request, admitted)
+                if not admitted:
+                    continue
+            # Resolved elsewhere (e.g. set by the caller): free the slot now
+            for request in [r for r in active if r.future.done()]:
+                self._release(request)
+                active.remove(request)
+            try:
+                # Positions are absolute: full slots restart from recent tokens
+                refill = [r for r in active if r.length >= self.config.block_size]
+                if admitted or refill:
+                    self._prefill(admitted + refill)
+                decoding = [r for r in active if r not in refill]
+                if decoding:
+                    self._decode(decoding)
+            except Exception as e:
+                for request in active + admitted:
+                    self._release(request, error=e)
+                active = []
+                continue
+            active += admitted
+            for request in [r for r in active if len(r.generated) >= r.max_tokens]:
+                self._release(request, self.tokenizer.decode(request.generated))
+                active.remove(request)
+
+    @torch.no_grad()
+    def _prefill(self, batch):
+        device = self.config.device
+        windows = []
+        for request in batch:
+            history = request.tokens + request.generated
+            keep = self.config.block_size if not request.generated else NACJAC_kv_window(self.config)
+            windows.append(history[-keep:])
+        lengths = torch.tensor([len(w) for w in windows], device=device)
+        T = int(lengths.max())
+        idx = torch.zeros(len(batch), T, dtype=torch.long, device=device)
+        for row, window in enumerate(windows):
+            idx[row, :len(window)] = torch.tensor(window, device=device)
+
+        keys = torch.arange(T, device=device)
+        causal = keys[None, :] <= keys[:, None]
+        valid = keys[None, :] < lengths[:, None]
+        mask = (causal[None] & valid[:, None, :])[:, None]
+        logits, presents = self.model.forward_cached(idx, positions=keys, attn_mask=mask)
+
+        for row, request in enumerate(batch):
+            n = len(windows[row])
+            for layer, (k, v) in enumerate(presents):
+                self.k_cache[layer][request.slot, :, :n] = k[row, :, :n]
+                self.v_cache[layer][request.slot, :, :n] = v[row, :, :n]
+            request.length = n
+        last = logits[torch.arange(len(batch), device=device), lengths - 1]
+        self._sample(batch, last)
+
+    @torch.no_grad()
+    def _decode(self, batch):
+        device = self.config.device
+        slots = torch.tensor([r.slot for r in batch], device=device)
+        lengths = torch.tensor([r.length for r in batch], device=device)
+        L = int(lengths.max())
+        idx = torch.tensor([[r.generated[-1]] for r in batch], device=device)
+        past_kvs = [(k[slots, :, :L], v[slots, :, :L]) for k, v in zip(self.k_cache, self.v_cache)]
+        # Each row sees its own cached prefix plus the new token at the end
+        valid = torch.arange(L + 1, device=device)[None, :] < lengths[:, None]
+        valid[:, -1] = True
+        logits, presents = self.model.forward_cached(
+            idx, past_kvs, positions=lengths[:, None], attn_mask=valid[:, None, None, :])
+        for layer, (k, v) in enumerate(presents):
+            self.k_cache[layer][slots, :, lengths] = k[:, :, -1]
+            self.v_cache[layer][slots, :, lengths] = v[:, :, -1]
+        for request in batch:
+            request.length += 1
+        self._sample(batch, logits[:, -1])
+
+    def _sample(self, batch, logits):
+        next_idx = NACJAC_sample(logits)[:, 0].tolist()
+        for request, token in zip(batch, next_idx):
+            request.generated.append(token)
@@ -0,0 +1,365 @@
+import argparse
+import copy
+import math
+import multiprocessing
+import os
+import resource
+import string
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import torch
+import torch.distributed as dist
+from NACJAC_configurator import NACJAC_Config
+from NACJAC_model import NACJAC_LangModel, NACJAC_load_model, NACJAC_quantize_dynamic, NACJAC_MultiHeadAttention, NACJAC_FusedMultiHeadAttention
+from NACJAC_netrun import NACJAC_Generator
+from NACJAC_batcher import NACJAC_BatchEngine
+from NACJAC_tokeniser import NACJAC_get_tokeniser
+from NACJAC_sampler import NACJAC_BatchSampler
+from NACJAC_engine import NACJAC_TrainEngine
+from NACJAC_DataLoader import NACJAC_Dataloader
+from NACJAC_distributed import NACJAC_launch, NACJAC_init_process
+
+class _BenchTokeniser:
+    chars = string.printable
+
+    def encode(self, s):
+        return [self.chars.index(c) for c in s]
+
+    def decode(self, ids):
+        return ''.join(self.chars[i] for i in ids)
+
+    def vocab_size(self):
+        return len(self.chars)
+
+def _bench_generator(config):
+    # Random weights and a printable-ASCII vocab: no checkpoint or corpus needed
+    generator = NACJAC_Generator.__new__(NACJAC_Generator)
+    generator.config = config
+    generator.tokenizer = _BenchTokeniser()
+    generator.vocab_size = generator.tokenizer.vocab_size()
+    generator.model = NACJAC_LangModel(config, generator.vocab_size).to(config.device).eval()
+    return generator
+
+def _timed(fn, iters, warmup=2):
+    for _ in range(warmup):
+        fn()
+    start = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - start) / iters
+
+def bench_attention(config, batch_size=16, iters=10):
+    head_size = config.n_embed // config.n_heads
+    args = (config.n_heads, head_size, config.n_embed, config.block_size, 'cpu')
+    per_head = NACJAC_MultiHeadAttention(*args)
+    fused = NACJAC_FusedMultiHeadAttention(*args)
+    fused.load_state_dict(per_head.state_dict())
+
+    x = torch.randn(batch_size, config.block_size, config.n_embed)
+    per_head.eval(), fused.eval()
+    with torch.no_grad():
+        diff = (per_head(x) - fused(x)).abs().max().item()
+    print(f"[attention] B={batch_size} T={config.block_size} C={config.n_embed} "
+          f"heads={config.n_heads}  converted max |diff| = {diff:.2e}")
+
+    tokens = batch_size * config.block_size
+    for name, module in (("per-head", per_head), ("fused", fused)):
+        module.train()
+        with torch.no_grad():
+            t_fwd = _timed(lambda: module(x), iters)
+        xg = x.clone().requires_grad_(True)
+        t_bwd = _timed(lambda: module(xg).sum().backward(), iters)
+        print(f"  {name:<9} forward {tokens / t_fwd:10.0f} tok/s   "
+              f"forward+backward {tokens / t_bwd:10.0f} tok/s")
+
+def bench_generate(config, max_tokens=300, vocab_size=80):
+    model = NACJAC_LangModel(config, vocab_size).to(config.device).eval()
+    prompt = torch.randint(0, vocab_size, (1, 16), device=config.device)
+    print(f"[generate] {max_tokens} tokens, block_size={config.block_size}, "
+          f"{config.n_layers} layers x {config.n_embed} dim")
+    rates = {}
+    for use_cache in (False, True):
+        t = _timed(lambda: model.generate(prompt, max_tokens, use_cache=use_cache), 1, warmup=0)
+        rates[use_cache] = max_tokens / t
+        print(f"  {'kv cache' if use_cache else 'full recompute':<15} {rates[use_cache]:8.1f} tok/s")
+    print(f"  speedup: {rates[True] / rates[False]:.1f}x")
+
+def bench_batching(config, n_requests=32, max_tokens=64, batch_sizes=(1, 2, 4, 8, 16)):
+    generator = _bench_generator(config)
+    prompts = [("Once upon a time " * 8)[:8 + (i * 7) % 56] for i in range(n_requests)]
+    print(f"[batching] {n_requests} requests x {max_tokens} tokens, prompts 8-63 chars")
+    for batch_size in batch_sizes:
+        engine = NACJAC_BatchEngine(generator, max_batch_size=batch_size).start()
+        latencies = []
+        start = time.perf_counter()
+        futures = []
+        for prompt in prompts:
+            submitted = time.perf_counter()
+            future = engine.submit(prompt, max_tokens)
+            future.add_done_callback(lambda f, t=submitted: latencies.append(time.perf_counter() - t))
+            futures.append(future)
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+        engine.shutdown()
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"  batch {batch_size:>2}: {n_requests * max_tokens / elapsed:8.1f} tok/s   "
+              f"latency p50 {p50:6.2f}s  p95 {p95:6.2f}s")
+
+def bench_bpe(config, sample_chars=1 << 20, max_tokens=200):
+    with open(config.current_datapath, 'r', encoding='utf-8') as f:
+        text = f.read(sample_chars)
+    print(f"[bpe] {len(text):,} chars of {config.current_datapath}, "
+          f"{max_tokens} generated tokens per vocab")
+    rates = {}
+    for tokeniser_type in ('char', 'bpe'):
+        config.tokeniser_type = tokeniser_type
+        tokeniser = NACJAC_get_tokeniser(config)
+        start = time.perf_counter()
+        n_tokens = len(tokeniser.encode(text))
+        t_encode = time.perf_counter() - start
+        chars_per_token = len(text) / n_tokens
+        # Decode cost grows with the output layer, so time each vocab's own model
+        model = NACJAC_LangModel(config, tokeniser.vocab_size()).to(config.device).eval()
+        prompt = torch.zeros((1, 1), dtype=torch.long, device=config.device)
+        tok_s = max_tokens / _timed(lambda: model.generate(prompt, max_tokens), 1, warmup=1)
+        rates[tokeniser_type] = tok_s * chars_per_token
+        print(f"  {tokeniser_type:<4} vocab {tokeniser.vocab_size():>5}  {n_tokens:>9,} tokens "
+              f"({chars_per_token:.2f} chars/token, encode {t_encode:.2f}s)  "
+              f"{tok_s:7.1f} tok/s = {rates[tokeniser_type]:7.1f} chars/s")
+    config.tokeniser_type = 'char'
+    print(f"  generation speedup: {rates['bpe'] / rates['char']:.1f}x chars/s")
+
+def bench_sampler(config, n_tokens=1 << 22, iters=50, step_seconds=0.01):
+    data = np.random.default_rng(0).integers(0, 256, n_tokens, dtype=np.uint16)
+    B, T = config.batch_size, config.block_size
+    print(f"[sampler] {n_tokens:,} tokens, batch {B} x block {T}")
+
+    def per_row():
+        # The previous loop: one slice, cast and tensor per row, then two stacks
+        ix = torch.randint(len(data) - T, (B,))
+        x = torch.stack([torch.from_numpy(data[i:i+T].astype(np.int64)) for i in ix])
+        y = torch.stack([torch.from_numpy(data[i+1:i+T+1].astype(np.int64)) for i in ix])
+        return x, y
+
+    sampler = NACJAC_BatchSampler(data, B, T, prefetch=config.prefetch_batches)
+    for name, fn in (("per-row stack", per_row), ("gather", sampler.sample)):
+        print(f"  {name:<14} {1 / _timed(fn, iters):10.0f} batches/s")
+
+    # Data wait seen by a training loop whose step takes step_seconds
+    for name, prefetch in (("inline", False), ("prefetch", True)):
+        if prefetch:
+            sampler.start()
+        wait = 0.0
+        for _ in range(iters):
+            start = time.perf_counter()
+            sampler.next()
+            wait += time.perf_counter() - start
+            time.sleep(step_seconds)
+        print(f"  {name:<14} {wait / iters * 1e6:10.0f} us data wait per step")
+    sampler.close()
+
+class _BenchLoader:
+    # Random tokens through the real sampler, so no corpus is needed
+    def __init__(self, config, vocab_size):
+        data = np.random.default_rng(0).integers(0, vocab_size, 1 << 20, dtype=np.uint16)
+        self.sampler = NACJAC_BatchSampler(data, config.batch_size, config.block_size)
+
+    def get_batch(self, split='train'):
+        return self.sampler.sample()
+
+def bench_train(config, iters=3, vocab_size=80):
+    base = (config.mixed_precision, config.compile_model, config.fused_adamw)
+    print(f"[train] batch {config.batch_size} (micro {config.micro_batch_size}) x block "
+          f"{config.block_size}, {config.n_layers} layers x {config.n_embed} dim")
+    variants = (("fp32 eager", None, False, False),
+                ("fp32 eager, fused adamw", None, False, True),
+                ("bf16 eager, fused adamw", 'bf16', False, True),
+                ("bf16 compiled, fused adamw", 'bf16', True, True))
+    tokens = config.batch_size * config.block_size
+    for name, precision, compiled, fused in variants:
+        config.mixed_precision, config.compile_model, config.fused_adamw = precision, compiled, fused
+        torch.manual_seed(0)
+        model = NACJAC_LangModel(config, vocab_size).to(config.device)
+        engine = NACJAC_TrainEngine(config, model, _BenchLoader(config, vocab_size))
+        try:
+            t = _timed(engine.step, iters, warmup=1)
+        except Exception as e:
+            print(f"  {name:<27} unavailable: {type(e).__name__}: {str(e).splitlines()[0][:80]}")
+            continue
+        print(f"  {name:<27} {t * 1000:8.0f} ms/step {tokens / t:10.0f} tok/s")
+    config.mixed_precision, config.compile_model, config.fused_adamw = base
+
+def _checkpoint_step(config, vocab_size, iters):
+    # Runs in a fresh process so ru_maxrss is this measurement's own peak
+    torch.manual_seed(0)
+    model = NACJAC_LangModel(config, vocab_size).to(config.device)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=config.learning_rate)
+    x = torch.randint(0, vocab_size, (config.batch_size, config.block_size), device=config.device)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def step():
+        optimizer.zero_grad(set_to_none=True)
+        model(x, x)[1].backward()
+        optimizer.step()
+    t = _timed(step, iters, warmup=1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return t, (peak - baseline) / 1024
+
+def bench_checkpointing(config, block_sizes=(128, 256, 512), settings=(0, 2, 1),
+                        batch_size=8, iters=2, vocab_size=80):
+    print(f"[checkpointing] batch {batch_size}, {config.n_layers} layers x {config.n_embed} dim, "
+          f"{'fused' if config.fused_attention else 'per-head'} attention; "
+          f"memory is peak RSS growth over the model and optimizer")
+    base = (config.block_size, config.batch_size, config.activation_checkpointing)
+    context = multiprocessing.get_context('spawn')
+    for block_size in block_sizes:
+        for every in settings:
+            config.block_size, config.batch_size, config.activation_checkpointing = block_size, batch_size, every
+            with ProcessPoolExecutor(1, mp_context=context) as pool:
+                t, mem_mb = pool.submit(_checkpoint_step, config, vocab_size, iters).result()
+            label = "off" if not every else "every block" if every == 1 else f"every {every} blocks"
+            print(f"  block {block_size:>4}  {label:<15} {mem_mb:8.0f} MB  "
+                  f"{batch_size * block_size / t:8.0f} tok/s")
+    config.block_size, config.batch_size, config.activation_checkpointing = base
+
+def _anonymous_mb():
+    # Private (non file-backed) memory; Linux only
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Anonymous:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float('nan')
+
+def _cold_start(config, vocab_size, path, fast):
+    start = time.perf_counter()
+    if fast:
+        model = NACJAC_load_model(config, vocab_size, path)
+    else:
+        model = NACJAC_LangModel(config, vocab_size).to(config.device)
+        model.load_state_dict(torch.load(path, map_location=config.device))
+        model.eval()
+    ready = time.perf_counter() - start
+    with torch.no_grad():
+        model.generate(torch.zeros((1, 1), dtype=torch.long, device=config.device), 1)
+    first = time.perf_counter() - start
+    return ready, first, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, _anonymous_mb()
+
+def bench_startup(config, vocab_size=80):
+    torch.manual_seed(0)
+    model = NACJAC_LangModel(config, vocab_size)
+    n_params = sum(p.numel() for p in model.parameters())
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.pt")
+        torch.save(model.state_dict(), path)
+        del model
+        print(f"[startup] {n_params / 1e6:.1f}M parameters, "
+              f"{os.path.getsize(path) / 2**20:.0f} MB checkpoint, fresh process per load")
+        for name, fast in (("eager load", False), ("meta + mmap", True)):
+            with ProcessPoolExecutor(1, mp_context=context) as pool:
+                ready, first, peak, anon = pool.submit(_cold_start, config, vocab_size, path, fast).result()
+            print(f"  {name:<12} ready {ready * 1000:7.0f} ms  first token {first * 1000:7.0f} ms  "
+                  f"peak RSS {peak:6.0f} MB  private {anon:6.0f} MB")
+
+def _val_loss(model, data, config, n_windows=64, batch_size=16):
+    # Evenly spaced, fixed windows so both models see identical tokens
+    windows = np.lib.stride_tricks.sliding_window_view(data, config.block_size + 1)
+    ix = np.linspace(0, len(windows) - 1, n_windows).astype(np.int64)
+    total = 0.0
+    with torch.no_grad():
+        for chunk in np.array_split(ix, max(1, n_windows // batch_size)):
+            batch = torch.from_numpy(windows[chunk].astype(np.int64))
+            total += model(batch[:, :-1].contiguous(), batch[:, 1:].contiguous())[1].item() * len(chunk)
+    return total / n_windows
+
+def bench_quantize(config, val_chars=200_000, max_tokens=200):
+    tokeniser = NACJAC_get_tokeniser(config)
+    vocab_size = tokeniser.vocab_size()
+    if os.path.exists(config.model_path):
+        fp32 = NACJAC_load_model(config, vocab_size, config.model_path)
+        source = config.model_path
+    else:
+        torch.manual_seed(0)
+        fp32 = NACJAC_LangModel(config, vocab_size).eval()
+        source = "random weights (no trained checkpoint found)"
+    with open(config.current_datapath, 'r', encoding='utf-8') as f:
+        text = f.read()
+    # Validation text is the tail of the corpus, as in NACJAC_Dataloader's split
+    val = tokeniser.encode_array(text[int(0.8 * len(text)):][:val_chars])
+    int8 = NACJAC_quantize_dynamic(copy.deepcopy(fp32))
+
+    print(f"[quantize] {source}, {len(val):,} validation tokens, {max_tokens} generated tokens")
+    prompt = torch.zeros((1, 1), dtype=torch.long)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, model in (("fp32", fp32), ("int8", int8)):
+            path = os.path.join(tmp, f"{name}.pt")
+            torch.save(model.state_dict(), path)
+            loss = _val_loss(model, val, config)
+            tok_s = max_tokens / _timed(lambda: model.generate(prompt, max_tokens), 1, warmup=1)
+            print(f"  {name}  val loss {loss:.4f}  perplexity {math.exp(loss):8.3f}  "
+                  f"{tok_s:7.1f} tok/s  checkpoint {os.path.getsize(path) / 2**20:5.1f} MB")
+
+def _ddp_worker(rank, world_size, config, port, steps, results):
+    NACJAC_init_process(rank, world_size, port, config.seed)
+    try:
+        tokeniser = NACJAC_get_tokeniser(config)
+        data_loader = NACJAC_Dataloader(config, tokeniser, rank)
+        model = NACJAC_LangModel(config, tokeniser.vocab_size()).to(config.device)
+        engine = NACJAC_TrainEngine(config, model, data_loader, rank=rank, world_size=world_size)
+        engine.step()
+        dist.barrier()
+        start = time.perf_counter()
+        for _ in range(steps):
+            engine.step()
+        dist.barrier()
+        elapsed = time.perf_counter() - start
+        data_loader.close()
+        if rank == 0:
+            results.put(elapsed / steps)
+    finally:
+        dist.destroy_process_group()
+
+def bench_distributed(config, world_sizes=(1, 2, 4, 8, 16), steps=3):
+    tokens = config.batch_size * config.block_size
+    print(f"[distributed] gloo, {os.cpu_count()} cores, {config.n_layers} layers x {config.n_embed} dim, "
+          f"batch {config.batch_size} x block {config.block_size} per rank")
+    results = multiprocessing.get_context('spawn').SimpleQueue()
+    base = None
+    for world_size in world_sizes:
+        NACJAC_launch(config, world_size, _ddp_worker, (steps, results))
+        t = results.get()
+        rate = tokens * world_size / t
+        base = base or rate
+        print(f"  {world_size:>2} procs  {t * 1000:8.0f} ms/step  {rate:9.0f} tok/s  "
+              f"speedup {rate / base:5.2f}x  efficiency {rate / base / world_size:4.0%}")
+
+BENCHMARKS = {
+    'attention': bench_attention,
+    'generate': bench_generate,
+    'batching': bench_batching,
+    'bpe': bench_bpe,
+    'sampler': bench_sampler,
+    'train': bench_train,
+    'checkpointing': bench_checkpointing,
+    'startup': bench_startup,
+    'quantize': bench_quantize,
+    'distributed': bench_distributed,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NACJAC CPU benchmarks")
+    parser.add_argument('name', choices=sorted(BENCHMARKS) + ['all'])
+    args = parser.parse_args()
+    config = NACJAC_Config()
+    config.device = 'cpu'
+    for name, bench in BENCHMARKS.items():
+        if args.name in (name, 'all'):
+            bench(config)
@@ -0,0 +1,153 @@
+import functools
+import hashlib
+import heapq
+import os
+import re
+from collections import Counter, defaultdict
+import numpy as np
+
+# Words keep their leading space, so merges never cross a word boundary
+_WORD_PATTERN = re.compile(r"\s?\w+|\s?[^\s\w]+|\s+(?!\S)|\s+")
+# Merge pairs are stored as uint16, so every id must fit in 16 bits
+_MAX_VOCAB_SIZE = 1 << 16
+
+def _check_vocab_size(vocab_size):
+    if vocab_size > _MAX_VOCAB_SIZE:
+        raise ValueError(f"bpe_vocab_size={vocab_size} does not fit the uint16 merge table "
+                         f"(at most {_MAX_VOCAB_SIZE})")
+
+class NACJAC_BPETokeniser:
+    """
+    Byte-level byte-pair tokenizer trained on the configured corpus. Ids
+    0-255 are raw bytes and id 256 + r is the merge of rank r. The merge
+    table is saved as an (n_merges, 2) uint16 array.
+    """
+    def __init__(self, config):
+        self.bpe_path = config.bpe_path
+        self.datapath = config.current_datapath
+        self.target_vocab_size = config.bpe_vocab_size
+        _check_vocab_size(self.target_vocab_size)
+        if os.path.exists(self.bpe_path):
+            merges = np.load(self.bpe_path)
+        else:
+            merges = self.train(self.datapath, self.target_vocab_size)
+            np.save(self.bpe_path, merges)
+        self._set_merges(merges)
+        self._encode_word = functools.lru_cache(maxsize=config.bpe_cache_size)(self._merge_word)
+
+    def _set_merges(self, merges):
+        self.merges = np.asarray(merges, dtype=np.uint16).reshape(-1, 2)
+        self.ranks = {(int(a), int(b)): rank for rank, (a, b) in enumerate(self.merges)}
+        self.vocab = [bytes([i]) for i in range(256)]
+        for a, b in self.merges:
+            self.vocab.append(self.vocab[a] + self.vocab[b])
+
+    @staticmethod
+    def train(filepath, vocab_size, chunk_chars = 1 << 20):
+        """
+        Learns vocab_size - 256 merges. Pair counts are kept incrementally:
+        each merge only revisits the words that contain the merged pair.
+        """
+        _check_vocab_size(vocab_size)
+        word_counts = Counter()
+        with open(filepath, 'r', encoding='utf-8') as f:
+            while chunk := f.read(chunk_chars):
+                chunk += f.readline()
+                word_counts.update(_WORD_PATTERN.findall(chunk))
+        words = [list(word.encode('utf-8')) for word in word_counts]
+        freqs = list(word_counts.values())
+
+        pair_counts = Counter()
+        pair_words = defaultdict(set)
+        for w, (symbols, freq) in enumerate(zip(words, freqs)):
+            for pair in zip(symbols, symbols[1:]):
+                pair_counts[pair] += freq
+                pair_words[pair].add(w)
+
+        merges = []
+        for new_id in range(256, vocab_size):
+            if not pair_counts:
+                break
+            best = max(pair_counts, key=pair_counts.get)
+            if pair_counts[best] < 2:
+                break
+            merges.append(best)
+            for w in pair_words.pop(best, ()):
+                symbols, freq = words[w], freqs[w]
+                for pair in zip(symbols, symbols[1:]):
+                    pair_counts[pair] -= freq
+                    if pair_counts[pair] <= 0:
+                        del pair_counts[pair]
+                merged, i = [], 0
+                while i < len(symbols):
+                    if i + 1 < len(symbols) and (symbols[i], symbols[i + 1]) == best:
+                        merged.append(new_id)
+                        i += 2
+                    else:
+                        merged.append(symbols[i])
+                        i += 1
+                words[w] = merged
+                for pair in zip(merged, merged[1:]):
+                    pair_counts[pair] += freq
+                    pair_words[pair].add(w)
+        return np.array(merges, dtype=np.uint16).reshape(-1, 2)
+
+    def _merge_word(self, word):
+        """
+        Applies merges lowest rank first using a heap of adjacent pairs over
+        a linked list of symbols, instead of rescanning the word per merge.
+        """
+        symbols = list(word.encode('utf-8'))
+        n = len(symbols)
+        if n < 2:
+            return tuple(symbols)
+        nxt = list(range(1, n + 1))
+        prv = list(range(-1, n - 1))
+        heap = [(self.ranks[(symbols[i], symbols[i + 1])], i)
+                for i in range(n - 1) if (symbols[i], symbols[i + 1]) in self.ranks]
+        heapq.heapify(heap)
+        while heap:
+            rank, i = heapq.heappop(heap)
+            j = nxt[i]
+            # Skip entries made stale by an earlier merge
+            if symbols[i] is None or j >= n or self.ranks.get((symbols[i], symbols[j])) != rank:
+                continue
+            symbols[i] = 256 + rank
+            symbols[j] = None
+            nxt[i] = nxt[j]
+            if nxt[j] < n:
+                prv[nxt[j]] = i
+            for left in (prv[i], i):
+                right = nxt[left] if left >= 0 else n
+                if left >= 0 and right < n:
+                    pair_rank = self.ranks.get((symbols[left], symbols[right]))
+                    if pair_rank is not None:
+                        heapq.heappush(heap, (pair_rank, left))
+        return tuple(s for s in symbols if s is not None)
+
+    def encode(self, s):
+        ids = []
+        for word in _WORD_PATTERN.findall(s):
+            ids.extend(self._encode_word(word))
+        return ids
+
+    def encode_array(self, s):
+        return np.array(self.encode(s), dtype=np.int64)
+
+    def token_bytes(self, i):
+        return self.vocab[i]
+
+    def decode(self, s):
+        return b''.join(self.vocab[i] for i in s).decode('utf-8', errors='replace')
+
+    def vocab_size(self):
+        return len(self.vocab)
+
+    def fingerprint(self):
+        # 16-byte digest of the merge table, which fixes every id
+        return hashlib.sha256(b"bpe" + self.merges.astype('<u2').tobytes()).digest()[:16]
+
+    def cache_info(self):
+        # Word-cache hits and misses, read by dashboards without touching encode()
+        info = self._encode_word.cache_info()
+        return info.hits, info.misses
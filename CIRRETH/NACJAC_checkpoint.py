@@ -0,0 +1,156 @@
+import json
+import os
+import random
+import numpy as np
+import torch
+
+def NACJAC_read_manifest(path):
+    if not os.path.exists(path):
+        return {"latest_version": None, "models": {}, "checkpoints": {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _atomic_torch_save(obj, path):
+    tmp_path = f"{path}.tmp"
+    torch.save(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+def _rng_state():
+    return {
+        'torch': torch.get_rng_state(),
+        'cuda': torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None,
+        'numpy': np.random.get_state(),
+        'python': random.getstate(),
+    }
+
+def _set_rng_state(state):
+    torch.set_rng_state(state['torch'])
+    if state['cuda'] is not None and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state['cuda'])
+    np.random.set_state(state['numpy'])
+    random.setstate(state['python'])
+
+def NACJAC_rank_state(data_loader=None):
+    """
+    This process's RNG state and, given its data loader, the position of
+    its sampling streams. A checkpoint holds one of these per rank.
+    """
+    return {'rng': _rng_state(), 'data': data_loader.state() if data_loader is not None else None}
+
+class NACJAC_CheckpointManager:
+    """
+    Periodic, atomic training checkpoints for one model version and stage
+    ('train' or 'finetune'). Each checkpoint holds the model, optimizer,
+    scheduler, step, and every rank's RNG and sampler state, and is written to a temporary file then
+    moved into place. The manifest at config.manifest_path lists the
+    checkpoints of every run and the saved model versions; only the newest
+    config.keep_checkpoints of a run are kept on disk.
+    """
+    def __init__(self, config, stage='train'):
+        self.config = config
+        self.stage = stage
+        self.run = f"{config.model_name}_{config.finetune_loop}_{stage}"
+        os.makedirs(config.checkpoint_dir, exist_ok=True)
+
+    def _load_manifest(self):
+        return NACJAC_read_manifest(self.config.manifest_path)
+
+    def _save_manifest(self, manifest):
+        tmp_path = f"{self.config.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.config.manifest_path)
+
+    def save(self, step, model, optimizer, scheduler=None, rank_states=None):
+        """
+        `rank_states` is the NACJAC_rank_state() of each rank, in rank
+        order; without it only this process's RNG state is kept.
+        """
+        path = os.path.join(self.config.checkpoint_dir, f"{self.run}_step{step:07d}.pt")
+        _atomic_torch_save({
+            'model': model.state_dict(),
+            'optimizer': optimizer.state_dict(),
+            'scheduler': scheduler.state_dict() if scheduler is not None else None,
+            'step': step,
+            'max_iters': self.config.max_iters,
+            'ranks': rank_states if rank_states is not None else [NACJAC_rank_state()],
+        }, path)
+
+        manifest = self._load_manifest()
+        entries = [e for e in manifest["checkpoints"].get(self.run, []) if e["path"] != path]
+        entries.append({"step": step, "path": path})
+        # Checkpoints a saved model points at survive pruning
+        pinned = {m.get("checkpoint") for m in manifest["models"].values()}
+        while len(entries) > self.config.keep_checkpoints:
+            old = next((e for e in entries if e["path"] not in pinned), None)
+            if old is None:
+                break
+            entries.remove(old)
+            if os.path.exists(old["path"]):
+                os.remove(old["path"])
+        manifest["checkpoints"][self.run] = entries
+        self._save_manifest(manifest)
+        return path
+
+    def latest(self):
+        entries = self._load_manifest()["checkpoints"].get(self.run, [])
+        return entries[-1] if entries else None
+
+    def _load(self, path):
+        # Our own files; they hold RNG and optimizer state, not just tensors
+        return torch.load(path, map_location=self.config.device, weights_only=False)
+
+    def resume(self, model, optimizer, scheduler=None, data_loader=None, rank=0):
+        """
+        Restores the newest unfinished checkpoint of this run and returns
+        the step to continue from, or 0 when there is nothing to resume.
+        Each rank gets back its own RNG state and, with `data_loader`, its
+        own sampling position, so batches continue where they stopped.
+        """
+        entry = self.latest()
+        if entry is None or not os.path.exists(entry["path"]):
+            return 0
+        state = self._load(entry["path"])
+        if state['step'] >= state['max_iters']:
+            return 0
+        model.load_state_dict(state['model'])
+        optimizer.load_state_dict(state['optimizer'])
+        if scheduler is not None and state['scheduler'] is not None:
+            scheduler.load_state_dict(state['scheduler'])
+        # A rank the checkpoint has no state for (more ranks than when it
+        # was saved) keeps its fresh seeding
+        if rank < len(state['ranks']):
+            rank_state = state['ranks'][rank]
+            _set_rng_state(rank_state['rng'])
+            if data_loader is not None and rank_state['data'] is not None:
+                data_loader.set_state(rank_state['data'])
+        print(f"Resuming {self.run} from step {state['step']} ({entry['path']})")
+        return state['step']
+
+    def load_optimizer(self, optimizer, scheduler=None):
+        """
+        Loads the optimizer (and scheduler) state saved with the current
+        model version, so a fine-tune continues its AdamW moments.
+        """
+        model = self._load_manifest()["models"].get(str(self.config.finetune_loop), {})
+        path = model.get("checkpoint")
+        if not path or not os.path.exists(path):
+            return False
+        state = self._load(path)
+        optimizer.load_state_dict(state['optimizer'])
+        if scheduler is not None and state['scheduler'] is not None:
+            scheduler.load_state_dict(state['scheduler'])
+        return True
+
+    def finish(self, step, model, optimizer, scheduler=None):
+        """
+        Saves a final checkpoint and the model weights at config.model_path,
+        and records them as this model version in the manifest.
+        """
+        path = self.save(step, model, optimizer, scheduler)
+        _atomic_torch_save(model.state_dict(), self.config.model_path)
+        manifest = self._load_manifest()
+        manifest["models"][str(self.config.finetune_loop)] = {
+            "path": self.config.model_path, "checkpoint": path, "step": step, "stage": self.stage}
+        manifest["latest_version"] = max(int(v) for v in manifest["models"])
+        self._save_manifest(manifest)
@@ -1,31 +1,107 @@
 import os
 import re
 import torch
+from NACJAC_checkpoint import NACJAC_read_manifest
 
 #CIRRETH _ CONFIG
 class NACJAC_Config:
     def __init__(self):
         self.base_model_name = "NACJAC_v1"
         self.base_vocab_name = "NACJAC_vocab_v1"
-        self.finetune_loop = self._get_latest_model_version()
-        
-        self.model_path = f"{self.base_model_name}_{self.finetune_loop}.pt"
+        # Latest version per model_name, looked up on first use
+        self._versions = {}
         self.vocab_path = f"{self.base_vocab_name}_0.pt"
 
         self.batch_size = 64
         self.block_size = 128
         self.max_iters = 10000
         self.eval_interval = 500
+        self.eval_windows = 256
+        self.eval_batch_size = 32
         self.learning_rate = 3e-4
+        self.micro_batch_size = 16
+        self.mixed_precision = 'bf16'
+        self.compile_model = False
+        self.fused_adamw = True
+        self.checkpoint_dir = "checkpoints"
+        self.checkpoint_interval = 1000
+        self.keep_checkpoints = 3
+        self.seed = None
+        self.world_size = 1
         self.n_embed = 512
         self.n_heads = 8
         self.n_layers = 8
+        self.fused_attention = True
+        # 0 = off, k = checkpoint every k-th block
+        self.activation_checkpointing = 0
         self.current_datapath = "wiz_of_oz.txt"
+        self.unknown_policy = 'replace'
+        self.unknown_char = ' '
+        self.tokeniser_type = 'char'
+        self.bpe_vocab_size = 1024
+        self.bpe_cache_size = 65536
         self.max_tokens = 300
+        self.fast_load = True
+        self.quantize = False
+        self.kv_cache = True
+        # None follows block_size // 2, whatever block_size is set to later
+        self._kv_window_keep = None
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.prefetch_batches = 2
+        self.pin_memory = self.device == 'cuda'
+
+    # Model files are only interchangeable between identical vocabularies,
+    # so every artifact path below follows tokeniser_type and bpe_vocab_size
+    @property
+    def model_name(self):
+        if self.tokeniser_type == 'bpe':
+            return f"{self.base_model_name}_bpe{self.bpe_vocab_size}"
+        return self.base_model_name
+
+    @property
+    def corpus_path(self):
+        return os.path.splitext(self.current_datapath)[0] + ".bin"
+
+    @property
+    def bpe_path(self):
+        return f"{self.base_vocab_name}_bpe{self.bpe_vocab_size}.npy"
+
+    @property
+    def manifest_path(self):
+        return f"{self.model_name}_manifest.json"
+
+    @property
+    def finetune_loop(self):
+        if self.model_name not in self._versions:
+            self._versions[self.model_name] = self._get_latest_model_version()
+        return self._versions[self.model_name]
+
+    @property
+    def model_path(self):
+        return f"{self.model_name}_{self.finetune_loop}.pt"
+
+    @property
+    def quantized_model_path(self):
+        return f"{self.model_name}_{self.finetune_loop}_int8.pt"
+
+    @property
+    def metrics_path(self):
+        return f"{self.model_name}_{self.finetune_loop}_metrics.jsonl"
+
+    @property
+    def kv_window_keep(self):
+        return self.block_size // 2 if self._kv_window_keep is None else self._kv_window_keep
+
+    @kv_window_keep.setter
+    def kv_window_keep(self, value):
+        self._kv_window_keep = value
 
     def _get_latest_model_version(self):
+        manifest = NACJAC_read_manifest(self.manifest_path)
+        if manifest["latest_version"] is not None:
+            return manifest["latest_version"]
+        # No manifest yet: fall back to scanning for saved model files
         files = os.listdir()
-        pattern = re.compile(fr"{self.base_model_name}_(\d+)\.pt")
+        pattern = re.compile(fr"{re.escape(self.model_name)}_(\d+)\.pt")
         versions = [int(match.group(1)) for file in files if (match := pattern.match(file))]
         return max(versions) if versions else 0
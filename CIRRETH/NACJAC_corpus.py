@@ -0,0 +1,100 @@
+import hashlib
+import os
+import struct
+import numpy as np
+
+NACJAC_CORPUS_MAGIC = b"NACJCORP"
+NACJAC_CORPUS_VERSION = 3
+# magic, version, bytes per token, vocab size, token count, tokeniser
+# fingerprint, source text size and path digest; padded to 64 bytes
+_HEADER = struct.Struct("<8sIIIQ16sQ8s")
+_HEADER_SIZE = 64
+_DTYPES = {1: np.uint8, 2: np.uint16, 4: np.uint32}
+
+def _source_of(text_path):
+    # Size and a digest of the absolute path, enough to tell two texts apart
+    path = os.path.abspath(text_path).encode('utf-8')
+    return os.path.getsize(text_path), hashlib.sha256(path).digest()[:8]
+
+class NACJAC_Corpus:
+    """
+    Pre-tokenized corpus stored as a flat .bin of uint8/uint16 token ids
+    behind a small header, opened with np.memmap so batches slice straight
+    from the page cache instead of an in-memory tensor.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"{path} is not a NACJAC v{NACJAC_CORPUS_VERSION} corpus")
+        (magic, version, itemsize, vocab_size, n_tokens, fingerprint,
+         source_size, source_digest) = _HEADER.unpack(header)
+        if magic != NACJAC_CORPUS_MAGIC or version != NACJAC_CORPUS_VERSION:
+            raise ValueError(f"{path} is not a NACJAC v{NACJAC_CORPUS_VERSION} corpus")
+        self.path = path
+        self.vocab_size = vocab_size
+        self.fingerprint = fingerprint
+        self.source = (source_size, source_digest)
+        self.tokens = np.memmap(path, dtype=_DTYPES[itemsize], mode='r',
+                                offset=_HEADER_SIZE, shape=(n_tokens,))
+
+    def __len__(self):
+        return len(self.tokens)
+
+    @staticmethod
+    def build(text_path, out_path, tokeniser, chunk_chars=1 << 20):
+        """
+        Tokenizes `text_path` chunk by chunk into `out_path`; memory use is
+        bounded by twice the chunk size, not the corpus size. The file is
+        written under a temporary name and moved into place when complete.
+        """
+        vocab_size = tokeniser.vocab_size()
+        itemsize = 1 if vocab_size <= 1 << 8 else 2 if vocab_size <= 1 << 16 else 4
+        dtype = _DTYPES[itemsize]
+        tmp_path = f"{out_path}.tmp"
+        n_tokens = 0
+        with open(text_path, 'r', encoding='utf-8') as src, open(tmp_path, 'wb') as dst:
+            dst.write(b"\0" * _HEADER_SIZE)
+            while True:
+                # End chunks on a line break so no word is split between chunks,
+                # unless the line is longer than a chunk (e.g. no newlines at all)
+                chunk = src.read(chunk_chars)
+                if not chunk:
+                    break
+                chunk += src.readline(chunk_chars)
+                ids = tokeniser.encode_array(chunk).astype(dtype)
+                dst.write(ids.tobytes())
+                n_tokens += len(ids)
+            dst.seek(0)
+            dst.write(_HEADER.pack(NACJAC_CORPUS_MAGIC, NACJAC_CORPUS_VERSION, itemsize, vocab_size,
+                                   n_tokens, tokeniser.fingerprint(), *_source_of(text_path)))
+        os.replace(tmp_path, out_path)
+        return n_tokens
+
+    @staticmethod
+    def is_stale(text_path, corpus_path, tokeniser):
+        """
+        True when the corpus is missing, older than the text, was built
+        from another text file or a different size of it, or was encoded
+        by a tokeniser with a different vocabulary or merges.
+        """
+        if not os.path.exists(corpus_path):
+            return True
+        if os.path.exists(text_path) and os.path.getmtime(text_path) > os.path.getmtime(corpus_path):
+            return True
+        try:
+            corpus = NACJAC_Corpus(corpus_path)
+        except ValueError:
+            return True
+        if os.path.exists(text_path) and corpus.source != _source_of(text_path):
+            return True
+        return corpus.fingerprint != tokeniser.fingerprint()
+
+if __name__ == "__main__":
+    from NACJAC_configurator import NACJAC_Config
+    from NACJAC_tokeniser import NACJAC_get_tokeniser
+
+    config = NACJAC_Config()
+    tokeniser = NACJAC_get_tokeniser(config)
+    n = NACJAC_Corpus.build(config.current_datapath, config.corpus_path, tokeniser)
+    print(f"Wrote {n:,} tokens to {config.corpus_path}")
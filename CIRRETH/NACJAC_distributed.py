@@ -0,0 +1,64 @@
+import argparse
+import os
+import random
+import socket
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from NACJAC_configurator import NACJAC_Config
+from NACJAC_corpus import NACJAC_Corpus
+from NACJAC_tokeniser import NACJAC_get_tokeniser
+from NACJAC_train import NACJAC_Trainer
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def NACJAC_init_process(rank, world_size, port, seed):
+    """
+    Joins the local gloo process group and splits the host's cores evenly
+    between ranks, so intra-op threads do not oversubscribe the machine.
+    """
+    os.environ['MASTER_ADDR'] = '127.0.0.1'
+    os.environ['MASTER_PORT'] = str(port)
+    dist.init_process_group('gloo', rank=rank, world_size=world_size)
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // world_size))
+    # DDP broadcasts rank 0's weights, so per-rank seeds only vary dropout
+    torch.manual_seed(seed + rank)
+
+def _train_worker(rank, world_size, config, port):
+    NACJAC_init_process(rank, world_size, port, config.seed)
+    try:
+        NACJAC_Trainer(config, rank, world_size).train()
+    finally:
+        dist.destroy_process_group()
+
+def NACJAC_prepare_shared_files(config):
+    """
+    Builds the vocab/merges and the memory-mapped corpus once, before any
+    rank starts, so ranks only ever read them.
+    """
+    tokeniser = NACJAC_get_tokeniser(config)
+    if NACJAC_Corpus.is_stale(config.current_datapath, config.corpus_path, tokeniser):
+        print(f"Tokenizing {config.current_datapath} -> {config.corpus_path}")
+        NACJAC_Corpus.build(config.current_datapath, config.corpus_path, tokeniser)
+
+def NACJAC_launch(config, world_size=None, worker=_train_worker, args=()):
+    """
+    Runs `worker(rank, world_size, config, port, *args)` in world_size
+    local processes. Every rank gets the same base seed; ranks offset it
+    for their own sampling stream.
+    """
+    world_size = world_size or config.world_size
+    if config.seed is None:
+        config.seed = random.randrange(2 ** 31)
+    NACJAC_prepare_shared_files(config)
+    mp.spawn(worker, args=(world_size, config, _free_port(), *args), nprocs=world_size, join=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Data-parallel NACJAC training on one host")
+    parser.add_argument('--nproc', type=int, default=None, help="processes (default: config.world_size)")
+    args = parser.parse_args()
+    config = NACJAC_Config()
+    NACJAC_launch(config, args.nproc)
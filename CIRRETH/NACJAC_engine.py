@@ -0,0 +1,141 @@
+import contextlib
+import time
+import torch
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel
+from NACJAC_checkpoint import NACJAC_rank_state
+from NACJAC_metrics import NACJAC_MetricsLogger
+
+class NACJAC_TrainEngine:
+    """
+    Optimisation loop shared by NACJAC_Trainer and NACJAC_FineTuner. Each
+    step draws config.batch_size rows and runs them as micro-batches of
+    config.micro_batch_size, accumulating gradients before one optimizer
+    step. Forward passes run under bf16 autocast when
+    config.mixed_precision is 'bf16'. The model can be wrapped in
+    torch.compile, and AdamW uses its fused kernel where supported.
+    `scheduler`, if given, is called with the optimizer to build an LR
+    scheduler that steps once per optimizer step. With world_size > 1
+    the model is wrapped in DistributedDataParallel; gradients are
+    all-reduced once per step, and only rank 0 logs and checkpoints.
+    Every eval_interval steps rank 0 evaluates the fixed validation
+    windows and logs a metrics record (see NACJAC_MetricsLogger) to
+    config.metrics_path and to any `callbacks`.
+    """
+    def __init__(self, config, model, data_loader, scheduler=None, rank=0, world_size=1, callbacks=None):
+        self.config = config
+        self.model = model
+        self.data_loader = data_loader
+        self.rank = rank
+        self.world_size = world_size
+        self.device_type = 'cuda' if str(config.device).startswith('cuda') else 'cpu'
+        self.autocast_dtype = torch.bfloat16 if config.mixed_precision == 'bf16' else None
+        self.micro_batch_size = min(config.micro_batch_size or config.batch_size, config.batch_size)
+        self.ddp = DistributedDataParallel(model) if world_size > 1 else None
+        wrapped = self.ddp if self.ddp is not None else model
+        self.forward = torch.compile(wrapped) if config.compile_model else wrapped
+        self.optimizer = self._make_optimizer()
+        self.scheduler = scheduler(self.optimizer) if scheduler is not None else None
+        self.metrics = NACJAC_MetricsLogger(config.metrics_path if rank == 0 else None, callbacks)
+        self.data_wait = 0.0
+
+    def _make_optimizer(self):
+        params = self.model.parameters()
+        if self.config.fused_adamw:
+            try:
+                return torch.optim.AdamW(params, lr=self.config.learning_rate, fused=True)
+            except (RuntimeError, TypeError):
+                params = self.model.parameters()
+        return torch.optim.AdamW(params, lr=self.config.learning_rate)
+
+    def step(self):
+        """
+        One optimizer step; returns the mean loss over the full batch.
+        """
+        self.model.train()
+        start = time.perf_counter()
+        xb, yb = self.data_loader.get_batch('train')
+        self.data_wait = time.perf_counter() - start
+        self.optimizer.zero_grad(set_to_none=True)
+        total = torch.zeros((), device=xb.device)
+        micro_batches = list(zip(xb.split(self.micro_batch_size), yb.split(self.micro_batch_size)))
+        for i, (x, y) in enumerate(micro_batches):
+            # DDP all-reduces gradients on the last micro-batch only
+            last = i == len(micro_batches) - 1
+            sync = contextlib.nullcontext() if self.ddp is None or last else self.ddp.no_sync()
+            with sync:
+                with torch.autocast(self.device_type, dtype=self.autocast_dtype, enabled=self.autocast_dtype is not None):
+                    logits, loss = self.forward(x, y)
+                # Weight by rows so a short last micro-batch counts proportionally
+                loss = loss * (len(x) / len(xb))
+                loss.backward()
+            total += loss.detach()
+        self.optimizer.step()
+        if self.scheduler is not None:
+            self.scheduler.step()
+        return total.item()
+
+    @torch.no_grad()
+    def evaluate(self, split='val'):
+        """
+        Mean loss over the data loader's fixed evaluation windows of `split`.
+        """
+        self.model.eval()
+        total, n = 0.0, 0
+        for x, y in self.data_loader.eval_batches(split):
+            with torch.autocast(self.device_type, dtype=self.autocast_dtype, enabled=self.autocast_dtype is not None):
+                logits, loss = self.model(x, y)
+            total += loss.item() * len(x)
+            n += len(x)
+        self.model.train()
+        return total / n
+
+    def run(self, max_iters, label="Step", checkpoints=None):
+        """
+        Trains up to max_iters steps. With a NACJAC_CheckpointManager, the
+        run resumes from its latest checkpoint and saves every
+        config.checkpoint_interval steps.
+        """
+        tokens_per_step = self.config.batch_size * self.config.block_size * self.world_size
+        start_step = 0
+        if checkpoints is not None:
+            start_step = checkpoints.resume(self.model, self.optimizer, self.scheduler, self.data_loader, self.rank)
+        loss = None
+        for step in range(start_step, max_iters):
+            start = time.perf_counter()
+            loss = self.step()
+            self.metrics.record_step(time.perf_counter() - start, self.data_wait, loss)
+
+            if step % self.config.eval_interval == 0 or step == max_iters - 1:
+                train_loss = self.metrics.mean_loss()
+                if self.world_size > 1:
+                    train_loss = self._mean_across_ranks(train_loss)
+                if self.rank == 0:
+                    record = self.metrics.log(step, train_loss, self.evaluate('val'), tokens_per_step, self.config.device)
+                    print(f"[{label} {step}] Loss: {train_loss:.4f} | Val: {record['val_loss']:.4f} | "
+                          f"{record['step_ms_p50']:.0f} ms/step (p90 {record['step_ms_p90']:.0f}) | "
+                          f"{record['tokens_per_sec']:.0f} tok/s | data wait {record['data_wait_ms']:.1f} ms")
+                else:
+                    self.metrics.reset()
+            done = step + 1
+            if checkpoints is not None and done < max_iters and done % self.config.checkpoint_interval == 0:
+                rank_states = self._gather_rank_states()
+                if self.rank == 0:
+                    checkpoints.save(done, self.model, self.optimizer, self.scheduler, rank_states)
+        if checkpoints is not None and self.rank == 0:
+            checkpoints.finish(max_iters, self.model, self.optimizer, self.scheduler)
+        return loss
+
+    def _gather_rank_states(self):
+        # Every rank takes part; only rank 0 receives the list
+        state = NACJAC_rank_state(self.data_loader)
+        if self.world_size == 1:
+            return [state]
+        states = [None] * self.world_size if self.rank == 0 else None
+        dist.gather_object(state, states, dst=0)
+        return states
+
+    def _mean_across_ranks(self, value):
+        value = torch.tensor(value, dtype=torch.float64)
+        dist.all_reduce(value)
+        return value.item() / self.world_size
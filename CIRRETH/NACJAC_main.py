@@ -8,3 +8,8 @@ if __name__ == "__main__":
     print("\n=== NACJAC OUTPUT ===")
     output = generator.generate_text("This is fine, probably!")
     print(output)
+
+    print("\n=== NACJAC STREAM ===")
+    for piece in generator.stream_text("This is fine, probably!", stop="\n\n"):
+        print(piece, end="", flush=True)
+    print()
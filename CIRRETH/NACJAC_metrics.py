@@ -0,0 +1,61 @@
+import json
+import resource
+import time
+import numpy as np
+import torch
+
+class NACJAC_MetricsLogger:
+    """
+    Collects per-step timings between evaluations and turns them into one
+    metrics record per eval interval. Each record is appended as a JSON
+    line to `path` (if set) and passed to every callback.
+    """
+    def __init__(self, path=None, callbacks=None):
+        self.path = path
+        self.callbacks = list(callbacks or [])
+        self.reset()
+
+    def reset(self):
+        self.step_times = []
+        self.data_waits = []
+        self.losses = []
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def record_step(self, step_time, data_wait, loss):
+        self.step_times.append(step_time)
+        self.data_waits.append(data_wait)
+        self.losses.append(loss)
+
+    @staticmethod
+    def peak_memory_mb(device):
+        if str(device).startswith('cuda'):
+            return torch.cuda.max_memory_allocated(device) / 2**20
+        # ru_maxrss is in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def mean_loss(self):
+        return float(np.mean(self.losses))
+
+    def log(self, step, train_loss, val_loss, tokens_per_step, device):
+        times = np.array(self.step_times)
+        record = {
+            'step': step,
+            'time': time.time(),
+            'train_loss': train_loss,
+            'val_loss': val_loss,
+            'tokens_per_sec': tokens_per_step * len(times) / times.sum(),
+            'step_ms_p50': float(np.percentile(times, 50) * 1000),
+            'step_ms_p90': float(np.percentile(times, 90) * 1000),
+            'step_ms_p99': float(np.percentile(times, 99) * 1000),
+            'data_wait_ms': float(np.mean(self.data_waits) * 1000),
+            'peak_memory_mb': self.peak_memory_mb(device),
+        }
+        if self.path:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+        for callback in self.callbacks:
+            callback(record)
+        self.reset()
+        return record
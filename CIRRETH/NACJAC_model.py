@@ -1,6 +1,56 @@
+import os
+import warnings
+from contextlib import contextmanager
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+from torch.utils.checkpoint import checkpoint
+
+def NACJAC_cached_attention(q, k, v, past_kv=None, attn_mask=None):
+    """
+    Causal attention of q (B, H, T, hs) over k/v extended with cached keys
+    and values from earlier steps. Returns (out, (k, v)) with k/v covering
+    every position seen so far. An explicit boolean `attn_mask` (True means
+    attend), e.g. for padded batches, replaces the causal mask.
+    """
+    if past_kv is not None:
+        k = torch.cat([past_kv[0], k], dim=2)
+        v = torch.cat([past_kv[1], v], dim=2)
+    T, L = q.shape[2], k.shape[2]
+    if attn_mask is not None:
+        out = F.scaled_dot_product_attention(q, k, v, attn_mask=attn_mask)
+    elif T == 1:
+        out = F.scaled_dot_product_attention(q, k, v)
+    elif T == L:
+        out = F.scaled_dot_product_attention(q, k, v, is_causal=True)
+    else:
+        mask = torch.ones(T, L, dtype=torch.bool, device=q.device).tril(L - T)
+        out = F.scaled_dot_product_attention(q, k, v, attn_mask=mask)
+    return out, (k, v)
+
+def NACJAC_kv_window(config):
+    """
+    Tokens a full KV cache restarts from. Clamped to [1, block_size - 1]:
+    a window of 0 would slice the whole history, and one of block_size or
+    more overruns the position table and leaves no room to decode.
+    """
+    return max(1, min(config.kv_window_keep, config.block_size - 1))
+
+def NACJAC_sample(logits, temperature=1.0, top_p=1.0):
+    """
+    Draws one token per row of (B, V) logits. temperature <= 0 is greedy;
+    top_p in (0, 1) samples from the smallest set of tokens whose
+    probability mass reaches top_p, and anything else disables it.
+    """
+    if temperature <= 0:
+        return logits.argmax(dim=-1, keepdim=True)
+    probs = F.softmax(logits / temperature, dim=-1)
+    if 0 < top_p < 1:
+        sorted_probs, order = probs.sort(dim=-1, descending=True)
+        # Drop a token once the mass ranked above it already reaches top_p
+        drop = sorted_probs.cumsum(dim=-1) - sorted_probs >= top_p
+        return order.gather(-1, torch.multinomial(sorted_probs.masked_fill(drop, 0), num_samples=1))
+    return torch.multinomial(probs, num_samples=1)
 
 class NACJAC_selfAttentionHead(nn.Module):
     def __init__(self, head_size, n_embed, block_size, device):
@@ -8,7 +58,8 @@ class NACJAC_selfAttentionHead(nn.Module):
         self.key = nn.Linear(n_embed, head_size, bias=False)
         self.query = nn.Linear(n_embed, head_size, bias=False)
         self.value = nn.Linear(n_embed, head_size, bias=False)
-        self.tril = torch.tril(torch.ones(block_size, block_size)).to(device=device)
+        self.register_buffer('tril', torch.tril(torch.ones(block_size, block_size, device=device)),
+                             persistent=False)
         self.dropout = nn.Dropout(0.1)
     
     def forward(self, x):
@@ -35,7 +86,71 @@ class NACJAC_MultiHeadAttention(nn.Module):
         out = torch.cat([h(x) for h in self.heads], dim = -1)
         out = self.dropout(self.proj(out))
         return out
+
+    def forward_cached(self, x, past_kv=None, attn_mask=None):
+        B, T, C = x.shape
+        q = torch.stack([h.query(x) for h in self.heads], dim=1)
+        k = torch.stack([h.key(x) for h in self.heads], dim=1)
+        v = torch.stack([h.value(x) for h in self.heads], dim=1)
+        # Heads scale scores by C, SDPA by head_size; fold the difference into q
+        q = q * (q.shape[-1] / C) ** 0.5
+        out, present = NACJAC_cached_attention(q, k, v, past_kv, attn_mask)
+        out = out.transpose(1, 2).reshape(B, T, C)
+        return self.dropout(self.proj(out)), present
     
+def NACJAC_fuse_head_weights(state_dict, prefix, num_heads):
+    """
+    Rewrites per-head key/query/value weights saved by
+    NACJAC_MultiHeadAttention into the single qkv weight of
+    NACJAC_FusedMultiHeadAttention, in place. No-op for fused checkpoints.
+    """
+    if f"{prefix}heads.0.query.weight" not in state_dict:
+        return
+    fused = []
+    for name in ('query', 'key', 'value'):
+        fused += [state_dict.pop(f"{prefix}heads.{i}.{name}.weight") for i in range(num_heads)]
+    state_dict[f"{prefix}qkv.weight"] = torch.cat(fused, dim=0)
+
+class NACJAC_FusedMultiHeadAttention(nn.Module):
+    def __init__(self, num_heads, head_size, n_embed, block_size, device):
+        super().__init__()
+        self.num_heads = num_heads
+        self.head_size = head_size
+        self.qkv = nn.Linear(n_embed, 3 * num_heads * head_size, bias=False)
+        self.proj = nn.Linear(n_embed, n_embed)
+        self.dropout = nn.Dropout(0.1)
+        self.attn_dropout = 0.1
+        # The per-head path scales scores by n_embed, not head_size; fold the
+        # difference into q so converted checkpoints behave identically
+        self.q_scale = (head_size / n_embed) ** 0.5
+        self._register_load_state_dict_pre_hook(self._load_per_head_weights)
+
+    def _load_per_head_weights(self, state_dict, prefix, *args):
+        NACJAC_fuse_head_weights(state_dict, prefix, self.num_heads)
+
+    def _split_heads(self, x):
+        B, T, C = x.shape
+        q, k, v = self.qkv(x).split(self.num_heads * self.head_size, dim=-1)
+        q = q.view(B, T, self.num_heads, self.head_size).transpose(1, 2) * self.q_scale
+        k = k.view(B, T, self.num_heads, self.head_size).transpose(1, 2)
+        v = v.view(B, T, self.num_heads, self.head_size).transpose(1, 2)
+        return q, k, v
+
+    def forward_cached(self, x, past_kv=None, attn_mask=None):
+        B, T, C = x.shape
+        out, present = NACJAC_cached_attention(*self._split_heads(x), past_kv, attn_mask)
+        out = out.transpose(1, 2).reshape(B, T, self.num_heads * self.head_size)
+        return self.dropout(self.proj(out)), present
+
+    def forward(self, x):
+        B, T, C = x.shape
+        q, k, v = self._split_heads(x)
+        out = F.scaled_dot_product_attention(
+            q, k, v, is_causal=True,
+            dropout_p=self.attn_dropout if self.training else 0.0)
+        out = out.transpose(1, 2).reshape(B, T, self.num_heads * self.head_size)
+        return self.dropout(self.proj(out))
+
 class NACJAC_FeedForward(nn.Module):
     def __init__(self, n_embed):
         super().__init__()
@@ -50,10 +165,11 @@ class NACJAC_FeedForward(nn.Module):
         return self.net(x)
 
 class NACJAC_Block(nn.Module):
-    def __init__(self, n_embed, n_heads, block_size, device):
+    def __init__(self, n_embed, n_heads, block_size, device, fused=False):
         super().__init__()
         head_size = n_embed // n_heads
-        self.sa = NACJAC_MultiHeadAttention(n_heads, head_size, n_embed, block_size, device)
+        attention = NACJAC_FusedMultiHeadAttention if fused else NACJAC_MultiHeadAttention
+        self.sa = attention(n_heads, head_size, n_embed, block_size, device)
         self.ffwd = NACJAC_FeedForward(n_embed)
         self.ln1 = nn.LayerNorm(n_embed)
         self.ln2 = nn.LayerNorm(n_embed)
@@ -62,15 +178,32 @@ class NACJAC_Block(nn.Module):
         x = x + self.sa(self.ln1(x))
         x = x + self.ffwd(self.ln2(x))
         return x
+
+    def forward_cached(self, x, past_kv=None, attn_mask=None):
+        attn, present = self.sa.forward_cached(self.ln1(x), past_kv, attn_mask)
+        x = x + attn
+        x = x + self.ffwd(self.ln2(x))
+        return x, present
     
+def _embedding(num_embeddings, embedding_dim, init_weights):
+    # nn.Embedding skips its normal_ init when it is handed a weight
+    if init_weights:
+        return nn.Embedding(num_embeddings, embedding_dim)
+    return nn.Embedding(num_embeddings, embedding_dim, _weight=torch.empty(num_embeddings, embedding_dim))
+
 class NACJAC_LangModel(nn.Module):
-    def __init__(self, config, vocab_size):
+    """
+    `init_weights=False` leaves the embeddings uninitialised, for models
+    whose weights are about to be replaced from a checkpoint.
+    """
+    def __init__(self, config, vocab_size, init_weights=True):
         super().__init__()
         self.config = config
-        self.token_embedding_table = nn.Embedding(vocab_size, config.n_embed)
-        self.position_embedding_table = nn.Embedding(config.block_size, config.n_embed)
+        self.token_embedding_table = _embedding(vocab_size, config.n_embed, init_weights)
+        self.position_embedding_table = _embedding(config.block_size, config.n_embed, init_weights)
         self.blocks = nn.Sequential(*[
-            NACJAC_Block(config.n_embed, config.n_heads, config.block_size, config.device)
+            NACJAC_Block(config.n_embed, config.n_heads, config.block_size, config.device,
+                         config.fused_attention)
             for _ in range(config.n_layers)
         ])
         self.ln_f = nn.LayerNorm(config.n_embed)
@@ -81,7 +214,13 @@ class NACJAC_LangModel(nn.Module):
         tok_emb = self.token_embedding_table(idx)
         pos_emb = self.position_embedding_table(torch.arange(T, device=self.config.device))
         x = tok_emb + pos_emb
-        x = self.blocks(x)
+        # Checkpointed blocks drop their activations and recompute them in backward
+        every = self.config.activation_checkpointing if self.training and torch.is_grad_enabled() else 0
+        for i, block in enumerate(self.blocks):
+            if every and i % every == 0:
+                x = checkpoint(block, x, use_reentrant=False)
+            else:
+                x = block(x)
         x = self.ln_f(x)
         logits = self.lm_head(x)
 
@@ -93,12 +232,146 @@ class NACJAC_LangModel(nn.Module):
 
         return logits, loss
 
-    def generate(self, idx, max_new_tokens):
-        for _ in range(max_new_tokens):
-            idx_cond = idx[:, -self.config.block_size:]
-            logits, _ = self(idx_cond)
-            logits = logits[:, -1, :]
-            probs = F.softmax(logits, dim=-1)
-            next_idx = torch.multinomial(probs, num_samples=1)
+    def forward_cached(self, idx, past_kvs=None, positions=None, attn_mask=None):
+        """
+        Inference-only forward over new tokens `idx`, continuing from the
+        per-block key/value cache `past_kvs`. Padded batches pass per-row
+        `positions` (B, T) and a boolean `attn_mask` (B, 1, T, L).
+        Returns (logits, presents).
+        """
+        B, T = idx.shape
+        if positions is None:
+            start = 0 if past_kvs is None else past_kvs[0][0].shape[2]
+            positions = torch.arange(start, start + T, device=idx.device)
+        tok_emb = self.token_embedding_table(idx)
+        pos_emb = self.position_embedding_table(positions)
+        x = tok_emb + pos_emb
+        presents = []
+        for i, block in enumerate(self.blocks):
+            past_kv = None if past_kvs is None else past_kvs[i]
+            x, present = block.forward_cached(x, past_kv, attn_mask)
+            presents.append(present)
+        logits = self.lm_head(self.ln_f(x))
+        return logits, presents
+
+    def generate(self, idx, max_new_tokens, use_cache=None, temperature=1.0, top_p=1.0):
+        for next_idx in self.generate_stream(idx, max_new_tokens, use_cache, temperature, top_p):
             idx = torch.cat((idx, next_idx), dim=1)
         return idx
+
+    @torch.no_grad()
+    def generate_stream(self, idx, max_new_tokens, use_cache=None, temperature=1.0, top_p=1.0):
+        """
+        Yields each sampled (B, 1) token tensor as soon as it is drawn.
+        Closing the generator stops sampling. See NACJAC_sample for
+        temperature and top_p.
+        """
+        use_cache = self.config.kv_cache if use_cache is None else use_cache
+        block_size = self.config.block_size
+        past_kvs = None
+        for _ in range(max_new_tokens):
+            if not use_cache:
+                idx_cond = idx[:, -block_size:]
+                logits, _ = self(idx_cond)
+            elif past_kvs is None or past_kvs[0][0].shape[2] >= block_size:
+                # Positions are absolute, so a full cache cannot slide by one;
+                # re-prefill from the most recent kv_window_keep tokens instead
+                window = block_size if past_kvs is None else NACJAC_kv_window(self.config)
+                logits, past_kvs = self.forward_cached(idx[:, -window:])
+            else:
+                logits, past_kvs = self.forward_cached(idx[:, -1:], past_kvs)
+            next_idx = NACJAC_sample(logits[:, -1, :], temperature, top_p)
+            idx = torch.cat((idx, next_idx), dim=1)
+            yield next_idx
+
+def _check_vocab_size(state_dict, vocab_size, path):
+    # A checkpoint trained with another tokeniser would otherwise surface
+    # as a bare size-mismatch error from load_state_dict
+    saved = state_dict['token_embedding_table.weight'].shape[0]
+    if saved != vocab_size:
+        raise ValueError(f"{path} was trained with a vocabulary of {saved} tokens, "
+                         f"but the current tokeniser has {vocab_size}; check tokeniser_type "
+                         f"and bpe_vocab_size")
+
+def NACJAC_load_model(config, vocab_size, path):
+    """
+    Builds NACJAC_LangModel on the meta device, so no random weights are
+    initialised, then assigns the tensors of a memory-mapped checkpoint
+    as its parameters. Weights are paged in from the file on first use
+    and shared through the page cache by every process that maps it.
+    """
+    # Every parameter is replaced by the mapped checkpoint tensor below, so
+    # skip the embedding init; its values would be discarded anyway
+    with torch.device('meta'):
+        model = NACJAC_LangModel(config, vocab_size, init_weights=False)
+    state_dict = torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+    _check_vocab_size(state_dict, vocab_size, path)
+    model.load_state_dict(state_dict, assign=True)
+    # Non-persistent buffers are not in the checkpoint; rebuild any left on meta
+    for module in model.modules():
+        if isinstance(module, NACJAC_selfAttentionHead) and module.tril.is_meta:
+            size = config.block_size
+            module.tril = torch.tril(torch.ones(size, size))
+    return model.to(config.device).eval()
+
+@contextmanager
+def _quantization_warnings_ignored():
+    # torch.ao.quantization is deprecated in favour of torchao, and its
+    # packed int8 params still go through deprecated tensor APIs
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', category=DeprecationWarning, message=r'torch\.ao\.quantization')
+        warnings.filterwarnings('ignore', category=UserWarning,
+                                message=r'(TypedStorage|torch\.quantize_per_tensor)')
+        yield
+
+def NACJAC_quantize_dynamic(model):
+    """
+    Dynamic INT8 quantization of every nn.Linear (attention projections,
+    feed-forward and lm_head) for CPU inference: weights are stored as
+    int8 and activations are quantized on the fly per batch.
+    """
+    with _quantization_warnings_ignored():
+        from torch.ao.quantization import quantize_dynamic
+        return quantize_dynamic(model.cpu().eval(), {nn.Linear}, dtype=torch.qint8)
+
+def _quantized_skeleton(config, vocab_size):
+    # The modules NACJAC_quantize_dynamic produces, built without creating,
+    # initialising and quantizing fp32 weights that a checkpoint replaces
+    with _quantization_warnings_ignored():
+        from torch.ao.nn.quantized.dynamic import Linear as DynamicLinear
+    with torch.device('meta'):
+        model = NACJAC_LangModel(config, vocab_size, init_weights=False)
+    for module in list(model.modules()):
+        for name, child in module.named_children():
+            if type(child) is nn.Linear:
+                setattr(module, name, DynamicLinear(child.in_features, child.out_features,
+                                                    bias_=child.bias is not None, dtype=torch.qint8))
+    model.to_empty(device='cpu')
+    for module in model.modules():
+        if isinstance(module, NACJAC_selfAttentionHead):
+            size = config.block_size
+            module.tril = torch.tril(torch.ones(size, size))
+    return model.eval()
+
+def NACJAC_load_quantized_model(config, vocab_size):
+    """
+    INT8 model for config.model_path. The quantized weights are cached as
+    their own checkpoint at config.quantized_model_path and rebuilt when
+    the fp32 checkpoint is newer. The cache alone is enough to load.
+    """
+    if config.device != 'cpu':
+        raise ValueError("INT8 dynamic quantization runs on CPU only")
+    int8_path = config.quantized_model_path
+    if os.path.exists(int8_path) and (not os.path.exists(config.model_path)
+                                      or os.path.getmtime(int8_path) >= os.path.getmtime(config.model_path)):
+        model = _quantized_skeleton(config, vocab_size)
+        with _quantization_warnings_ignored():
+            state_dict = torch.load(int8_path, map_location='cpu', weights_only=True)
+            _check_vocab_size(state_dict, vocab_size, int8_path)
+            model.load_state_dict(state_dict)
+        return model
+    model = NACJAC_quantize_dynamic(NACJAC_load_model(config, vocab_size, config.model_path))
+    tmp_path = f"{int8_path}.tmp"
+    torch.save(model.state_dict(), tmp_path)
+    os.replace(tmp_path, int8_path)
+    return model
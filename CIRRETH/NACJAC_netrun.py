@@ -1,21 +1,81 @@
+import asyncio
+import codecs
+import threading
 import torch
-from NACJAC_model import NACJAC_LangModel
-from NACJAC_tokeniser import NACJAC_Tokeniser
+from NACJAC_model import NACJAC_LangModel, NACJAC_load_model, NACJAC_load_quantized_model
+from NACJAC_tokeniser import NACJAC_get_tokeniser
 from NACJAC_configurator import NACJAC_Config
 
 class NACJAC_Generator:
     def __init__(self, config):
         self.config = config
-        self.tokenizer = NACJAC_Tokeniser(config)
+        self.tokenizer = NACJAC_get_tokeniser(config)
         self.vocab_size = self.tokenizer.vocab_size()
-        self.model = NACJAC_LangModel(config, self.vocab_size).to(config.device)
-        self.model.load_state_dict(torch.load(config.model_path, map_location=config.device))
-        self.model.eval()
+        if config.quantize:
+            self.model = NACJAC_load_quantized_model(config, self.vocab_size)
+        elif config.fast_load:
+            self.model = NACJAC_load_model(config, self.vocab_size, config.model_path)
+        else:
+            self.model = NACJAC_LangModel(config, self.vocab_size).to(config.device)
+            self.model.load_state_dict(torch.load(config.model_path, map_location=config.device))
+            self.model.eval()
 
-    def generate_text(self, prompt: str = "", max_tokens=None):
+    def generate_text(self, prompt: str = "", max_tokens=None, temperature=1.0, top_p=1.0):
         if max_tokens is None:
             max_tokens = self.config.max_tokens
         idx = torch.tensor([self.tokenizer.encode(prompt)], dtype=torch.long).to(self.config.device)
-        out = self.model.generate(idx, max_tokens)[0].tolist()
+        out = self.model.generate(idx, max_tokens, temperature=temperature, top_p=top_p)[0].tolist()
         return self.tokenizer.decode(out)
 
+    def stream_text(self, prompt: str = "", max_tokens=None, stop=None, cancel: threading.Event = None,
+                    temperature=1.0, top_p=1.0):
+        """
+        Yields the decoded continuation of `prompt` piece by piece as tokens
+        are sampled. Ends after max_tokens, just before the first of the
+        `stop` sequences, once `cancel` is set, or when the caller closes it.
+        """
+        if max_tokens is None:
+            max_tokens = self.config.max_tokens
+        stops = [stop] if isinstance(stop, str) else list(stop or [])
+        # Text that could still grow into a stop sequence is held back
+        holdback = max((len(s) for s in stops), default=1) - 1
+        idx = torch.tensor([self.tokenizer.encode(prompt)], dtype=torch.long).to(self.config.device)
+        pending = ""
+        # Byte-level tokens can split a character; decode their bytes incrementally
+        utf8 = codecs.getincrementaldecoder('utf-8')('replace') if hasattr(self.tokenizer, 'token_bytes') else None
+        for next_idx in self.model.generate_stream(idx, max_tokens, temperature=temperature, top_p=top_p):
+            if cancel is not None and cancel.is_set():
+                return
+            if utf8 is not None:
+                pending += utf8.decode(self.tokenizer.token_bytes(next_idx[0, 0].item()))
+            else:
+                pending += self.tokenizer.decode(next_idx[0].tolist())
+            hits = [pos for pos in (pending.find(s) for s in stops) if pos >= 0]
+            if hits:
+                if min(hits):
+                    yield pending[:min(hits)]
+                return
+            cut = len(pending) - holdback
+            if cut > 0:
+                yield pending[:cut]
+                pending = pending[cut:]
+        if pending:
+            yield pending
+
+    async def astream_text(self, prompt: str = "", max_tokens=None, stop=None, temperature=1.0, top_p=1.0):
+        """
+        Async variant of stream_text. Sampling runs in a worker thread so the
+        event loop stays responsive; cancelling the consuming task stops
+        generation after the token in flight.
+        """
+        cancel = threading.Event()
+        stream = self.stream_text(prompt, max_tokens, stop, cancel, temperature, top_p)
+        done = object()
+        try:
+            while True:
+                piece = await asyncio.to_thread(next, stream, done)
+                if piece is done:
+                    break
+                yield piece
+        finally:
+            cancel.set()
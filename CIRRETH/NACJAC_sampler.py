@@ -0,0 +1,93 @@
+import queue
+import threading
+import numpy as np
+import torch
+
+class NACJAC_BatchSampler:
+    """
+    Random (x, y) training windows drawn from a 1-D token array. All
+    windows of block_size + 1 tokens are exposed as one strided view, so a
+    batch is a single fancy-index gather. A background thread keeps up to
+    `prefetch` batches ready in a bounded queue, pinned when requested.
+    Each queued batch carries the generator state just after it was drawn,
+    so state() is the position of the last batch handed out, not of the
+    prefetching thread.
+    """
+    def __init__(self, data, batch_size, block_size, prefetch=2, pin_memory=False, seed=None):
+        if len(data) <= block_size:
+            raise ValueError(f"Need more than block_size={block_size} tokens, got {len(data)}")
+        self.windows = np.lib.stride_tricks.sliding_window_view(data, block_size + 1)
+        self.batch_size = batch_size
+        self.pin_memory = pin_memory
+        self.rng = np.random.default_rng(seed)
+        self._state = self.rng.bit_generator.state
+        self.ready = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        ix = self.rng.integers(len(self.windows), size=self.batch_size)
+        batch = torch.from_numpy(self.windows[ix].astype(np.int64))
+        x, y = batch[:, :-1].contiguous(), batch[:, 1:].contiguous()
+        if self.pin_memory:
+            x, y = x.pin_memory(), y.pin_memory()
+        return x, y
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._fill, name="NACJAC_BatchSampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def _fill(self):
+        while not self._stop.is_set():
+            try:
+                item = self.sample()
+            except Exception as e:
+                item = e
+            state = self.rng.bit_generator.state
+            while not self._stop.is_set():
+                try:
+                    self.ready.put((item, state), timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if isinstance(item, Exception):
+                return
+
+    def next(self):
+        """
+        Next prefetched batch; samples inline if the thread is not running.
+        """
+        if self._thread is None:
+            item = self.sample()
+            self._state = self.rng.bit_generator.state
+            return item
+        item, state = self.ready.get()
+        if isinstance(item, Exception):
+            raise item
+        self._state = state
+        return item
+
+    def state(self):
+        return self._state
+
+    def set_state(self, state):
+        """
+        Continues the stream from a state() saved earlier; batches already
+        prefetched from the old position are dropped.
+        """
+        running = self._thread is not None
+        self.close()
+        self.ready = queue.Queue(maxsize=self.ready.maxsize)
+        self._stop.clear()
+        self.rng.bit_generator.state = state
+        self._state = state
+        if running:
+            self.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -1,23 +1,30 @@
+import hashlib
 import os
+import numpy as np
 import torch
 
 class NACJAC_Tokeniser:
     def __init__(self,config):
         self.vocab_path = config.vocab_path
         self.datapath = config.current_datapath
+        self.unknown_policy = config.unknown_policy
+        self.unknown_char = config.unknown_char
         self.stoi = {}
         self.itos = {}
 
         if os.path.exists(self.vocab_path):
             self._load_vocab()
         else:
-            self._build_vocab(config.datapath)
+            self._build_vocab(self.datapath)
             self._save_vocab()
+        self._build_tables()
         
-    def _build_vocab(self, filepath):
+    def _build_vocab(self, filepath, chunk_chars = 1 << 20):
+        chars = set()
         with open(filepath,'r',encoding = 'utf-8') as f:
-            text = f.read()
-        chars = sorted(list(set(text)))
+            while chunk := f.read(chunk_chars):
+                chars.update(chunk)
+        chars = sorted(chars)
         self.stoi = {ch:i for i,ch in enumerate(chars)}
         self.itos = {i:ch for i,ch in enumerate(chars)}
     
@@ -25,12 +32,57 @@ class NACJAC_Tokeniser:
         torch.save((self.stoi, self.itos), self.vocab_path)
     def _load_vocab(self):
         self.stoi, self.itos = torch.load(self.vocab_path)
+
+    def _build_tables(self):
+        # Code point -> id lookup table (-1 for unknown) and id -> code point
+        self._lut = np.full(max(map(ord, self.stoi)) + 1, -1, dtype=np.int64)
+        for ch, i in self.stoi.items():
+            self._lut[ord(ch)] = i
+        self._codepoints = np.array([ord(self.itos[i]) for i in range(len(self.itos))], dtype='<u4')
+        self._unknown_id = self.stoi.get(self.unknown_char, 0)
+
+    def encode_array(self, s):
+        """
+        Encodes `s` to an int64 array with one table lookup over its UTF-32
+        code points. Characters outside the vocab follow unknown_policy:
+        'error' raises ValueError, 'skip' drops them, 'replace' maps them
+        to unknown_char.
+        """
+        cps = np.frombuffer(s.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+        ids = np.full(len(cps), -1, dtype=np.int64)
+        known = cps < len(self._lut)
+        ids[known] = self._lut[cps[known]]
+        unknown = ids < 0
+        if unknown.any():
+            if self.unknown_policy == 'error':
+                pos = int(np.argmax(unknown))
+                raise ValueError(f"Character {s[pos]!r} at position {pos} is not in the vocab")
+            if self.unknown_policy == 'skip':
+                return ids[~unknown]
+            ids[unknown] = self._unknown_id
+        return ids
     
     def encode(self, s):
-        return [self.stoi[c] for c in s]
+        return self.encode_array(s).tolist()
     
     def decode(self, s):
-        return ''.join([self.itos[i] for i in s])
+        return self._codepoints[np.asarray(s, dtype=np.int64)].tobytes().decode('utf-32-le')
     
     def vocab_size(self):
         return len(self.stoi)
+
+    def fingerprint(self):
+        # 16-byte digest of everything that decides the ids encode() returns
+        digest = hashlib.sha256(b"char")
+        digest.update(self._codepoints.tobytes())
+        digest.update(f"{self.unknown_policy}:{self.unknown_char}".encode('utf-8'))
+        return digest.digest()[:16]
+
+def NACJAC_get_tokeniser(config):
+    """
+    Tokeniser selected by config.tokeniser_type: 'char' or 'bpe'.
+    """
+    if config.tokeniser_type == 'bpe':
+        from NACJAC_bpe import NACJAC_BPETokeniser
+        return NACJAC_BPETokeniser(config)
+    return NACJAC_Tokeniser(config)
@@ -1,27 +1,23 @@
 from NACJAC_model import NACJAC_LangModel
-from NACJAC_tokeniser import NACJAC_Tokeniser
+from NACJAC_tokeniser import NACJAC_get_tokeniser
 from NACJAC_DataLoader import NACJAC_Dataloader
+from NACJAC_engine import NACJAC_TrainEngine
+from NACJAC_checkpoint import NACJAC_CheckpointManager
 import torch
 
 class NACJAC_Trainer:
-    def __init__(self, config):
+    def __init__(self, config, rank=0, world_size=1, callbacks=None):
         self.config = config
-        self.tokenizer = NACJAC_Tokeniser(config)
-        self.data_loader = NACJAC_Dataloader(config, self.tokenizer)
+        self.rank = rank
+        self.tokenizer = NACJAC_get_tokeniser(config)
+        self.data_loader = NACJAC_Dataloader(config, self.tokenizer, rank)
         self.model = NACJAC_LangModel(config, self.tokenizer.vocab_size()).to(config.device)
-        self.optimizer = torch.optim.AdamW(self.model.parameters(), lr=config.learning_rate)
+        self.engine = NACJAC_TrainEngine(config, self.model, self.data_loader, rank=rank, world_size=world_size, callbacks=callbacks)
+        self.optimizer = self.engine.optimizer
+        self.checkpoints = NACJAC_CheckpointManager(config, 'train')
 
     def train(self):
-        for step in range(self.config.max_iters):
-            xb, yb = self.data_loader.get_batch('train')
-            logits, loss = self.model(xb, yb)
-
-            self.optimizer.zero_grad()
-            loss.backward()
-            self.optimizer.step()
-
-            if step % self.config.eval_interval == 0:
-                print(f"[Step {step}] Loss: {loss.item():.4f}")
-
-        torch.save(self.model.state_dict(), self.config.model_path)
-        print(f"Model saved to {self.config.model_path}")
\ No newline at end of file
+        self.engine.run(self.config.max_iters, "Step", self.checkpoints)
+        self.data_loader.close()
+        if self.rank == 0:
+            print(f"Model saved to {self.config.model_path}")
\ No newline at end of file
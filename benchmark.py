@@ -0,0 +1,274 @@
+# benchmark.py
+"""
+=====================================================================
+|    Module Name   : benchmark.py                                   |
+|    Description   : Micro-benchmarks for TAMA's learning pipeline. |
+|                                                                   |
+|    Author        : Gengai                                         |
+|    Created On    : 2025-06-14                                     |
+|    Version       : v1.0                                           |
+|                                                                   |
+|    Purpose       :                                                |
+|     - Time the pipeline stages that sit on the learn/execute path.|
+|     - Compare alternative strategies on the same intent specs.    |
+|                                                                   |
+|    Usage         :                                                |
+|     python benchmark.py codegen                                   |
+|     python benchmark.py map                                       |
+|     python benchmark.py idioms                                    |
+|     python benchmark.py telemetry                                 |
+|     python benchmark.py profiler                                  |
+|     python benchmark.py all                                       |
+=====================================================================
+"""
+import argparse
+import timeit
+
+from generator import CodeGenerator
+from validator import CodeValidator
+
+SPECS = [
+    {'name': 'add', 'args': ['num1', 'num2'], 'body': 'return num1 + num2'},
+    {'name': 'sort_list', 'args': ['input_list'], 'body': 'return sorted(input_list)'},
+    {'name': 'to_uppercase', 'args': ['input_str'], 'body': 'return input_str.upper()'},
+]
+
+# Multi-line nested body: only the AST path can build this one
+NESTED_SPEC = {'name': 'clamp', 'args': ['x', 'lo', 'hi'],
+               'body': 'if x < lo:\n    return lo\nif x > hi:\n    return hi\nreturn x'}
+
+
+class _Target:
+    pass
+
+
+def _report(label: str, seconds: float, n: int, unit: str = 'us'):
+    scale = {'us': 1e6, 'ns': 1e9}[unit]
+    print(f"  {label:<28} {seconds / n * scale:9.1f} {unit}/op")
+
+
+def bench_codegen(n: int = 2000):
+    """
+    Spec-to-callable time: string generation (re-parsed by the validator
+    and by the loader) against AST generation compiled straight to a code
+    object. SQLite storage is left out of both paths.
+    """
+    generator = CodeGenerator()
+    validator = CodeValidator()
+    target = _Target()
+
+    def string_path():
+        for spec in SPECS:
+            code = generator.generate(spec)
+            validator.validate_code(code)
+            # PatchLoader.load_patch re-validates and re-parses for the name
+            validator.validate_code(code)
+            name = validator.extract_function_info(code)['name']
+            namespace = {}
+            exec(code, namespace)
+            setattr(target, name, namespace[name].__get__(target))
+
+    def ast_path():
+        for spec in SPECS:
+            tree = generator.generate_ast(spec)
+            validator.validate_tree(tree)
+            generator.to_source(tree)
+            namespace = {}
+            exec(generator.compile_ast(tree), namespace)
+            setattr(target, spec['name'], namespace[spec['name']].__get__(target))
+
+    print(f"[codegen] {len(SPECS)} specs x {n} rounds")
+    ops = n * len(SPECS)
+    t_string = timeit.timeit(string_path, number=n)
+    t_ast = timeit.timeit(ast_path, number=n)
+    _report("string generate + exec", t_string, ops)
+    _report("ast generate + compile", t_ast, ops)
+    print(f"  speedup: {t_string / t_ast:.2f}x")
+
+    for label, build in (("string", generator.generate),
+                         ("ast", lambda spec: generator.to_source(generator.generate_ast(spec)))):
+        try:
+            ok, msg = validator.validate_code(build(NESTED_SPEC))
+        except SyntaxError as e:
+            ok, msg = False, str(e)
+        print(f"  nested body via {label:<6} -> {'ok' if ok else msg}")
+
+
+
+def bench_map(rows: int = 1_000_000):
+    """
+    Bulk application of learned patches: a Python loop over the bound
+    method against PatchVectorizer (NumPy lift for arithmetic, chunked
+    process pool for the rest).
+    """
+    import time
+    import numpy as np
+    from vectorizer import PatchVectorizer, _function_from
+
+    add = "def add(self, num1, num2):\n    return num1 + num2\n"
+    upper = "def to_uppercase(self, input_str):\n    return input_str.upper()\n"
+    a = np.random.rand(rows)
+    b = np.random.rand(rows)
+    words = ['tama'] * rows
+    target = _Target()
+
+    def timed(fn):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    print(f"[map] {rows:,} rows")
+    vectorizer = PatchVectorizer()
+    bound = _function_from(add).__get__(target)
+    a_list, b_list = a.tolist(), b.tolist()
+    t_loop = timed(lambda: [bound(x, y) for x, y in zip(a_list, b_list)])
+    t_lift = timed(lambda: vectorizer.map(add, [a, b]))
+    _report("add: python loop", t_loop, rows, 'ns')
+    _report("add: numpy lift", t_lift, rows, 'ns')
+    print(f"  speedup: {t_loop / t_lift:.1f}x")
+
+    bound = _function_from(upper).__get__(target)
+    serial = PatchVectorizer(workers=1)
+    t_loop = timed(lambda: [bound(w) for w in words])
+    t_serial = timed(lambda: serial.map(upper, [words]))
+    t_pool = timed(lambda: vectorizer.map(upper, [words]))
+    _report("upper: python loop", t_loop, rows, 'ns')
+    _report("upper: chunked, 1 process", t_serial, rows, 'ns')
+    _report(f"upper: chunked, {vectorizer.workers} processes", t_pool, rows, 'ns')
+
+
+
+# (name, policy 1 loop body, policy 2 idiom body) over `input_list`
+IDIOM_PAIRS = [
+    ('filter_list',
+     'result = []\nfor x in input_list:\n    if x > 0:\n        result.append(x)\nreturn result',
+     'return list(filter(lambda x: x > 0, input_list))'),
+    ('filter_comp',
+     'result = []\nfor x in input_list:\n    if x > 0:\n        result.append(x)\nreturn result',
+     'return [x for x in input_list if x > 0]'),
+    ('reverse_list',
+     'result = []\ni = len(input_list) - 1\nwhile i >= 0:\n    result.append(input_list[i])\n    i = i - 1\nreturn result',
+     'return input_list[::-1]'),
+    ('square_list',
+     'result = []\nfor x in input_list:\n    result.append(x * x)\nreturn result',
+     'return [x * x for x in input_list]'),
+    ('sum_positive',
+     'total = 0\nfor x in input_list:\n    if x > 0:\n        total = total + x\nreturn total',
+     'return sum(x for x in input_list if x > 0)'),
+]
+
+
+def bench_idioms(size: int = 10_000, n: int = 200):
+    """
+    Call time of patches written as the explicit loops validator policy 1
+    forces, against the comprehension/lambda/slice forms policy 2 admits.
+    """
+    import random
+    from validator import CodeValidator
+
+    generator = CodeGenerator()
+    strict = CodeValidator(policy=1)
+    relaxed = CodeValidator(policy=2)
+    data = [random.randint(-100, 100) for _ in range(size)]
+
+    def build(name, body, validator):
+        tree = generator.generate_ast({'name': name, 'args': ['input_list'], 'body': body})
+        ok, msg = validator.validate_tree(tree)
+        if not ok:
+            raise RuntimeError(f"{name} rejected: {msg}")
+        namespace = {}
+        exec(generator.compile_ast(tree), namespace)
+        return namespace[name]
+
+    print(f"[idioms] {size:,}-element list x {n} calls")
+    for name, loop_body, idiom_body in IDIOM_PAIRS:
+        ok, _ = strict.validate_tree(generator.generate_ast(
+            {'name': name, 'args': ['input_list'], 'body': idiom_body}))
+        loop = build(name, loop_body, strict)
+        idiom = build(name, idiom_body, relaxed)
+        assert loop(None, data) == idiom(None, data)
+        t_loop = timeit.timeit(lambda: loop(None, data), number=n)
+        t_idiom = timeit.timeit(lambda: idiom(None, data), number=n)
+        print(f"  {name:<14} loop {t_loop / n * 1e6:8.1f} us  idiom {t_idiom / n * 1e6:8.1f} us"
+              f"  {t_loop / t_idiom:5.1f}x  (policy 1 accepts idiom: {ok})")
+
+
+def bench_telemetry(n: int = 20_000):
+    """
+    Cost of the telemetry hooks on a hot call: PatchLoader.attach of an
+    already-compiled patch with the feed disabled, then enabled.
+    """
+    import contextlib
+    import io
+    import os
+    import tempfile
+    from loader import PatchLoader
+    from storage import PatchStorage
+    from telemetry import feed
+
+    code = "def add(self, num1, num2):\n    return num1 + num2\n"
+    target = _Target()
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = PatchLoader(PatchStorage(os.path.join(tmp, "bench.db")))
+        # attach() reports every bind; keep that out of the timing
+        with contextlib.redirect_stdout(io.StringIO()):
+            loader.attach(target, code, 'add', 'bench')
+            feed.disable()
+            t_off = timeit.timeit(lambda: loader.attach(target, None, 'add', 'bench'), number=n)
+            feed.enable()
+            t_on = timeit.timeit(lambda: loader.attach(target, None, 'add', 'bench'), number=n)
+            feed.disable()
+    t_guard = timeit.timeit('feed.enabled', globals={'feed': feed}, number=n * 10)
+
+    print(f"[telemetry] {n:,} attach calls")
+    _report("attach, feed disabled", t_off, n)
+    _report("attach, feed enabled", t_on, n)
+    _report("disabled guard alone", t_guard, n * 10, 'ns')
+
+
+def bench_profiler(n: int = 200_000):
+    """
+    Per-call cost of PatchProfiler's wrapper on a trivial bound patch,
+    against the same patch bound without profiling.
+    """
+    import contextlib
+    import io
+    import os
+    import tempfile
+    from loader import PatchLoader
+    from profiler import PatchProfiler
+    from storage import PatchStorage
+
+    code = "def add(self, num1, num2):\n    return num1 + num2\n"
+    plain, profiled = _Target(), _Target()
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = PatchStorage(os.path.join(tmp, "bench.db"))
+        profiler = PatchProfiler(storage, flush_interval=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            PatchLoader(storage).attach(plain, code, 'add', 'bench')
+            PatchLoader(storage, profiler).attach(profiled, code, 'add', 'bench')
+        t_plain = timeit.timeit(lambda: plain.add(1, 2), number=n)
+        t_profiled = timeit.timeit(lambda: profiled.add(1, 2), number=n)
+        profiler.flush()
+
+    print(f"[profiler] {n:,} calls")
+    _report("add, unprofiled", t_plain, n, 'ns')
+    _report("add, profiled", t_profiled, n, 'ns')
+    print(f"  overhead: {(t_profiled - t_plain) / n * 1e9:.0f} ns/call")
+
+
+BENCHMARKS = {
+    'codegen': bench_codegen,
+    'map': bench_map,
+    'idioms': bench_idioms,
+    'telemetry': bench_telemetry,
+    'profiler': bench_profiler,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TAMA pipeline benchmarks")
+    parser.add_argument('name', choices=sorted(BENCHMARKS) + ['all'])
+    args = parser.parse_args()
+    for name, bench in BENCHMARKS.items():
+        if args.name in (name, 'all'):
+            bench()
@@ -13,10 +13,14 @@
 |     - Takes natural language and turns it into functional code.   |
 |     - Stores patches, attaches them, and executes on the fly.     |
 |     - Represents TAMA's brain in execution context.               |
+|     - Serves known prompts straight from the PromptIndex.         |
+|     - Reports latency and cache hits to the telemetry feed.       |
 |                                                                   |
 |    Usage         :                                                |
 |     bot = DynamicBot()                                            |
 |     bot.learn_and_execute("add two numbers", 1, 2)                |
+|     bot.map("add two numbers", column_a, column_b)                |
+|     bot = DynamicBot(profile=True)  # per-patch call stats        |
 |                                                                   |
 |    Future Plans  :                                                |
 |     - Add intent retry strategies.                                |
@@ -28,51 +32,149 @@ from loader import PatchLoader
 from validator import CodeValidator
 from nlp import IntentParser
 from generator import CodeGenerator
+from vectorizer import PatchVectorizer
+from telemetry import feed
+from profiler import PatchProfiler
+from typing import Optional
+import time
 
 
 class DynamicBot:
-    def __init__(self):
+    def __init__(self, ast_codegen: bool = True, profile: bool = False):
+        self.ast_codegen = ast_codegen
         self.storage = PatchStorage()
         self.validator = CodeValidator()
-        self.loader = PatchLoader(self.storage)
+        # Opt-in: per-patch call stats, flushed to PatchStats
+        self.profiler = PatchProfiler(self.storage) if profile else None
+        self.loader = PatchLoader(self.storage, self.profiler)
         self.intent_parser = IntentParser()
         self.code_generator = CodeGenerator()
+        self.vectorizer = PatchVectorizer()
+        self.loaded_patches = {}
+        # Indexed patches stored under an older (or no) policy, by hash:
+        # whether they pass the current validator
+        self.revalidated = {}
         
     def learn_and_execute(self, instruction: str, *args, **kwargs):
-        
+        func_name = self.learn(instruction)
+        if func_name is None:
+            return None
+
+        # 6. Call the new function
+        func = getattr(self, func_name, None)
+        if func:
+            print(f"[TAMA] Executing '{func_name}' with args {args}")
+            return func(*args, **kwargs)
+        else:
+            print(f"[TAMA] Function '{func_name}' not found after loading.")
+            return None
+
+    def learn(self, instruction: str) -> Optional[str]:
+        """
+        Resolves or learns the instruction and binds its patch onto the bot.
+        Returns the bound function name, or None if it could not be learned.
+        """
+        if not feed.enabled:
+            return self._learn(instruction)
+        started = time.perf_counter()
+        func_name = None
+        try:
+            func_name = self._learn(instruction)
+            return func_name
+        finally:
+            feed.record_request(time.perf_counter() - started, func_name is not None)
+
+    def _learn(self, instruction: str) -> Optional[str]:
+        # 0. Known prompt: resolve straight to its patch
+        prompt_key = self.intent_parser.normalize(instruction)
+        indexed = self.storage.resolve_prompt(prompt_key)
+        if feed.enabled:
+            feed.record_cache("prompt_index", indexed is not None)
+        if indexed and self._bind_indexed(indexed):
+            print(f"[Index] Resolved '{prompt_key}' to patch {indexed['hash']}")
+            return indexed['name']
+
         # 1. Parse intent
         spec = self.intent_parser.parse(instruction)
         print(f"[Intent] Parsed spec: {spec}")
 
         # 2. Generate code
-        code = self.code_generator.generate(spec)
+        tree = None
+        if self.ast_codegen:
+            try:
+                tree = self.code_generator.generate_ast(spec)
+            except SyntaxError as e:
+                print(f"[Generator] Could not build function: {e}")
+                return None
+            code = self.code_generator.to_source(tree)
+        else:
+            code = self.code_generator.generate(spec)
         print(f"[Generator] Generated code:\n{code}")
 
         # 3. Validate code
-        is_valid, error_msg = self.validator.validate_code(code)
+        if tree is not None:
+            is_valid, error_msg = self.validator.validate_tree(tree)
+        else:
+            is_valid, error_msg = self.validator.validate_code(code)
         if not is_valid:
             print(f"[Validator] Code rejected: {error_msg}")
             return None
 
         # 4. Store patch
-        func_hash = self.storage.store_patch(code)
+        func_hash = self.storage.store_patch(code, policy=self.validator.policy)
         print(f"[Storage] Patch stored with hash: {func_hash}")
 
         # 5. Load patch
-        loaded = self.loader.load_patch(self, func_hash)
+        if tree is not None:
+            compiled = None
+            if not self.loader.has_compiled(func_hash):
+                compiled = self.code_generator.compile_ast(tree)
+            loaded = self.loader.attach(self, compiled, spec['name'], func_hash)
+        else:
+            loaded = self.loader.load_patch(self, func_hash, spec['name'])
         if not loaded:
             print("[Loader] Failed to load patch.")
             return None
+        self.loaded_patches[spec['name']] = func_hash
+        self.storage.link_prompt(prompt_key, func_hash, spec['name'])
+        return spec['name']
 
-        # 6. Call the new function
-        func_name = spec['name']
-        func = getattr(self, func_name, None)
-        if func:
-            print(f"[TAMA] Executing '{func_name}' with args {args}")
-            return func(*args, **kwargs)
-        else:
-            print(f"[TAMA] Function '{func_name}' not found after loading.")
+    def map(self, instruction: str, *columns):
+        """
+        Applies the learned function for `instruction` across whole columns
+        (sequences or NumPy arrays), one row per call. Pure-arithmetic
+        patches run as a single NumPy expression; anything else is chunked
+        across worker processes. See PatchVectorizer.map.
+        """
+        func_name = self.learn(instruction)
+        if func_name is None:
             return None
+        patch = self.storage.retrieve_patch(self.loaded_patches[func_name])
+        print(f"[TAMA] Mapping '{func_name}' over {len(columns)} column(s)")
+        return self.vectorizer.map(patch['code'], columns, getattr(self, func_name))
+
+    def _bind_indexed(self, indexed: dict) -> bool:
+        name = indexed['name']
+        if self.loaded_patches.get(name) == indexed['hash']:
+            return True
+        if not self._passes_current_policy(indexed):
+            return False
+        if not self.loader.attach(self, indexed['code'], name, indexed['hash']):
+            return False
+        self.loaded_patches[name] = indexed['hash']
+        return True
+
+    def _passes_current_policy(self, indexed: dict) -> bool:
+        policy = indexed['policy']
+        if policy is not None and policy >= self.validator.policy:
+            return True
+        fash = indexed['hash']
+        if fash not in self.revalidated:
+            is_valid, error_msg = self.validator.validate_code(indexed['code'])
+            if not is_valid:
+                print(f"[Validator] Indexed patch {fash} rejected: {error_msg}")
+            self.revalidated[fash] = is_valid
+        return self.revalidated[fash]
 
 # Example usage
 if __name__ == "__main__":
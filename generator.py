@@ -7,28 +7,68 @@
 |                                                                   |
 |    Author        : Gengai                                         |
 |    Created On    : 2025-06-14                                     |
-|    Version       : v1.0                                           |
+|    Version       : v1.1                                           |
 |                                                                   |
 |    Purpose       :                                                |
 |     - Translate parsed intent specs into Python code strings.     |
 |     - Format function name, arguments, and body.                  |
+|     - Emit AST trees that compile straight to code objects.       |
 |                                                                   |
 |    Usage         :                                                |
 |     code = CodeGenerator().generate(spec)                         |
+|     tree = CodeGenerator().generate_ast(spec)                     |
 |                                                                   |
 |    Future Plans  :                                                |
-|     - Support multi-line body handling.                           |
 |     - Add return type annotations and docstring injection.        |
 =====================================================================
 """
+import ast
+import keyword
+import textwrap
+import types
+
+# FunctionDef gained type_params in Python 3.12
+_NO_TYPE_PARAMS = {'type_params': []} if 'type_params' in ast.FunctionDef._fields else {}
+
 class CodeGenerator:
     def generate(self, spec: dict) -> str:
         args = ', '.join(['self'] + spec['args'])
         code = f"def {spec['name']}({args}):\n"
-        for line in spec['body'].split('\n'):
-            code += f"    {line.strip()}\n"
+        # Dedent as a block so nested bodies keep their relative indentation
+        for line in textwrap.dedent(spec['body']).split('\n'):
+            code += f"    {line.rstrip()}\n"
         return code
 
+    def generate_ast(self, spec: dict) -> ast.Module:
+        """
+        Builds the function straight into an AST; only the body is parsed,
+        as a block, so nested multi-line bodies keep their indentation.
+        Raises SyntaxError if the name, args or body are not valid Python.
+        """
+        names = [self._identifier(name) for name in [spec['name'], 'self'] + spec['args']]
+        if len(set(names[1:])) != len(names) - 1:
+            raise SyntaxError(f"Duplicate argument in {spec['args']}")
+        body = ast.parse(textwrap.dedent(spec['body'])).body or [ast.Pass()]
+        arguments = ast.arguments(posonlyargs=[], args=[ast.arg(arg=name) for name in names[1:]],
+                                  vararg=None, kwonlyargs=[], kw_defaults=[], kwarg=None, defaults=[])
+        func = ast.FunctionDef(name=names[0], args=arguments, body=body, decorator_list=[],
+                               returns=None, **_NO_TYPE_PARAMS)
+        return ast.fix_missing_locations(ast.Module(body=[func], type_ignores=[]))
+
+    def _identifier(self, name) -> str:
+        if not isinstance(name, str) or not name.isidentifier() or keyword.iskeyword(name):
+            raise SyntaxError(f"Not a valid identifier: {name!r}")
+        return name
+
+    def compile_ast(self, tree: ast.Module) -> types.CodeType:
+        return compile(tree, '<tama-patch>', 'exec')
+
+    def to_source(self, tree: ast.Module) -> str:
+        """
+        Canonical source text for storage and hashing.
+        """
+        return ast.unparse(tree) + '\n'
+
 # Example usage
 if __name__ == "__main__":
     generator = CodeGenerator()
@@ -38,3 +78,4 @@ if __name__ == "__main__":
         'body': 'return a + b'
     }
     print(generator.generate(spec))
+    print(generator.to_source(generator.generate_ast(spec)))
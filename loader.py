@@ -25,19 +25,33 @@
 """
 
 import types
+from typing import Union
 from validator import CodeValidator
 from storage import PatchStorage, StorageError
+from telemetry import feed
 
 class PatchLoader:
-    def __init__(self, storage: PatchStorage):
+    def __init__(self, storage: PatchStorage, profiler=None):
         self.storage = storage
+        # Optional PatchProfiler; bound patches are wrapped to record their calls
+        self.profiler = profiler
         self.validator = CodeValidator()
+        # Compiled functions keyed by canonical patch hash; equivalent
+        # patches share one entry whatever name each intent binds it under.
+        self._compiled = {}
 
-    def load_patch(self, obj, func_hash: str) -> bool:
+    def has_compiled(self, func_hash: str) -> bool:
+        return func_hash in self._compiled
+
+    def load_patch(self, obj, func_hash: str, func_name: str = None) -> bool:
         """
-        Loads a patch from storage and attaches it to the given object.
+        Loads a patch from storage and attaches it to the given object,
+        under `func_name` if given, else the name defined in the patch.
         Returns True if successful, False otherwise.
         """
+        if func_name and func_hash in self._compiled:
+            return self.attach(obj, None, func_name, func_hash)
+
         patch = self.storage.retrieve_patch(func_hash)
         if not patch:
             print(f"No patch found for hash: {func_hash}")
@@ -52,18 +66,38 @@ class PatchLoader:
             return False
 
         # Extract function name using validator's metadata
-        try:
-            func_info = self.validator.extract_function_info(code)
-            func_name = func_info['name']
-        except Exception as e:
-            print(f"Could not extract function name: {e}")
-            return False
+        if not func_name:
+            try:
+                func_info = self.validator.extract_function_info(code)
+                func_name = func_info['name']
+            except Exception as e:
+                print(f"Could not extract function name: {e}")
+                return False
+
+        return self.attach(obj, code, func_name, func_hash)
 
-        # Prepare namespace and exec
-        namespace = {}
+    def attach(self, obj, code: Union[str, types.CodeType, None], func_name: str,
+               func_hash: str = None) -> bool:
+        """
+        Executes already-validated patch code and binds it onto obj as
+        `func_name`. `code` may be source text or a code object compiled
+        from an AST; it is skipped when `func_hash` is already compiled.
+        Used directly for patches resolved through the prompt index, which
+        were validated before they were linked.
+        """
         try:
-            exec(code, namespace)
-            func = namespace[func_name]
+            func = self._compiled.get(func_hash) if func_hash else None
+            if func_hash and feed.enabled:
+                feed.record_cache("compiled", func is not None)
+            if func is None:
+                namespace = {}
+                exec(code, namespace)
+                func = next(value for value in namespace.values()
+                            if isinstance(value, types.FunctionType))
+                if func_hash:
+                    self._compiled[func_hash] = func
+            if self.profiler is not None and func_hash:
+                func = self.profiler.wrap(func, func_hash)
             setattr(obj, func_name, types.MethodType(func, obj))
             print(f"Loaded '{func_name}' onto {obj.__class__.__name__}")
             return True
@@ -0,0 +1,113 @@
+# loadgen.py
+"""
+=====================================================================
+|    Module Name   : loadgen.py                                     |
+|    Description   : Closed-loop load generator for server.py.      |
+|                    Reports sustained requests/sec and latency     |
+|                    percentiles.                                   |
+|                                                                   |
+|    Author        : Gengai                                         |
+|    Created On    : 2025-06-14                                     |
+|    Version       : v1.0                                           |
+|                                                                   |
+|    Purpose       :                                                |
+|     - Keep N keep-alive clients sending requests for a duration.  |
+|     - Count replies by status, including 503 rejections.          |
+|     - Report p50/p90/p99/max latency of successful requests.      |
+|                                                                   |
+|    Usage         :                                                |
+|     python loadgen.py --concurrency 16 --duration 30              |
+|     python loadgen.py -i "add two numbers" --args "[1, 2]"        |
+=====================================================================
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+from urllib.parse import urlparse
+
+
+def _client(url, op: str, bodies: List[bytes], deadline: float, latencies: list, statuses: Counter,
+            lock: threading.Lock):
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+    local_latencies, local_statuses = [], Counter()
+    headers = {'Content-Type': 'application/json'}
+    i = 0
+    while time.perf_counter() < deadline:
+        body = bodies[i % len(bodies)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            conn.request('POST', f"/{op}", body, headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            local_statuses['connection error'] += 1
+            conn.close()
+            continue
+        elapsed = time.perf_counter() - started
+        local_statuses[response.status] += 1
+        if response.status == 200:
+            local_latencies.append(elapsed)
+        elif response.status == 503:
+            # Back off as the server asks instead of spinning on rejections
+            time.sleep(float(response.getheader('Retry-After', '1')) / 10)
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        statuses.update(local_statuses)
+
+
+def _percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def run(url: str = "http://127.0.0.1:8765", instructions: List[str] = ("add two numbers",),
+        args: list = (1, 2), op: str = 'execute', concurrency: int = 16, duration: float = 10.0) -> Dict:
+    bodies = [json.dumps({'instruction': text, 'args': list(args)}).encode() for text in instructions]
+    latencies, statuses, lock = [], Counter(), threading.Lock()
+    started = time.perf_counter()
+    deadline = started + duration
+    clients = [threading.Thread(target=_client, args=(url, op, bodies, deadline, latencies, statuses, lock))
+               for _ in range(concurrency)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': sum(statuses.values()),
+        'ok': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': _percentile(latencies, 0.50) * 1e3,
+        'p90_ms': _percentile(latencies, 0.90) * 1e3,
+        'p99_ms': _percentile(latencies, 0.99) * 1e3,
+        'max_ms': latencies[-1] * 1e3 if latencies else 0.0,
+        'statuses': dict(statuses),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for the TAMA HTTP server")
+    parser.add_argument('--url', default="http://127.0.0.1:8765")
+    parser.add_argument('-i', '--instruction', action='append', default=None,
+                        help="instruction to send; repeat to cycle through several")
+    parser.add_argument('--args', default="[1, 2]", help="JSON list of call arguments")
+    parser.add_argument('--op', choices=['execute', 'learn'], default='execute')
+    parser.add_argument('-c', '--concurrency', type=int, default=16)
+    parser.add_argument('-d', '--duration', type=float, default=10.0)
+    options = parser.parse_args()
+
+    report = run(options.url, options.instruction or ["add two numbers"], json.loads(options.args),
+                 options.op, options.concurrency, options.duration)
+    print(f"[Loadgen] {report['requests']:,} requests, {report['ok']:,} ok over {options.duration:.0f}s "
+          f"with {options.concurrency} clients")
+    print(f"[Loadgen] {report['rps']:.1f} req/s sustained")
+    print(f"[Loadgen] latency p50 {report['p50_ms']:.2f} ms  p90 {report['p90_ms']:.2f} ms  "
+          f"p99 {report['p99_ms']:.2f} ms  max {report['max_ms']:.2f} ms")
+    print(f"[Loadgen] statuses {report['statuses']}")
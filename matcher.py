@@ -16,6 +16,7 @@ import numpy as np
 from typing import Optional, Tuple
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
+from telemetry import feed
 
 class IntentMatcher:
     def __init__(self,memdb = 'IntentVault.db'):
@@ -37,6 +38,8 @@ class IntentMatcher:
         sims = cosine_similarity(query_vec, db_vecs).flatten()
         max_index = int(np.argmax(sims))
         max_score = float(sims[max_index])
+        if feed.enabled:
+            feed.record_confidence(max_score)
         if max_score >= self.threshold:
             return (prompts[max_index], max_score)
         return None
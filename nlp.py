@@ -50,6 +50,9 @@ class IntentParser:
         self.memdb = memdb
         self._init_intmem()
         self.matcher = IntentMatcher()
+        # Asked for a spec when nothing matches. Front ends without a console
+        # replace it; raising instead of returning leaves the prompt untaught.
+        self.teacher = self._ask_hubby
     @contextmanager
     def _get_connection(self):
         conn = sqlite3.connect(self.memdb)
@@ -126,12 +129,18 @@ class IntentParser:
                 spec = self._get_from_mem(similar_prompt)
                 if spec:
                     return spec
-        spec = self._ask_hubby(prompt)
+        spec = self.teacher(prompt)
         self._store_in_mem(text,spec)
         return spec
     
 
 
+    def normalize(self, prompt: str) -> str:
+        """
+        Public form of the prompt key used by IntentVault and PromptIndex.
+        """
+        return self._preprocess(prompt)
+
     def _preprocess(self, prompt: str) -> str:
         prompt = prompt.lower().strip()
         text = re.sub(r'[^\w\s]', '', prompt)
@@ -0,0 +1,406 @@
+# server.py
+"""
+=====================================================================
+|    Module Name   : server.py                                      |
+|    Description   : Headless serving entry point for DynamicBot.   |
+|                    HTTP/JSON and JSON-lines front ends over a     |
+|                    pool of worker processes.                      |
+|                                                                   |
+|    Author        : Gengai                                         |
+|    Created On    : 2025-06-14                                     |
+|    Version       : v1.0                                           |
+|                                                                   |
+|    Purpose       :                                                |
+|     - Run one warmed, silenced DynamicBot per worker process.     |
+|     - Route requests to the least-loaded worker; bound the work   |
+|       queued on each and reject (HTTP 503) or wait when full.     |
+|     - Drain in-flight requests before shutting workers down.      |
+|                                                                   |
+|    Usage         :                                                |
+|     python server.py http --port 8765 --workers 4                 |
+|     python server.py jsonl < requests.jsonl > replies.jsonl       |
+|     POST /execute {"instruction": "add two numbers",              |
+|                    "args": [1, 2]}                                |
+|                                                                   |
+|    Future Plans  :                                                |
+|     - Restart workers that exit instead of failing their work.    |
+=====================================================================
+"""
+import argparse
+import functools
+import itertools
+import json
+import multiprocessing as mp
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Optional
+
+OPS = ('learn', 'execute')
+
+
+class ServerBusy(Exception):
+    pass
+
+
+def _default_bot(profile: bool = False):
+    from core import DynamicBot
+    return DynamicBot(profile=profile)
+
+
+def _request_fields(request) -> tuple:
+    # JSON gives no types; a bad request must fail here, not inside a worker
+    if not isinstance(request, dict):
+        raise TypeError("request must be a JSON object")
+    instruction, args = request['instruction'], request.get('args', [])
+    if not isinstance(instruction, str):
+        raise TypeError("'instruction' must be a string")
+    if not isinstance(args, list):
+        raise TypeError("'args' must be a list")
+    return instruction, args
+
+
+def _jsonable(value):
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return value.tolist() if hasattr(value, 'tolist') else repr(value)
+
+
+def _worker_main(worker_id: int, tasks, results, bot_factory: Callable, warmup: Iterable[str]):
+    # TAMA narrates every step on stdout; a headless worker throws it away.
+    # multiprocessing already points stdin at devnull, so teaching prompts fail fast.
+    sys.stdout = open(os.devnull, 'w')
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    bot = bot_factory()
+    # instruction -> bound function name. learn() touches the prompt index
+    # (and its write lock) on every call; a bound instruction needs neither.
+    bound = {}
+    for instruction in warmup:
+        try:
+            func_name = bot.learn(instruction)
+            if func_name is not None:
+                bound[instruction] = func_name
+        except Exception:
+            pass
+    results.put((worker_id, None, True, None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        request_id, op, instruction, args = task
+        try:
+            func_name = bound.get(instruction)
+            if func_name is None or getattr(bot, func_name, None) is None:
+                func_name = bot.learn(instruction)
+                if func_name is not None:
+                    bound[instruction] = func_name
+            if func_name is None:
+                results.put((worker_id, request_id, False, f"Could not learn '{instruction}'"))
+                continue
+            value = func_name if op == 'learn' else getattr(bot, func_name)(*args)
+            results.put((worker_id, request_id, True, _jsonable(value)))
+        except Exception as e:
+            results.put((worker_id, request_id, False, f"{type(e).__name__}: {e}"))
+    # Worker processes skip atexit, so profiled bots flush here
+    profiler = getattr(bot, 'profiler', None)
+    if profiler is not None:
+        profiler.flush()
+
+
+class TamaServer:
+    """
+    Pool of worker processes, each owning a warmed DynamicBot. A request
+    goes to the worker with the fewest requests in flight, preferring the
+    one its instruction hashes to so patches stay bound where they were
+    first used. No worker holds more than `depth` requests; past that,
+    submit() raises ServerBusy, or waits when block=True. Once every
+    worker has exited, submit() raises ServerBusy even when blocking.
+    """
+    def __init__(self, workers: int = None, depth: int = 8, bot_factory: Callable = _default_bot,
+                 warmup: Iterable[str] = (), start_method: str = 'spawn'):
+        self.n_workers = workers or os.cpu_count() or 1
+        self.depth = depth
+        self.bot_factory = bot_factory
+        self.warmup = tuple(warmup)
+        self.ctx = mp.get_context(start_method)
+        self._cond = threading.Condition()
+        self._ids = itertools.count()
+        self._pending = {}
+        self._inflight = [0] * self.n_workers
+        self._dead = set()
+        self._closing = False
+        self._stopped = threading.Event()
+        self.completed = 0
+        self.rejected = 0
+
+    def start(self, timeout: float = 300.0):
+        self.results = self.ctx.Queue()
+        self.tasks = [self.ctx.Queue() for _ in range(self.n_workers)]
+        self.procs = [self.ctx.Process(target=_worker_main, daemon=True,
+                                       args=(i, self.tasks[i], self.results, self.bot_factory, self.warmup))
+                      for i in range(self.n_workers)]
+        for proc in self.procs:
+            proc.start()
+        # Workers report in once their bot is built and warmed
+        deadline = time.monotonic() + timeout
+        ready = 0
+        while ready < self.n_workers:
+            try:
+                self.results.get(timeout=1.0)
+                ready += 1
+            except queue.Empty:
+                if any(not proc.is_alive() for proc in self.procs):
+                    self._stop_workers(0)
+                    raise RuntimeError("A worker exited while starting up")
+                if time.monotonic() > deadline:
+                    self._stop_workers(0)
+                    raise RuntimeError(f"Workers not ready after {timeout:.0f}s")
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        return self
+
+    def _pick(self, instruction: str) -> Optional[int]:
+        preferred = zlib.crc32(instruction.encode()) % self.n_workers
+        live = [w for w in range(self.n_workers) if w not in self._dead]
+        if not live:
+            return None
+        worker = min(live, key=lambda w: (self._inflight[w], w != preferred))
+        return worker if self._inflight[worker] < self.depth else None
+
+    def submit(self, op: str, instruction: str, args=(), block: bool = False,
+               timeout: float = None) -> Future:
+        """
+        Queues one request and returns a Future of
+        {"ok": True, "result": ...} or {"ok": False, "error": ...}.
+        """
+        if op not in OPS:
+            raise ValueError(f"Unknown op '{op}', expected one of {OPS}")
+        with self._cond:
+            while True:
+                if self._closing:
+                    raise ServerBusy("Server is shutting down")
+                if len(self._dead) == self.n_workers:
+                    raise ServerBusy(f"All {self.n_workers} workers have exited")
+                worker = self._pick(instruction)
+                if worker is not None:
+                    break
+                if not block or not self._cond.wait(timeout):
+                    self.rejected += 1
+                    raise ServerBusy(f"All {self.n_workers} workers have {self.depth} requests queued")
+            request_id = next(self._ids)
+            future = Future()
+            self._pending[request_id] = (future, worker)
+            self._inflight[worker] += 1
+        self.tasks[worker].put((request_id, op, instruction, tuple(args)))
+        return future
+
+    def _collect(self):
+        # Stopped by an event, not a sentinel: a killed worker can leave the results queue locked
+        # Reaped on every pass, so steady traffic on live workers cannot hide a dead one
+        while not self._stopped.is_set():
+            self._reap()
+            try:
+                worker, request_id, ok, value = self.results.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            with self._cond:
+                entry = self._pending.pop(request_id, None)
+                if entry is None:
+                    # Replied just before its worker died; the reaper already failed it
+                    continue
+                self._inflight[worker] -= 1
+                self.completed += 1
+                self._cond.notify_all()
+            entry[0].set_result({'ok': True, 'result': value} if ok else {'ok': False, 'error': value})
+
+    def _reap(self):
+        # A worker that died takes its queued requests with it; fail them instead of hanging
+        dead = {i for i, proc in enumerate(self.procs) if not proc.is_alive()} - self._dead
+        if not dead:
+            return
+        with self._cond:
+            self._dead |= dead
+            lost = [(rid, entry) for rid, entry in self._pending.items() if entry[1] in dead]
+            for request_id, (future, worker) in lost:
+                del self._pending[request_id]
+                self._inflight[worker] -= 1
+                future.set_result({'ok': False, 'error': f"Worker {worker} exited"})
+            self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {'workers': self.n_workers, 'depth': self.depth, 'inflight': list(self._inflight),
+                    'dead': sorted(self._dead), 'completed': self.completed, 'rejected': self.rejected,
+                    'closing': self._closing}
+
+    def shutdown(self, timeout: float = 30.0):
+        """
+        Stops accepting requests, waits up to `timeout` seconds for the
+        ones in flight, then stops the workers.
+        """
+        with self._cond:
+            self._closing = True
+            self._cond.wait_for(lambda: not self._pending, timeout)
+        self._stopped.set()
+        self._collector.join()
+        self._stop_workers(timeout)
+        with self._cond:
+            for future, _ in self._pending.values():
+                future.set_result({'ok': False, 'error': "Server shut down"})
+            self._pending.clear()
+
+    def _stop_workers(self, timeout: float):
+        for tasks in self.tasks:
+            tasks.put(None)
+        for proc in self.procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "TAMA/1.0"
+    # Headers and body go out in separate writes; Nagle would hold the body for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # One line per request would cost more than serving it
+        pass
+
+    def _reply(self, code: int, payload: Dict, headers: Dict = None):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._reply(200, self.server.tama.stats())
+        else:
+            self._reply(404, {'ok': False, 'error': f"No route {self.path}"})
+
+    def do_POST(self):
+        op = self.path.strip('/')
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            instruction, args = _request_fields(request)
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {'ok': False, 'error': f"Bad request: {e}"})
+            return
+        if op not in OPS:
+            self._reply(404, {'ok': False, 'error': f"No route {self.path}"})
+            return
+        try:
+            future = self.server.tama.submit(op, instruction, args)
+        except ServerBusy as e:
+            self._reply(503, {'ok': False, 'error': str(e)}, {'Retry-After': '1'})
+            return
+        try:
+            result = future.result(self.server.request_timeout)
+        except TimeoutError:
+            self._reply(504, {'ok': False, 'error': "Request timed out"})
+            return
+        self._reply(200 if result['ok'] else 422, result)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections from bursts of new clients
+    request_queue_size = 128
+
+
+def serve_http(tama: TamaServer, host: str = '127.0.0.1', port: int = 8765,
+               request_timeout: float = 30.0):
+    httpd = _HTTPServer((host, port), _Handler)
+    httpd.tama = tama
+    httpd.request_timeout = request_timeout
+    print(f"[Server] Listening on http://{host}:{port} with {tama.n_workers} worker(s)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        print(f"[Server] Draining {sum(tama.stats()['inflight'])} request(s)")
+        tama.shutdown()
+        print("[Server] Stopped")
+
+
+def serve_jsonl(tama: TamaServer, infile=sys.stdin, outfile=sys.stdout):
+    """
+    Reads one JSON request per line ({"id", "op", "instruction", "args"})
+    and writes one JSON reply per line, in completion order, echoing
+    "id". Reading pauses while every worker queue is full, and stops
+    once every worker has exited.
+    """
+    lock = threading.Lock()
+
+    def write(payload):
+        with lock:
+            outfile.write(json.dumps(payload) + "\n")
+            outfile.flush()
+
+    def reply(request_id):
+        return lambda future: write({'id': request_id, **future.result()})
+
+    try:
+        for line in infile:
+            if not line.strip():
+                continue
+            request = None
+            try:
+                request = json.loads(line)
+                instruction, args = _request_fields(request)
+                future = tama.submit(request.get('op', 'execute'), instruction, args, block=True)
+            except (ValueError, KeyError, TypeError) as e:
+                write({'id': request.get('id') if isinstance(request, dict) else None,
+                       'ok': False, 'error': f"Bad request: {e}"})
+                continue
+            except ServerBusy as e:
+                write({'id': request.get('id'), 'ok': False, 'error': str(e)})
+                break
+            future.add_done_callback(reply(request.get('id')))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        tama.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless TAMA server")
+    parser.add_argument('mode', choices=['http', 'jsonl'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--depth', type=int, default=8, help="requests queued per worker before rejecting")
+    parser.add_argument('--timeout', type=float, default=30.0, help="per-request timeout in seconds (http)")
+    parser.add_argument('--warmup', action='append', default=[], help="instruction to learn at startup")
+    parser.add_argument('--profile', action='store_true', help="record per-patch call stats (profiler.py report)")
+    args = parser.parse_args()
+
+    # SIGTERM drains like Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    tama = TamaServer(args.workers, args.depth, functools.partial(_default_bot, profile=args.profile),
+                      warmup=args.warmup)
+    if args.mode == 'http':
+        tama.start()
+        serve_http(tama, args.host, args.port, args.timeout)
+    else:
+        # stdout carries replies only; progress goes to stderr
+        print(f"[Server] Starting {tama.n_workers} worker(s)", file=sys.stderr)
+        tama.start()
+        serve_jsonl(tama)
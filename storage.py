@@ -3,22 +3,28 @@
 =====================================================================
 |    Module Name   : storage.py                                     |
 |    Description   : Manages persistent patch storage for TAMA.     |
-|                    Uses SHA-256 hashing and SQLite for tracking   |
-|                    user-taught functions and their metadata.      |
+|                    Uses canonical-AST SHA-256 hashes and SQLite   |
+|                    to track user-taught functions and metadata.   |
 |                                                                   |
 |    Author        : Gengai                                         |
 |    Created On    : 2025-06-14                                     |
-|    Version       : v1.1                                           |
+|    Version       : v1.4                                           |
 |                                                                   |
 |    Purpose       :                                                |
 |     - Store and retrieve code patches using a content hash.       |
 |     - Track dependencies, usage timestamps, and patch integrity.  |
 |     - Abstract DB connection logic with context manager.          |
+|     - Index normalized prompts to patch hashes (PromptIndex).     |
+|     - Share one entry between semantically identical patches.     |
+|     - Keep per-patch call statistics (PatchStats) for profiling.  |
 |                                                                   |
 |    Usage         :                                                |
 |     storage = PatchStorage()                                      |
 |     hash = storage.store_patches(code, ['math'])                  |
 |     patch = storage.retrieve_patches(hash)                        |
+|     storage.link_prompt(prompt, hash, name)                       |
+|     patch = storage.resolve_prompt(prompt)                        |
+|     storage.record_patch_stats(profiler_stats)                    |
 |                                                                   |
 |    Future Plans  :                                                |
 |     - Plans to add version control for libraries for each patch   |
@@ -26,9 +32,11 @@
 |     - Sync patches across multiple agents/devices.                |
 =====================================================================
 """
+import ast
+import json
 import sqlite3
 import hashlib
-from typing import Optional,Dict
+from typing import Optional,Dict,List
 from contextlib import contextmanager
 import logging
 #==========[Logging Configs]========
@@ -38,6 +46,68 @@ logging.basicConfig(
     format = '%(asctime)s [%(levelname)s] %(message)s'
 )
 
+#========[Canonical Fingerprinting]========
+# 2: argument names are part of the fingerprint again
+# 3: PatchVault records the validator policy each patch passed
+SCHEMA_VERSION = 3
+
+class _AlphaRenamer(ast.NodeTransformer):
+    """
+    Renames locally bound identifiers to positional placeholders, in the
+    order they are first visited, so `s = a + b` and `t = a + b` line up.
+    Parameters are not in `bound`: callers pass them by keyword.
+    """
+    def __init__(self, bound: set, func_name: str):
+        self.bound = bound
+        self.func_name = func_name
+        self.mapping = {}
+    def _rename(self, name: str) -> str:
+        if name == self.func_name:
+            return '_f'
+        if name not in self.bound:
+            return name
+        if name not in self.mapping:
+            self.mapping[name] = f'_v{len(self.mapping)}'
+        return self.mapping[name]
+    def visit_arg(self, node):
+        node.arg = self._rename(node.arg)
+        return node
+    def visit_Name(self, node):
+        node.id = self._rename(node.id)
+        return node
+
+def canonical_fingerprint(code: str) -> str:
+    """
+    SHA-256 of the normalized AST: formatting, comments and docstrings are
+    dropped, the function is renamed and locals are alpha-renamed. Argument
+    names and defaults are kept. Code that does not parse falls back to a
+    hash of the raw text.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return hashlib.sha256(code.encode()).hexdigest()
+    func_name = None
+    params = set()
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            func_name, node.name = node.name, '_f'
+            params = {arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)}
+            break
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            body = node.body
+            if (len(body) > 1 and isinstance(body[0], ast.Expr)
+                    and isinstance(body[0].value, ast.Constant)
+                    and isinstance(body[0].value.value, str)):
+                node.body = body[1:]
+    bound = {node.arg for node in ast.walk(tree) if isinstance(node, ast.arg)}
+    bound |= {node.id for node in ast.walk(tree)
+              if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)}
+    bound -= params
+    tree = _AlphaRenamer(bound, func_name).visit(tree)
+    return hashlib.sha256(ast.dump(tree).encode()).hexdigest()
+
 class PatchStorage:
     def __init__(self, db_path: str = "PatchVault.db"):
         self.db = db_path
@@ -62,21 +132,82 @@ class PatchStorage:
                     dependency TEXT,
                     code TEXT NOT NULL,
                     created_at REAL DEFAULT (STRFTIME('%s','now')),
-                    last_used REAL)''')
-    def store_patch(self,code: str,dependencies: list = None) -> str:
-        fash = hashlib.sha256(code.encode()).hexdigest()
+                    last_used REAL,
+                    policy INTEGER)''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS PromptIndex (
+                    prompt TEXT PRIMARY KEY,
+                    hash TEXT NOT NULL REFERENCES PatchVault(hash),
+                    name TEXT NOT NULL,
+                    linked_at REAL DEFAULT (STRFTIME('%s','now')))''')
+            conn.execute('''CREATE INDEX IF NOT EXISTS PromptIndex_hash
+                    ON PromptIndex(hash)''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS PatchStats (
+                    hash TEXT PRIMARY KEY REFERENCES PatchVault(hash),
+                    calls INTEGER NOT NULL DEFAULT 0,
+                    total_time REAL NOT NULL DEFAULT 0,
+                    max_time REAL NOT NULL DEFAULT 0,
+                    size_buckets TEXT,
+                    updated_at REAL)''')
+            if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+                # Another process may be migrating too; re-check under the write lock
+                conn.execute('BEGIN IMMEDIATE')
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+                if version < SCHEMA_VERSION:
+                    columns = {row[1] for row in conn.execute('PRAGMA table_info(PatchVault)')}
+                    if 'policy' not in columns:
+                        # Older patches predate policies; NULL means unknown
+                        conn.execute('ALTER TABLE PatchVault ADD COLUMN policy INTEGER')
+                    if version < 2:
+                        self._migrate_canonical_hashes(conn)
+                    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    def _migrate_canonical_hashes(self, conn) -> int:
+        """
+        Re-keys patches stored under raw-text hashes by their canonical
+        fingerprint, collapsing duplicates into the oldest row and pointing
+        PromptIndex entries at the survivor. Returns the number collapsed.
+        """
+        rows = conn.execute('''
+            SELECT hash, code, last_used FROM PatchVault
+            ORDER BY created_at, rowid''').fetchall()
+        survivors = {}
+        collapsed = 0
+        for old_hash, code, last_used in rows:
+            new_hash = canonical_fingerprint(code)
+            if new_hash not in survivors:
+                survivors[new_hash] = old_hash
+                if new_hash != old_hash:
+                    conn.execute('UPDATE PatchVault SET hash = ? WHERE hash = ?',
+                                 (new_hash, old_hash))
+            else:
+                conn.execute('''
+                    UPDATE PatchVault
+                    SET last_used = MAX(COALESCE(last_used, 0), COALESCE(?, 0))
+                    WHERE hash = ?''',(last_used, new_hash))
+                conn.execute('DELETE FROM PatchVault WHERE hash = ?',(old_hash,))
+                collapsed += 1
+            conn.execute('UPDATE PromptIndex SET hash = ? WHERE hash = ?',
+                         (new_hash, old_hash))
+        if collapsed:
+            print(f"[Storage] Collapsed {collapsed} duplicate patch(es)")
+        return collapsed
+    def store_patch(self,code: str,dependencies: list = None,policy: int = None) -> str:
+        """
+        Stores a patch under its canonical fingerprint. `policy` is the
+        validator policy version the code passed, kept for later audits.
+        """
+        fash = canonical_fingerprint(code)
         with self._get_connection() as conn:
             conn.execute(
                 '''INSERT OR IGNORE INTO PatchVault 
-                (hash, dependency, code, last_used) VALUES 
-                (?,?,?,STRFTIME('%s','now'))''',
-                (fash,','.join(dependencies) if dependencies else None,code)
+                (hash, dependency, code, last_used, policy) VALUES 
+                (?,?,?,STRFTIME('%s','now'),?)''',
+                (fash,','.join(dependencies) if dependencies else None,code,policy)
             )
         return fash
     def retrieve_patch(self, fash: str) -> Optional[Dict]:
         with self._get_connection() as conn:
             cursor = conn.execute('''
-                SELECT code, dependency
+                SELECT code, dependency, policy
                 FROM PatchVault
                 WHERE hash = ?''',(fash,)
                 )
@@ -89,9 +220,98 @@ class PatchStorage:
                 )
                 return {
                     'code':result[0],
-                    'dependencies':result[1].split(',') if result[1] else []
+                    'dependencies':result[1].split(',') if result[1] else [],
+                    'policy':result[2]
+                    }
+            return None
+    def link_prompt(self, prompt: str, fash: str, name: str) -> None:
+        """
+        Binds a normalized prompt to a stored patch so later calls can skip
+        parsing, generation and validation entirely.
+        """
+        with self._get_connection() as conn:
+            conn.execute(
+                '''INSERT OR REPLACE INTO PromptIndex
+                (prompt, hash, name) VALUES (?,?,?)''',
+                (prompt, fash, name)
+            )
+    def resolve_prompt(self, prompt: str) -> Optional[Dict]:
+        """
+        Resolves a normalized prompt to its patch in a single indexed lookup,
+        with the validator policy the patch passed (None if unrecorded).
+        Returns None when the prompt has never been linked.
+        """
+        with self._get_connection() as conn:
+            cursor = conn.execute('''
+                SELECT p.hash, p.name, v.code, v.dependency, v.policy
+                FROM PromptIndex p
+                JOIN PatchVault v ON v.hash = p.hash
+                WHERE p.prompt = ?''',(prompt,)
+                )
+            result = cursor.fetchone()
+            if result:
+                conn.execute('''
+                    UPDATE PatchVault
+                    SET last_used = STRFTIME('%s','now')
+                    WHERE hash = ?''',(result[0],)
+                )
+                return {
+                    'hash':result[0],
+                    'name':result[1],
+                    'code':result[2],
+                    'dependencies':result[3].split(',') if result[3] else [],
+                    'policy':result[4]
                     }
             return None
+    def record_patch_stats(self, stats: Dict[str, Dict]) -> None:
+        """
+        Adds profiler deltas to PatchStats. `stats` maps a patch hash to
+        {'calls', 'total_time', 'max_time', 'size_buckets'}; counts and
+        times accumulate, max_time keeps the larger value. The write lock
+        is taken up front so concurrent flushes cannot lose buckets.
+        """
+        with self._get_connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            for fash, delta in stats.items():
+                row = conn.execute('''
+                    SELECT size_buckets FROM PatchStats WHERE hash = ?''',(fash,)).fetchone()
+                buckets = json.loads(row[0]) if row and row[0] else {}
+                for label, count in delta['size_buckets'].items():
+                    buckets[label] = buckets.get(label, 0) + count
+                conn.execute('''
+                    INSERT INTO PatchStats
+                    (hash, calls, total_time, max_time, size_buckets, updated_at)
+                    VALUES (?,?,?,?,?,STRFTIME('%s','now'))
+                    ON CONFLICT(hash) DO UPDATE SET
+                        calls = calls + excluded.calls,
+                        total_time = total_time + excluded.total_time,
+                        max_time = MAX(max_time, excluded.max_time),
+                        size_buckets = excluded.size_buckets,
+                        updated_at = excluded.updated_at''',
+                    (fash, delta['calls'], delta['total_time'], delta['max_time'],
+                     json.dumps(buckets)))
+    def patch_stats(self, order_by: str = 'total', limit: int = 20) -> List[Dict]:
+        """
+        Returns up to `limit` PatchStats rows, hottest first by 'calls',
+        'total', 'mean' or 'max' time, with the prompt names bound to each.
+        """
+        order = {'calls': 's.calls', 'total': 's.total_time',
+                 'mean': 's.total_time / MAX(s.calls, 1)', 'max': 's.max_time'}[order_by]
+        with self._get_connection() as conn:
+            cursor = conn.execute(f'''
+                SELECT s.hash, s.calls, s.total_time, s.max_time, s.size_buckets,
+                    (SELECT GROUP_CONCAT(DISTINCT p.name) FROM PromptIndex p WHERE p.hash = s.hash)
+                FROM PatchStats s
+                ORDER BY {order} DESC
+                LIMIT ?''',(limit,))
+            return [{
+                'hash':row[0],
+                'calls':row[1],
+                'total_time':row[2],
+                'max_time':row[3],
+                'size_buckets':json.loads(row[4]) if row[4] else {},
+                'names':row[5]
+                } for row in cursor.fetchall()]
     def check_patch(self, fash: str) -> bool:
         with self._get_connection() as conn:
             cursor = conn.execute('''
@@ -112,3 +332,5 @@ if __name__ == "__main__":
     print(f"Stored patch with hash: {patch_hash}")
     print(f"Exists check: {storage.check_patch(patch_hash)}")
     print(f"Retrieved patch: {storage.retrieve_patch(patch_hash)}")
+    storage.link_prompt("say hello", patch_hash, "greet")
+    print(f"Resolved prompt: {storage.resolve_prompt('say hello')}")
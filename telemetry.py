@@ -0,0 +1,128 @@
+# telemetry.py
+"""
+=====================================================================
+|    Module Name   : telemetry.py                                   |
+|    Description   : Low-overhead performance feed for TAMA. The    |
+|                    pipeline records into it only while enabled.   |
+|                                                                   |
+|    Author        : Gengai                                         |
+|    Created On    : 2025-06-14                                     |
+|    Version       : v1.0                                           |
+|                                                                   |
+|    Purpose       :                                                |
+|     - Record request latency, failures and match confidence.      |
+|     - Count cache hits and misses per named cache.                |
+|     - Record generation throughput in tokens per second.          |
+|     - Summarize a recent window for dashboards (rps, p50, p99).   |
+|                                                                   |
+|    Usage         :                                                |
+|     from telemetry import feed                                    |
+|     if feed.enabled:                                              |
+|         feed.record_cache("prompt_index", hit)                    |
+|     feed.enable(); stats = feed.snapshot()                        |
+|                                                                   |
+|    Future Plans  :                                                |
+|     - Export snapshots to an external metrics endpoint.           |
+=====================================================================
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+class TelemetryFeed:
+    """
+    Shared sink for pipeline metrics. It is disabled by default. Every
+    call site checks `feed.enabled` first, so with no dashboard attached
+    the hot path pays one attribute lookup. Recording is thread-safe.
+    """
+    def __init__(self, max_samples: int = 4096):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._requests = deque(maxlen=max_samples)
+        self._generations = deque(maxlen=256)
+        self._caches = {}
+        self._confidence = None
+        self._enabled_at = None
+
+    def enable(self):
+        self.reset()
+        self._enabled_at = time.perf_counter()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._generations.clear()
+            self._caches = {}
+            self._confidence = None
+
+    def record_request(self, seconds: float, ok: bool = True):
+        with self._lock:
+            self._requests.append((time.perf_counter(), seconds, ok))
+
+    def record_cache(self, name: str, hit: bool):
+        with self._lock:
+            counts = self._caches.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def record_confidence(self, score: float):
+        self._confidence = score
+
+    def record_generation(self, tokens: int, seconds: float):
+        with self._lock:
+            self._generations.append((time.perf_counter(), tokens, seconds))
+
+    def snapshot(self, window: float = 10.0, caches: Optional[Dict] = None) -> Dict:
+        """
+        Summarizes the last `window` seconds. `caches` may add externally
+        counted caches as {name: (hits, misses)}.
+        """
+        now = time.perf_counter()
+        since = now - window
+        with self._lock:
+            requests = [r for r in self._requests if r[0] >= since]
+            generations = [g for g in self._generations if g[0] >= since]
+            cache_counts = {name: tuple(counts) for name, counts in self._caches.items()}
+        cache_counts.update(caches or {})
+
+        span = min(window, now - self._enabled_at) if self._enabled_at else window
+        latencies = sorted(r[1] for r in requests)
+        gen_tokens = sum(g[1] for g in generations)
+        gen_seconds = sum(g[2] for g in generations)
+        return {
+            'rps': len(requests) / span if span > 0 else 0.0,
+            'p50_ms': _percentile(latencies, 0.50) * 1e3,
+            'p99_ms': _percentile(latencies, 0.99) * 1e3,
+            'error_rate': sum(not r[2] for r in requests) / len(requests) if requests else 0.0,
+            'confidence': self._confidence,
+            'tokens_per_sec': gen_tokens / gen_seconds if gen_seconds > 0 else 0.0,
+            'cache_hit_rate': {name: hits / (hits + misses)
+                               for name, (hits, misses) in cache_counts.items() if hits + misses},
+        }
+
+
+def _percentile(ordered: list, q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# Process-wide feed; the pipeline modules record into this one
+feed = TelemetryFeed()
+
+# Example usage
+if __name__ == "__main__":
+    import random
+    feed.enable()
+    for _ in range(500):
+        feed.record_request(random.expovariate(1 / 0.004), random.random() > 0.02)
+        feed.record_cache("prompt_index", random.random() < 0.8)
+    feed.record_confidence(0.73)
+    feed.record_generation(128, 0.9)
+    for key, value in feed.snapshot().items():
+        print(f"[Telemetry] {key}: {value}")
@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules import each other flat, as when run from their own directory
+for path in (ROOT, os.path.join(ROOT, "CIRRETH"), os.path.join(ROOT, "AERULITH")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,67 @@
+import types
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from NACJAC_batcher import NACJAC_BatchEngine
+from NACJAC_configurator import NACJAC_Config
+from NACJAC_model import NACJAC_LangModel
+from NACJAC_tokeniser import NACJAC_Tokeniser
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "corpus.txt").write_text("the quick brown fox jumps over the lazy dog\n" * 20)
+    config = NACJAC_Config()
+    config.current_datapath = str(tmp_path / "corpus.txt")
+    config.vocab_path = str(tmp_path / "vocab.pt")
+    config.device = 'cpu'
+    config.n_embed, config.n_heads, config.n_layers = 32, 4, 2
+    config.block_size, config.kv_window_keep = 32, 16
+    torch.manual_seed(0)
+    tokenizer = NACJAC_Tokeniser(config)
+    model = NACJAC_LangModel(config, tokenizer.vocab_size()).eval()
+    return types.SimpleNamespace(model=model, tokenizer=tokenizer, config=config)
+
+
+def test_cancelled_queued_request_is_dropped(generator):
+    engine = NACJAC_BatchEngine(generator, max_batch_size=1).start()
+    try:
+        futures = [engine.submit("the fox", max_tokens=8) for _ in range(3)]
+        assert futures[1].cancel()
+        assert len(futures[0].result(timeout=30)) == 8
+        assert len(futures[2].result(timeout=30)) == 8
+        assert futures[1].cancelled()
+        assert engine.free_slots == [0]
+    finally:
+        engine.shutdown()
+
+
+def test_resolved_active_request_releases_its_slot(generator):
+    engine = NACJAC_BatchEngine(generator, max_batch_size=2).start()
+    try:
+        long = engine.submit("the fox", max_tokens=400)
+        others = [engine.submit("lazy dog", max_tokens=8) for _ in range(3)]
+        while not long.running():
+            pass
+        # Running futures cannot be cancelled; resolving one must not kill the loop
+        assert not long.cancel()
+        long.set_result("abandoned")
+        assert all(len(f.result(timeout=30)) == 8 for f in others)
+        engine.shutdown()
+        assert sorted(engine.free_slots) == [0, 1]
+        assert long.result() == "abandoned"
+    finally:
+        engine.shutdown()
+
+
+@pytest.mark.parametrize("keep", [0, 64])
+def test_refill_window_is_clamped(generator, keep):
+    generator.config.kv_window_keep = keep
+    engine = NACJAC_BatchEngine(generator, max_batch_size=2).start()
+    try:
+        futures = [engine.submit("the fox", max_tokens=3 * generator.config.block_size) for _ in range(2)]
+        assert all(len(f.result(timeout=60)) == 3 * generator.config.block_size for f in futures)
+    finally:
+        engine.shutdown()
@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pytest
+
+from NACJAC_bpe import NACJAC_BPETokeniser
+from NACJAC_configurator import NACJAC_Config
+
+TEXT = "naïve café — Grüße aus 東京, ça va? 🙂 naïve café\n" * 30
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "text.txt").write_text(TEXT, encoding='utf-8')
+    config = NACJAC_Config()
+    config.current_datapath = "text.txt"
+    config.tokeniser_type, config.bpe_vocab_size = 'bpe', 300
+    return config
+
+
+def test_non_ascii_text_round_trips(config):
+    bpe = NACJAC_BPETokeniser(config)
+    assert bpe.vocab_size() > 256
+    for text in (TEXT, "東京 🙂 unseen ünïcödé"):
+        ids = bpe.encode(text)
+        assert all(0 <= i < bpe.vocab_size() for i in ids)
+        assert bpe.decode(ids) == text
+    assert len(bpe.encode(TEXT)) < len(TEXT.encode('utf-8'))
+
+
+def test_merges_are_saved_and_reloaded(config, monkeypatch):
+    bpe = NACJAC_BPETokeniser(config)
+    assert os.path.exists(config.bpe_path)
+
+    def no_training(*args):
+        raise AssertionError("merges should be loaded, not retrained")
+    monkeypatch.setattr(NACJAC_BPETokeniser, 'train', staticmethod(no_training))
+    reloaded = NACJAC_BPETokeniser(config)
+    assert np.array_equal(reloaded.merges, bpe.merges)
+    assert reloaded.fingerprint() == bpe.fingerprint()
+    assert reloaded.encode(TEXT) == bpe.encode(TEXT)
+
+
+def test_vocab_beyond_uint16_is_refused(config):
+    config.bpe_vocab_size = 65537
+    with pytest.raises(ValueError, match="uint16"):
+        NACJAC_BPETokeniser(config)
+    assert not os.path.exists(config.bpe_path)
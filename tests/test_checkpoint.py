@@ -0,0 +1,69 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from NACJAC_checkpoint import NACJAC_CheckpointManager, NACJAC_rank_state
+from NACJAC_configurator import NACJAC_Config
+from NACJAC_DataLoader import NACJAC_Dataloader
+from NACJAC_tokeniser import NACJAC_Tokeniser
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "text.txt").write_text("the quick brown fox jumps over the lazy dog\n" * 40)
+    config = NACJAC_Config()
+    config.device, config.pin_memory = 'cpu', False
+    config.current_datapath = "text.txt"
+    config.vocab_path = "vocab.pt"
+    config.batch_size, config.block_size, config.seed = 4, 8, 7
+    return config
+
+
+def _loader(config, rank=0):
+    return NACJAC_Dataloader(config, NACJAC_Tokeniser(config), rank)
+
+
+def _train_state():
+    model = torch.nn.Linear(2, 2)
+    return model, torch.optim.AdamW(model.parameters())
+
+
+def test_resume_continues_the_batch_stream(config):
+    loader = _loader(config)
+    for _ in range(3):
+        loader.get_batch()
+    manager = NACJAC_CheckpointManager(config)
+    manager.save(3, *_train_state(), rank_states=[NACJAC_rank_state(loader)])
+    expected = [loader.get_batch()[0] for _ in range(2)] + [torch.rand(3)]
+    loader.close()
+
+    resumed = _loader(config)
+    assert resumed.get_batch()[0].tolist() != expected[0].tolist()
+    assert manager.resume(*_train_state(), data_loader=resumed) == 3
+    got = [resumed.get_batch()[0] for _ in range(2)] + [torch.rand(3)]
+    resumed.close()
+    assert all(torch.equal(a, b) for a, b in zip(got, expected))
+
+
+def test_each_rank_resumes_its_own_state(config):
+    states = []
+    for rank in range(2):
+        torch.manual_seed(config.seed + rank)
+        loader = _loader(config, rank)
+        loader.get_batch()
+        states.append(NACJAC_rank_state(loader))
+        loader.close()
+    manager = NACJAC_CheckpointManager(config)
+    manager.save(1, *_train_state(), rank_states=states)
+
+    draws = []
+    for rank in range(2):
+        loader = _loader(config, rank)
+        manager.resume(*_train_state(), data_loader=loader, rank=rank)
+        draws.append((loader.get_batch()[0], torch.rand(3)))
+        loader.close()
+    assert not torch.equal(draws[0][0], draws[1][0])
+    assert not torch.equal(draws[0][1], draws[1][1])
+    torch.set_rng_state(states[1]['rng']['torch'])
+    assert torch.equal(draws[1][1], torch.rand(3))
@@ -0,0 +1,49 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from NACJAC_configurator import NACJAC_Config
+from NACJAC_model import NACJAC_LangModel, NACJAC_load_model
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = NACJAC_Config()
+    config.device = 'cpu'
+    config.n_embed, config.n_heads, config.n_layers, config.block_size = 16, 2, 1, 8
+    return config
+
+
+def test_artifact_paths_follow_the_tokeniser(config):
+    char_paths = {config.model_path, config.quantized_model_path, config.metrics_path, config.manifest_path}
+    config.tokeniser_type = 'bpe'
+    bpe_paths = {config.model_path, config.quantized_model_path, config.metrics_path, config.manifest_path}
+    assert char_paths.isdisjoint(bpe_paths)
+    assert config.model_path == "NACJAC_v1_bpe1024_0.pt"
+    config.bpe_vocab_size = 4096
+    assert config.model_path == "NACJAC_v1_bpe4096_0.pt"
+    assert config.bpe_path.endswith("_bpe4096.npy")
+
+
+def test_latest_version_is_found_per_tokeniser(config, tmp_path):
+    (tmp_path / "NACJAC_v1_3.pt").touch()
+    (tmp_path / "NACJAC_v1_bpe1024_1.pt").touch()
+    assert config.finetune_loop == 3
+    config.tokeniser_type = 'bpe'
+    assert config.model_path == "NACJAC_v1_bpe1024_1.pt"
+
+
+def test_loading_a_checkpoint_with_another_vocabulary_is_refused(config):
+    torch.save(NACJAC_LangModel(config, 65).state_dict(), config.model_path)
+    assert NACJAC_load_model(config, 65, config.model_path).token_embedding_table.num_embeddings == 65
+    with pytest.raises(ValueError, match="tokeniser_type"):
+        NACJAC_load_model(config, 1024, config.model_path)
+
+
+def test_kv_window_follows_block_size_unless_set(config):
+    config.block_size = 32
+    assert config.kv_window_keep == 16
+    config.kv_window_keep = 4
+    config.block_size = 64
+    assert config.kv_window_keep == 4
@@ -0,0 +1,108 @@
+import os
+import struct
+
+import pytest
+
+pytest.importorskip("torch")
+
+from NACJAC_configurator import NACJAC_Config
+from NACJAC_corpus import NACJAC_Corpus
+from NACJAC_tokeniser import NACJAC_Tokeniser
+
+
+def _tokeniser(tmp_path, text, name, **settings):
+    (tmp_path / f"{name}.txt").write_text(text)
+    config = NACJAC_Config()
+    config.current_datapath = str(tmp_path / f"{name}.txt")
+    config.vocab_path = str(tmp_path / f"{name}_vocab.pt")
+    for key, value in settings.items():
+        setattr(config, key, value)
+    return NACJAC_Tokeniser(config)
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    text_path = tmp_path / "text.txt"
+    text_path.write_text("abc cab\nbca\n" * 50)
+    tokeniser = _tokeniser(tmp_path, "abc \n", "base")
+    corpus_path = str(tmp_path / "text.bin")
+    NACJAC_Corpus.build(str(text_path), corpus_path, tokeniser)
+    return str(text_path), corpus_path, tokeniser
+
+
+def test_roundtrip_is_fresh(corpus):
+    text_path, corpus_path, tokeniser = corpus
+    assert not NACJAC_Corpus.is_stale(text_path, corpus_path, tokeniser)
+    tokens = NACJAC_Corpus(corpus_path).tokens
+    assert tokeniser.decode(tokens) == open(text_path).read()
+
+
+def test_same_size_different_vocab_is_stale(corpus, tmp_path):
+    text_path, corpus_path, tokeniser = corpus
+    other = _tokeniser(tmp_path, "xyz \n", "other")
+    assert other.vocab_size() == tokeniser.vocab_size()
+    assert NACJAC_Corpus.is_stale(text_path, corpus_path, other)
+
+
+def test_unknown_handling_is_part_of_the_fingerprint(corpus, tmp_path):
+    text_path, corpus_path, _ = corpus
+    other = _tokeniser(tmp_path, "abc \n", "same", unknown_char='a')
+    assert NACJAC_Corpus.is_stale(text_path, corpus_path, other)
+
+
+def test_version_1_corpus_is_stale(corpus):
+    text_path, corpus_path, tokeniser = corpus
+    with open(corpus_path, 'r+b') as f:
+        f.seek(8)
+        f.write(struct.pack("<I", 1))
+    assert NACJAC_Corpus.is_stale(text_path, corpus_path, tokeniser)
+
+
+def test_text_without_newlines_is_read_in_bounded_chunks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tokeniser = _tokeniser(tmp_path, "ab", "flat")
+    text_path = tmp_path / "flat_corpus.txt"
+    text_path.write_text("ab" * 5000)
+    seen = []
+    encode_array = tokeniser.encode_array
+    monkeypatch.setattr(tokeniser, 'encode_array', lambda s: seen.append(len(s)) or encode_array(s))
+    n = NACJAC_Corpus.build(str(text_path), str(tmp_path / "flat.bin"), tokeniser, chunk_chars=256)
+    assert n == 10000
+    assert max(seen) <= 512
+    assert os.path.getsize(tmp_path / "flat.bin") == 64 + 10000
+
+
+def test_bpe_merges_are_part_of_the_fingerprint(corpus, tmp_path):
+    from NACJAC_bpe import NACJAC_BPETokeniser
+    text_path, corpus_path, _ = corpus
+    config = NACJAC_Config()
+    config.current_datapath = text_path
+    config.tokeniser_type, config.bpe_vocab_size = 'bpe', 260
+    bpe = NACJAC_BPETokeniser(config)
+    NACJAC_Corpus.build(text_path, corpus_path, bpe)
+    assert not NACJAC_Corpus.is_stale(text_path, corpus_path, bpe)
+    config.bpe_vocab_size = 258
+    assert NACJAC_Corpus.is_stale(text_path, corpus_path, NACJAC_BPETokeniser(config))
+
+
+def test_corpus_path_follows_current_datapath():
+    config = NACJAC_Config()
+    config.current_datapath = "data/other.txt"
+    assert config.corpus_path == "data/other.bin"
+
+
+def test_other_text_with_same_tokeniser_is_stale(corpus, tmp_path):
+    text_path, corpus_path, tokeniser = corpus
+    other_path = tmp_path / "other_text.txt"
+    other_path.write_text("cab abc\nbca\n" * 50)
+    os.utime(other_path, (0, 0))
+    assert NACJAC_Corpus.is_stale(str(other_path), corpus_path, tokeniser)
+
+
+def test_resized_text_is_stale(corpus):
+    text_path, corpus_path, tokeniser = corpus
+    with open(text_path, 'a') as f:
+        f.write("abc\n")
+    os.utime(text_path, (0, 0))
+    assert NACJAC_Corpus.is_stale(text_path, corpus_path, tokeniser)
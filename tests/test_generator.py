@@ -0,0 +1,43 @@
+import pytest
+
+from generator import CodeGenerator
+
+NESTED = {
+    'name': 'positive_total',
+    'args': ['items', 'limit'],
+    'body': """
+        total = 0
+        for x in items:
+            if x > 0:
+                total += x
+                if total > limit:
+                    return limit
+        return total
+    """,
+}
+
+
+def _bind(namespace, name):
+    return namespace[name].__get__(object())
+
+
+def test_ast_and_source_paths_build_the_same_function():
+    generator = CodeGenerator()
+    from_source, from_ast = {}, {}
+    exec(generator.generate(NESTED), from_source)
+    exec(generator.compile_ast(generator.generate_ast(NESTED)), from_ast)
+    source_fn, ast_fn = _bind(from_source, 'positive_total'), _bind(from_ast, 'positive_total')
+    for args in (([1, -2, 3], 10), ([5, 5, 5], 7), ([], 1)):
+        assert source_fn(*args) == ast_fn(*args)
+    assert ast_fn([5, 5, 5], 7) == 7
+
+
+@pytest.mark.parametrize("spec", [
+    {'name': 'f(): pass\ndef g', 'args': [], 'body': 'return 1'},
+    {'name': 'class', 'args': [], 'body': 'return 1'},
+    {'name': 'f', 'args': ['a=os.system("x")'], 'body': 'return 1'},
+    {'name': 'f', 'args': ['a', 'a'], 'body': 'return a'},
+])
+def test_invalid_names_are_rejected(spec):
+    with pytest.raises(SyntaxError):
+        CodeGenerator().generate_ast(spec)
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from NACJAC_configurator import NACJAC_Config
+from NACJAC_model import NACJAC_LangModel, NACJAC_load_model
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = NACJAC_Config()
+    config.device = 'cpu'
+    config.n_embed, config.n_heads, config.n_layers, config.block_size = 16, 2, 1, 8
+    return config
+
+
+def test_fast_load_restores_the_saved_weights(config):
+    torch.manual_seed(0)
+    saved = NACJAC_LangModel(config, 40).eval()
+    torch.save(saved.state_dict(), config.model_path)
+    loaded = NACJAC_load_model(config, 40, config.model_path)
+    idx = torch.randint(0, 40, (2, 8))
+    assert torch.equal(saved(idx)[0], loaded(idx)[0])
+
+
+def test_concurrent_loads_leave_init_intact(config):
+    torch.save(NACJAC_LangModel(config, 40).state_dict(), config.model_path)
+    threads = [threading.Thread(target=NACJAC_load_model, args=(config, 40, config.model_path))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    # Models built meanwhile on other threads still get their random init
+    fresh = [NACJAC_LangModel(config, 40) for _ in range(20)]
+    for thread in threads:
+        thread.join()
+    assert all(model.token_embedding_table.weight.std() > 0.5 for model in fresh)
+
+
+def test_int8_cache_loads_without_fp32_model_or_init(config, monkeypatch):
+    import os
+    import warnings
+    import NACJAC_model
+    torch.manual_seed(0)
+    torch.save(NACJAC_LangModel(config, 40).state_dict(), config.model_path)
+    built = NACJAC_model.NACJAC_load_quantized_model(config, 40)
+    os.remove(config.model_path)
+
+    def no_init(*args, **kwargs):
+        raise AssertionError("cache hit must not initialise or quantize fp32 weights")
+    monkeypatch.setattr(torch.nn.init, 'normal_', no_init)
+    monkeypatch.setattr(NACJAC_model, 'NACJAC_quantize_dynamic', no_init)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        cached = NACJAC_model.NACJAC_load_quantized_model(config, 40)
+    assert not caught
+    idx = torch.randint(0, 40, (2, 8))
+    assert torch.equal(built(idx)[0], cached(idx)[0])
+
+
+@pytest.mark.parametrize("keep", [None, 0, 64])
+def test_cached_generation_matches_uncached_past_block_size(config, keep):
+    # block_size was set after construction; the default window must follow it
+    if keep is not None:
+        config.kv_window_keep = keep
+    torch.manual_seed(0)
+    model = NACJAC_LangModel(config, 40).eval()
+    prompt = torch.randint(0, 40, (1, 3))
+    cached = model.generate(prompt, 3 * config.block_size, use_cache=True, temperature=0)
+    uncached = model.generate(prompt, 3 * config.block_size, use_cache=False, temperature=0)
+    assert cached.shape == uncached.shape == (1, 3 + 3 * config.block_size)
+    # Identical until the cache first fills and restarts from the kept window
+    assert torch.equal(cached[:, :config.block_size + 1], uncached[:, :config.block_size + 1])
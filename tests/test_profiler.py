@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from loader import PatchLoader
+from profiler import PatchProfiler, size_bucket
+from storage import PatchStorage
+
+ADD = "def add(self, a, b):\n    return a + b\n"
+
+
+class Bot:
+    pass
+
+
+@pytest.fixture
+def profiled_bot(tmp_path):
+    storage = PatchStorage(str(tmp_path / "vault.db"))
+    profiler = PatchProfiler(storage, flush_interval=0)
+    func_hash = storage.store_patch(ADD)
+    bot = Bot()
+    assert PatchLoader(storage, profiler).load_patch(bot, func_hash)
+    return bot, profiler, storage, func_hash
+
+
+class BadLen:
+    def __len__(self):
+        raise RuntimeError("no length")
+
+    def __add__(self, other):
+        return 0
+
+
+def test_unsized_arguments_count_as_one(profiled_bot):
+    np = pytest.importorskip("numpy")
+    bot, profiler, _, func_hash = profiled_bot
+    bot.add(BadLen(), np.array(2))
+    bot.add([1, 2, 3], b=[4] * 7)
+    bot.add(a=BadLen(), b=[1] * 20)
+    assert profiler.snapshot()[func_hash]['size_buckets'] == {'10': 2, '100': 1}
+    assert size_bucket(0) == '0' and size_bucket(5) == '10' and size_bucket(10**6) == '10k+'
+
+
+def test_zero_dim_arrays_do_not_fail_profiled_calls(profiled_bot):
+    np = pytest.importorskip("numpy")
+    bot, profiler, _, func_hash = profiled_bot
+    assert bot.add(np.array(1), np.array(2)) == 3
+    assert bot.add(a=np.array(1), b=np.array(2)) == 3
+    assert profiler.snapshot()[func_hash]['calls'] == 2
+
+
+def test_flush_accumulates_deltas_across_threads(profiled_bot):
+    bot, profiler, storage, func_hash = profiled_bot
+
+    def calls(n):
+        for _ in range(n):
+            bot.add([1] * 5, [2] * 5)
+
+    threads = [threading.Thread(target=calls, args=(100,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    bot.add(1, 2)
+    assert profiler.flush() == 1
+    assert profiler.flush() == 0
+    bot.add(a=[1] * 20, b=[2] * 20)
+    assert profiler.flush() == 1
+
+    row, = storage.patch_stats('calls')
+    assert row['hash'] == func_hash
+    assert row['calls'] == 402
+    assert row['size_buckets'] == {'10': 401, '100': 1}
+    assert row['max_time'] >= row['total_time'] / row['calls']
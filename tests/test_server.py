@@ -0,0 +1,155 @@
+import http.client
+import io
+import itertools
+import json
+import threading
+import time
+import zlib
+
+import pytest
+
+from server import ServerBusy, TamaServer, _HTTPServer, _Handler, serve_jsonl
+
+
+class FakeBot:
+    """Learns every instruction as `add`; 'slow' takes a long time to learn."""
+    def learn(self, instruction):
+        if instruction == 'slow':
+            time.sleep(60)
+        return 'add'
+
+    def add(self, a, b):
+        return a + b
+
+
+@pytest.fixture
+def tama():
+    servers = []
+
+    def start(workers=1, depth=8):
+        server = TamaServer(workers, depth, bot_factory=FakeBot).start(timeout=60)
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.shutdown(timeout=1)
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_http_rejects_malformed_args(tama):
+    httpd = _HTTPServer(('127.0.0.1', 0), _Handler)
+    httpd.tama, httpd.request_timeout = tama(), 10
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1], timeout=10)
+
+        def post(payload):
+            conn.request('POST', '/execute', json.dumps(payload), {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+
+        assert post({'instruction': 'add', 'args': [1, 2]}) == (200, {'ok': True, 'result': 3})
+        for bad in ({'instruction': 'add', 'args': 12}, {'instruction': 'add', 'args': {'a': 1}},
+                    {'instruction': 7, 'args': []}, [1, 2]):
+            status, body = post(bad)
+            assert status == 400 and not body['ok']
+        assert post({'instruction': 'add', 'args': [2, 2]})[0] == 200
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_jsonl_replies_to_malformed_args_and_keeps_going(tama):
+    lines = [{'id': 1, 'instruction': 'add', 'args': 5},
+             {'id': 2, 'instruction': 'add', 'args': [1, 2]}]
+    out = io.StringIO()
+    serve_jsonl(tama(), io.StringIO("".join(json.dumps(line) + "\n" for line in lines)), out)
+    replies = {reply['id']: reply for reply in map(json.loads, out.getvalue().splitlines())}
+    assert not replies[1]['ok'] and "'args' must be a list" in replies[1]['error']
+    assert replies[2] == {'id': 2, 'ok': True, 'result': 3}
+
+
+def test_dead_worker_is_reaped_under_steady_traffic(tama):
+    server = tama(workers=2)
+    slow = server.submit('execute', 'slow')
+    slow_worker = server.stats()['inflight'].index(1)
+    # Traffic prefers the other worker, so it never queues behind 'slow'
+    fast = next(f"add {i}" for i in itertools.count() if zlib.crc32(f"add {i}".encode()) % 2
+                != zlib.crc32(b"slow") % 2)
+    stop, served = threading.Event(), []
+
+    def traffic():
+        while not stop.is_set():
+            served.append(server.submit('execute', fast, [1, 1], block=True).result(10))
+
+    thread = threading.Thread(target=traffic)
+    thread.start()
+    try:
+        _wait_for(lambda: len(served) > 20)
+        server.procs[slow_worker].kill()
+        assert slow.result(5) == {'ok': False, 'error': f"Worker {slow_worker} exited"}
+    finally:
+        stop.set()
+        thread.join(10)
+
+
+def test_blocking_submit_raises_once_every_worker_is_dead(tama):
+    server = tama(workers=1, depth=1)
+    server.submit('execute', 'slow')
+    raised = []
+
+    def blocked():
+        try:
+            server.submit('execute', 'add', [1, 2], block=True)
+        except ServerBusy as e:
+            raised.append(str(e))
+
+    thread = threading.Thread(target=blocked)
+    thread.start()
+    time.sleep(0.2)
+    assert thread.is_alive()
+    server.procs[0].kill()
+    thread.join(5)
+    assert raised == ["All 1 workers have exited"]
+    with pytest.raises(ServerBusy):
+        server.submit('execute', 'add', [1, 2], block=True)
+
+
+def test_jsonl_stops_reading_once_every_worker_is_dead(tama):
+    server = tama(workers=1)
+    server.procs[0].kill()
+    _wait_for(lambda: server.stats()['dead'] == [0])
+    out = io.StringIO()
+    lines = "".join(json.dumps({'id': i, 'instruction': 'add', 'args': [i, i]}) + "\n" for i in range(3))
+    serve_jsonl(server, io.StringIO(lines), out)
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == [
+        {'id': 0, 'ok': False, 'error': "All 1 workers have exited"}]
+
+
+class CountingBot:
+    """Learns every instruction as `learned`, which reports how often it learned."""
+    def __init__(self):
+        self.learns = 0
+
+    def learn(self, instruction):
+        self.learns += 1
+        return 'learned'
+
+    def learned(self):
+        return self.learns
+
+
+def test_worker_learns_each_instruction_once():
+    server = TamaServer(1, bot_factory=CountingBot, warmup=['warm']).start(timeout=60)
+    try:
+        results = [server.submit('execute', name).result(timeout=10)['result']
+                   for name in ('warm', 'other', 'other', 'warm')]
+    finally:
+        server.shutdown(timeout=1)
+    assert results == [1, 2, 2, 2]
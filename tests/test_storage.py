@@ -0,0 +1,103 @@
+import hashlib
+import sqlite3
+import threading
+
+from storage import PatchStorage, canonical_fingerprint, SCHEMA_VERSION
+
+ADD_AB = "def add(self, a, b):\n    return a + b\n"
+ADD_XY = "def add(self, x, y):\n    return x + y\n"
+
+
+def test_fingerprint_ignores_formatting_docstrings_and_locals():
+    reformatted = ('def plus(self, a, b):\n    """Adds."""\n    # sum them\n'
+                   '    total = a + b\n    return total\n')
+    renamed = "def plus(self, a, b):\n    s = a + b\n    return s\n"
+    assert canonical_fingerprint(reformatted) == canonical_fingerprint(renamed)
+
+
+def test_fingerprint_keeps_argument_names_and_defaults():
+    assert canonical_fingerprint(ADD_AB) != canonical_fingerprint(ADD_XY)
+    with_default = "def add(self, a, b=1):\n    return a + b\n"
+    assert canonical_fingerprint(ADD_AB) != canonical_fingerprint(with_default)
+
+
+def test_retrieve_returns_the_stored_signature(tmp_path):
+    storage = PatchStorage(str(tmp_path / "vault.db"))
+    ab, xy = storage.store_patch(ADD_AB), storage.store_patch(ADD_XY)
+    assert storage.retrieve_patch(ab)['code'] == ADD_AB
+    assert storage.retrieve_patch(xy)['code'] == ADD_XY
+
+
+def _legacy_vault(path):
+    # Schema before fingerprinting: rows keyed by the hash of the raw text
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE PatchVault (hash TEXT PRIMARY KEY, dependency TEXT,
+                    code TEXT NOT NULL, created_at REAL DEFAULT (STRFTIME('%s','now')), last_used REAL)''')
+    conn.execute('''CREATE TABLE PromptIndex (prompt TEXT PRIMARY KEY, hash TEXT NOT NULL,
+                    name TEXT NOT NULL, linked_at REAL)''')
+    codes = [ADD_AB, ADD_AB.replace("return", "return  "), ADD_XY]
+    for i, code in enumerate(codes):
+        raw = hashlib.sha256(code.encode()).hexdigest()
+        conn.execute('INSERT INTO PatchVault (hash, code, created_at, last_used) VALUES (?,?,?,?)',
+                     (raw, code, i, 100 + i))
+        conn.execute('INSERT INTO PromptIndex (prompt, hash, name) VALUES (?,?,?)', (f"prompt {i}", raw, "add"))
+    conn.commit()
+    conn.close()
+
+
+def test_migration_collapses_duplicates_and_repoints_prompts(tmp_path):
+    path = str(tmp_path / "vault.db")
+    _legacy_vault(path)
+    storage = PatchStorage(path)
+    conn = sqlite3.connect(path)
+    hashes = {row[0] for row in conn.execute('SELECT hash FROM PatchVault')}
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+    conn.close()
+    assert hashes == {canonical_fingerprint(ADD_AB), canonical_fingerprint(ADD_XY)}
+    assert storage.resolve_prompt("prompt 1")['hash'] == canonical_fingerprint(ADD_AB)
+    assert storage.resolve_prompt("prompt 2")['code'] == ADD_XY
+
+
+def test_concurrent_opens_migrate_once(tmp_path):
+    path = str(tmp_path / "vault.db")
+    _legacy_vault(path)
+    barrier, errors = threading.Barrier(8), []
+
+    def open_vault():
+        barrier.wait()
+        try:
+            PatchStorage(path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_vault) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    conn = sqlite3.connect(path)
+    assert conn.execute('SELECT COUNT(*) FROM PatchVault').fetchone()[0] == 2
+    assert conn.execute('SELECT COUNT(*) FROM PromptIndex').fetchone()[0] == 3
+    conn.close()
+
+
+def test_patches_record_their_validator_policy(tmp_path):
+    storage = PatchStorage(str(tmp_path / "vault.db"))
+    assert storage.retrieve_patch(storage.store_patch(ADD_AB, policy=2))['policy'] == 2
+    assert storage.retrieve_patch(storage.store_patch(ADD_XY))['policy'] is None
+
+
+def test_legacy_vault_gains_policy_column(tmp_path):
+    path = str(tmp_path / "vault.db")
+    _legacy_vault(path)
+    storage = PatchStorage(path)
+    assert storage.retrieve_patch(canonical_fingerprint(ADD_AB))['policy'] is None
+
+
+def test_resolved_prompts_carry_their_policy(tmp_path):
+    storage = PatchStorage(str(tmp_path / "vault.db"))
+    storage.link_prompt("add ab", storage.store_patch(ADD_AB, policy=2), "add")
+    storage.link_prompt("add xy", storage.store_patch(ADD_XY), "add")
+    assert storage.resolve_prompt("add ab")['policy'] == 2
+    assert storage.resolve_prompt("add xy")['policy'] is None
@@ -0,0 +1,56 @@
+import pytest
+
+from validator import CodeValidator, LATEST_POLICY
+
+IDENTITY = "def f(self, input):\n    return input\n"
+
+
+@pytest.mark.parametrize("policy", [1, 2])
+def test_parameter_named_like_a_builtin_is_allowed(policy):
+    assert CodeValidator(policy).validate_code(IDENTITY)[0]
+
+
+def test_local_named_like_a_builtin_is_allowed():
+    code = "def f(self, x):\n    open = x + 1\n    return open\n"
+    assert CodeValidator().validate_code(code)[0]
+
+
+@pytest.mark.parametrize("code", [
+    "def f(self, x):\n    g = eval\n    return g(x)\n",
+    "def f(self, x):\n    return list(map(eval, x))\n",
+    "def f(self, x):\n    return (lambda: open)()(x)\n",
+    # The comprehension's own `eval` does not shadow the builtin outside it
+    "def f(self, x):\n    y = [eval for eval in x]\n    return eval\n",
+    "def f(self, x=eval):\n    return x\n",
+])
+def test_references_to_dangerous_builtins_are_rejected(code):
+    valid, error = CodeValidator().validate_code(code)
+    assert not valid and "reference" in error
+
+
+def test_reference_rule_is_gated_by_policy():
+    code = "def f(self, x):\n    g = eval\n    return g\n"
+    assert CodeValidator(policy=1).validate_code(code)[0]
+    assert not CodeValidator(policy=2).validate_code(code)[0]
+
+
+@pytest.mark.parametrize("policy", [1, 2])
+@pytest.mark.parametrize("code", [
+    "def f(self, x):\n    return __builtins__['ev' + 'al'](x)\n",
+    "def f(self, x):\n    b = __builtins__\n    return b\n",
+])
+def test_builtins_namespace_is_blocked(policy, code):
+    valid, error = CodeValidator(policy).validate_code(code)
+    assert not valid and "__builtins__" in error
+
+
+def test_direct_calls_stay_blocked_under_every_policy():
+    code = "def f(self, x):\n    return eval(x)\n"
+    for policy in (1, LATEST_POLICY):
+        assert not CodeValidator(policy).validate_code(code)[0]
+
+
+def test_policy_2_admits_comprehensions():
+    code = "def f(self, xs):\n    return [x * 2 for x in xs if x > 0]\n"
+    assert not CodeValidator(policy=1).validate_code(code)[0]
+    assert CodeValidator(policy=2).validate_code(code)[0]
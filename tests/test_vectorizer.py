@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from vectorizer import PatchVectorizer
+
+ADD = "def add(self, a, b):\n    return a + b\n"
+SUB = "def sub(self, a, b):\n    return a - b\n"
+
+
+def test_numeric_columns_are_lifted_to_an_ndarray():
+    out = PatchVectorizer().map(ADD, [np.arange(4), [1.5, 2, 3, 4]])
+    assert isinstance(out, np.ndarray)
+    assert out.tolist() == [1.5, 3.0, 5.0, 7.0]
+
+
+def test_bool_columns_keep_python_semantics():
+    a, b = [True, False, True], [True, True, False]
+    vectorizer = PatchVectorizer()
+    assert vectorizer.map(ADD, [np.array(a), np.array(b)]).tolist() == [x + y for x, y in zip(a, b)]
+    assert vectorizer.map(SUB, [a, b]).tolist() == [x - y for x, y in zip(a, b)]
+
+
+def test_nested_rows_are_not_lifted():
+    out = PatchVectorizer(workers=1).map(ADD, [[[1], [2]], [[3], [4]]])
+    assert out == [[1, 3], [2, 4]]
+
+
+def test_constant_patch_returns_one_value_per_row():
+    out = PatchVectorizer().map("def seven(self, a):\n    return 7\n", [np.arange(3)])
+    assert isinstance(out, np.ndarray) and out.tolist() == [7, 7, 7]
+
+
+def test_unliftable_patch_returns_a_list():
+    upper = "def up(self, s):\n    return s.upper()\n"
+    assert PatchVectorizer(workers=1).map(upper, [['a', 'b']]) == ['A', 'B']
+
+
+def _row_wise(code, columns):
+    namespace = {}
+    exec(code, namespace)
+    func = next(v for k, v in namespace.items() if k != '__builtins__')
+    return [func(None, *row) for row in zip(*(col.tolist() for col in columns))]
+
+
+POW = "def power(self, a, b):\n    return a ** b\n"
+FLOORDIV = "def fdiv(self, a, b):\n    return a // b\n"
+MUL = "def mul(self, a, b):\n    return a * b\n"
+
+
+def test_integer_power_matches_python():
+    out = PatchVectorizer().map(POW, [np.array([2 ** 40, 2, 3]), np.array([2, -1, 2])])
+    assert list(out) == [2 ** 80, 0.5, 9]
+
+
+def test_integer_floor_division_by_zero_raises_like_python():
+    with pytest.raises(ZeroDivisionError):
+        PatchVectorizer(workers=1).map(FLOORDIV, [np.array([4, 5]), np.array([2, 0])])
+
+
+def test_float_errors_fall_back_to_python():
+    with pytest.raises(ZeroDivisionError):
+        PatchVectorizer(workers=1).map(FLOORDIV, [np.array([4.0, 5.0]), np.array([2.0, 0.0])])
+    out = PatchVectorizer(workers=1).map("def half(self, a):\n    return a / 0\n", [np.array([], dtype=float)])
+    assert len(out) == 0
+
+
+def test_int64_overflow_falls_back_to_python():
+    big = np.array([2 ** 62, 3], dtype=np.int64)
+    assert list(PatchVectorizer(workers=1).map(MUL, [big, big])) == [2 ** 124, 9]
+    narrow = np.array([100, 2], dtype=np.int8)
+    assert PatchVectorizer().map(MUL, [narrow, narrow]).tolist() == [10000, 4]
+    unsigned = np.array([1, 2], dtype=np.uint8)
+    assert PatchVectorizer().map(SUB, [unsigned, unsigned[::-1]]).tolist() == [-1, 1]
+
+
+def test_lifted_and_row_wise_results_agree():
+    rng = np.random.default_rng(0)
+    columns = [rng.integers(-1000, 1000, 200), rng.integers(1, 1000, 200)]
+    for code in (ADD, SUB, MUL, "def f(self, a, b):\n    return -a * b + 3 * a - b / 2\n"):
+        lifted = PatchVectorizer().map(code, columns)
+        assert isinstance(lifted, np.ndarray)
+        assert lifted.tolist() == _row_wise(code, columns)
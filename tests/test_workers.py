@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+
+from Workers_v1_0 import AERULITH_Job, AERULITH_PipelineJob, AERULITH_JobSignals, AERULITH_Teacher
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def _call_on_thread(app, fn, *args):
+    outcome = {}
+
+    def run():
+        try:
+            outcome['value'] = fn(*args)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while thread.is_alive() and time.monotonic() < deadline:
+        app.processEvents()
+        thread.join(0.01)
+    assert not thread.is_alive()
+    return outcome
+
+
+def test_base_job_cannot_be_instantiated(app):
+    signals = AERULITH_JobSignals()
+    with pytest.raises(TypeError):
+        AERULITH_Job(signals)
+    assert AERULITH_PipelineJob(signals, len, "abc").work() == 3
+
+
+def test_teacher_answers_from_the_gui_thread(app, monkeypatch):
+    teacher = AERULITH_Teacher(None)
+    spec = {'name': 'double', 'args': ['x'], 'body': 'return x * 2'}
+    asked_on = []
+    monkeypatch.setattr(teacher, 'ask', lambda prompt: asked_on.append(threading.current_thread()) or spec)
+    assert _call_on_thread(app, teacher, "double it") == {'value': spec}
+    assert asked_on == [threading.main_thread()]
+
+
+def test_declined_teaching_fails_instead_of_blocking(app, monkeypatch):
+    monkeypatch.setattr(QtWidgets.QDialog, 'exec', lambda self: QtWidgets.QDialog.Rejected)
+    outcome = _call_on_thread(app, AERULITH_Teacher(None), "double it")
+    assert isinstance(outcome['error'], RuntimeError)
+
+
+def test_shutdown_releases_a_waiting_job(app):
+    teacher = AERULITH_Teacher(None)
+    errors = []
+
+    def job():
+        try:
+            teacher("double it")
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=job)
+    thread.start()
+    time.sleep(0.2)
+    # The GUI thread never got to answer; shutting down must still free the job
+    teacher.closing.set()
+    thread.join(5)
+    assert not thread.is_alive() and len(errors) == 1
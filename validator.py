@@ -7,16 +7,20 @@
 |                                                                   |
 |    Author        : Gengai                                         |
 |    Created On    : 2025-06-14                                     |
-|    Version       : v1.0                                           |
+|    Version       : v1.1                                           |
 |                                                                   |
 |    Purpose       :                                                |
 |     - Verify code safety and integrity via AST traversal.         |
 |     - Block dangerous calls or unsafe constructs.                 |
+|     - Versioned node policies; v2 admits comprehensions, lambdas, |
+|       generators, slicing and augmented assignment.               |
 |     - Extract metadata about the function (name, args, return).   |
 |                                                                   |
 |    Usage         :                                                |
-|     validator = CodeValidator()                                   |
+|     validator = CodeValidator()            # latest policy        |
+|     validator = CodeValidator(policy=1)    # original node set    |
 |     valid, error = validator.validate_code(code)                  |
+|     valid, error = validator.validate_tree(tree)                  |
 |     info = validator.extract_function_info(code)                  |
 |                                                                   |
 |    Future Plans  :                                                |
@@ -28,8 +32,27 @@ import ast
 import builtins
 from typing import List, Set
 
+# Node sets accepted by each validator policy version. Later policies only
+# ever add syntax; the call, import and attribute rules apply to all of them.
+# From policy 2 on, lambdas and aliases can pass a builtin around, so a read
+# of a dangerous builtin's name is rejected as well as a direct call.
+POLICY_NODES = {
+    1: set(),
+    2: {
+        ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp,
+        ast.comprehension, ast.Lambda, ast.BoolOp, ast.IfExp, ast.AugAssign,
+        ast.Slice, ast.keyword, ast.FloorDiv, ast.USub, ast.UAdd,
+        ast.In, ast.NotIn, ast.Is, ast.IsNot
+    },
+}
+LATEST_POLICY = max(POLICY_NODES)
+
 class CodeValidator:
-    def __init__(self):
+    def __init__(self, policy: int = LATEST_POLICY):
+        if policy not in POLICY_NODES:
+            raise ValueError(f"Unknown validator policy: {policy}")
+        self.policy = policy
+
         # Whitelist of safe Python modules
         self.safe_modules = {
             'math', 'random', 'datetime', 'json', 'hashlib', 
@@ -39,7 +62,18 @@ class CodeValidator:
         # Blacklisted dangerous functions
         self.dangerous_funcs = {
             'exec', 'eval', 'compile', '__import__', 'open', 
-            'input', 'raw_input', 'file', 'execfile'
+            'input', 'raw_input', 'file', 'execfile',
+            'getattr', 'setattr', 'delattr', 'globals', 'locals',
+            'vars', 'breakpoint'
+        }
+
+        # Blacklisted attributes: interpreter internals reachable from any
+        # object (dunders) or from generator/frame objects
+        self.safe_dunders = {'__name__', '__class__', '__doc__'}
+        self.dangerous_attrs = {
+            'gi_frame', 'gi_code', 'cr_frame', 'cr_code', 'ag_frame',
+            'ag_code', 'f_globals', 'f_locals', 'f_builtins', 'f_back',
+            'tb_frame', 'co_code'
         }
         
         # Safe AST node types
@@ -53,6 +87,8 @@ class CodeValidator:
             ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod, ast.Eq, ast.NotEq,
             ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.And, ast.Or, ast.Not
         }
+        for version in range(2, policy + 1):
+            self.safe_nodes |= POLICY_NODES[version]
 
     def validate_code(self, code: str) -> tuple[bool, str]:
         """
@@ -60,7 +96,19 @@ class CodeValidator:
         Returns: (is_valid, error_message)
         """
         try:
-            tree = ast.parse(code)
+            return self.validate_tree(ast.parse(code))
+        except SyntaxError as e:
+            return False, f"Syntax error: {str(e)}"
+        except Exception as e:
+            return False, f"Validation error: {str(e)}"
+
+    def validate_tree(self, tree: ast.AST) -> tuple[bool, str]:
+        """
+        Runs the same checks as validate_code on an already-built AST,
+        e.g. one produced by CodeGenerator.generate_ast.
+        Returns: (is_valid, error_message)
+        """
+        try:
             danger_check = self._check_dangerous_nodes(tree)
             if not danger_check[0]:
                 return danger_check
@@ -70,12 +118,13 @@ class CodeValidator:
             call_check = self._check_function_calls(tree)
             if not call_check[0]:
                 return call_check
+            attr_check = self._check_attributes(tree)
+            if not attr_check[0]:
+                return attr_check
             func_check = self._check_single_function(tree)
             if not func_check[0]:
                 return func_check
             return True, "Code validation passed"
-        except SyntaxError as e:
-            return False, f"Syntax error: {str(e)}"
         except Exception as e:
             return False, f"Validation error: {str(e)}"
 
@@ -100,6 +149,43 @@ class CodeValidator:
                 if isinstance(node.func, ast.Name):
                     if node.func.id in self.dangerous_funcs:
                         return False, f"Dangerous function call: {node.func.id}"
+            # The builtins namespace hands out any builtin by subscript
+            if isinstance(node, ast.Name) and node.id == '__builtins__':
+                return False, "Dangerous name: __builtins__"
+        if self.policy >= 2:
+            bound = self._function_locals(tree)
+            for node in ast.walk(tree):
+                if (isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)
+                        and node.id in self.dangerous_funcs and node.id not in bound):
+                    return False, f"Dangerous function reference: {node.id}"
+        return True, ""
+
+    def _function_locals(self, tree: ast.AST) -> Set[str]:
+        # Parameters and assigned names of the patch function itself. Names
+        # bound inside lambdas and comprehensions live in their own scope,
+        # so a read outside them could still reach the builtin.
+        bound, pending = set(), []
+        for node in tree.body:
+            if isinstance(node, ast.FunctionDef):
+                bound |= {arg.arg for arg in ast.walk(node.args) if isinstance(arg, ast.arg)}
+                pending.extend(node.body)
+        while pending:
+            node = pending.pop()
+            if isinstance(node, (ast.Lambda, ast.ListComp, ast.SetComp,
+                                 ast.DictComp, ast.GeneratorExp)):
+                continue
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                bound.add(node.id)
+            pending.extend(ast.iter_child_nodes(node))
+        return bound
+
+    def _check_attributes(self, tree: ast.AST) -> tuple[bool, str]:
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Attribute):
+                attr = node.attr
+                is_dunder = attr.startswith('__') and attr.endswith('__')
+                if (is_dunder and attr not in self.safe_dunders) or attr in self.dangerous_attrs:
+                    return False, f"Dangerous attribute access: {attr}"
         return True, ""
 
     def _check_single_function(self, tree: ast.AST) -> tuple[bool, str]:
@@ -134,3 +220,8 @@ if __name__ == "__main__":
     print("Safe code validation:", validator.validate_code(safe_code))
     print("Dangerous code validation:", validator.validate_code(dangerous_code))
     print("Function info:", validator.extract_function_info(safe_code))
+
+    idiom_code = """def filter_list(self, input_list):
+    return list(filter(lambda x: x > 0, input_list))"""
+    print("Idiom under policy 1:", CodeValidator(policy=1).validate_code(idiom_code))
+    print("Idiom under policy 2:", validator.validate_code(idiom_code))
@@ -0,0 +1,207 @@
+# vectorizer.py
+"""
+=====================================================================
+|    Module Name   : vectorizer.py                                  |
+|    Description   : Applies learned patches across whole columns   |
+|                    of data instead of one call per row.           |
+|                                                                   |
+|    Author        : Gengai                                         |
+|    Created On    : 2025-06-14                                     |
+|    Version       : v1.0                                           |
+|                                                                   |
+|    Purpose       :                                                |
+|     - Lift pure-arithmetic patches to NumPy ufunc expressions.    |
+|     - Fall back to a chunked loop spread across processes.        |
+|                                                                   |
+|    Usage         :                                                |
+|     vectorizer = PatchVectorizer()                                |
+|     out = vectorizer.map(code, [col_a, col_b])                    |
+|                                                                   |
+|    Future Plans  :                                                |
+|     - Lift string methods to numpy.char equivalents.              |
+=====================================================================
+"""
+import ast
+import os
+import types
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+# Nodes a liftable `return <expr>` may contain. Python's arithmetic
+# operators dispatch to the matching ufunc (np.add, np.multiply, ...)
+# when the operands are arrays, so the expression itself is the lift.
+_LIFTABLE_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Name, ast.Constant, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.USub, ast.UAdd,
+)
+
+# Integer results must fit int64; anything converted to float must stay
+# exact, as Python converts ints to float with correct rounding
+_INT64_LIMIT = 2 ** 63 - 1
+_FLOAT_EXACT_LIMIT = 2 ** 53
+
+
+class _NotLiftable(ArithmeticError):
+    pass
+
+
+def _int_bound(node, bounds: dict):
+    # Largest magnitude `node` can reach given each argument's largest magnitude
+    if isinstance(node, ast.Expression):
+        return _int_bound(node.body, bounds)
+    if isinstance(node, ast.Constant):
+        return abs(node.value)
+    if isinstance(node, ast.Name):
+        return bounds[node.id]
+    if isinstance(node, ast.UnaryOp):
+        return _int_bound(node.operand, bounds)
+    left, right = _int_bound(node.left, bounds), _int_bound(node.right, bounds)
+    if isinstance(node.op, (ast.Add, ast.Sub)):
+        return left + right
+    if isinstance(node.op, ast.Mult):
+        return left * right
+    # Only true division is left; over ints it never grows the dividend
+    return left
+
+#========[Worker Process State]========
+_worker_func = None
+
+def _init_worker(code: str):
+    global _worker_func
+    _worker_func = _function_from(code)
+
+def _run_chunk(columns: Sequence[Sequence]) -> list:
+    return [_worker_func(None, *row) for row in zip(*columns)]
+
+def _function_from(code) -> types.FunctionType:
+    namespace = {}
+    exec(code, namespace)
+    return next(value for value in namespace.values()
+                if isinstance(value, types.FunctionType))
+
+
+class PatchVectorizer:
+    def __init__(self, chunk_size: int = 65536, workers: int = None):
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+
+    def lift(self, code: str) -> Optional[Callable]:
+        """
+        Returns a function taking whole arrays if the patch body is a single
+        `return` of arithmetic over its arguments, else None. The function
+        returns whatever NumPy gives back; map() shapes it into an ndarray.
+        It raises ArithmeticError wherever NumPy could differ from Python:
+        any floating-point error, integer `**`, `//` or `%`, and integer
+        inputs large enough to overflow int64.
+        """
+        func_def = ast.parse(code).body[0]
+        body = func_def.body
+        if (len(body) > 1 and isinstance(body[0], ast.Expr)
+                and isinstance(body[0].value, ast.Constant)):
+            body = body[1:]
+        if len(body) != 1 or not isinstance(body[0], ast.Return) or body[0].value is None:
+            return None
+        args = [arg.arg for arg in func_def.args.args[1:]]  # Skip 'self'
+        expr = ast.Expression(body=body[0].value)
+        for node in ast.walk(expr):
+            if not isinstance(node, _LIFTABLE_NODES):
+                return None
+            if isinstance(node, ast.Name) and node.id not in args:
+                return None
+            if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, complex)):
+                return None
+        compiled = compile(expr, '<tama-lifted>', 'eval')
+        # Python gives ints exact powers and raises on // and % by zero
+        int_unsafe = any(isinstance(node, (ast.Pow, ast.FloorDiv, ast.Mod)) for node in ast.walk(expr))
+        exact_limit = _FLOAT_EXACT_LIMIT if any(
+            isinstance(node, ast.Div) or (isinstance(node, ast.Constant) and not isinstance(node.value, int))
+            for node in ast.walk(expr)) else _INT64_LIMIT
+        def lifted(*columns):
+            ints = [arr for arr in columns if arr.dtype.kind in 'iu']
+            if ints:
+                if int_unsafe:
+                    raise _NotLiftable("integer **, // and % are not lifted")
+                bounds = {name: max(int(arr.max()), -int(arr.min())) if arr.size else 0
+                          for name, arr in zip(args, columns) if arr.dtype.kind in 'iu'}
+                bounds.update({name: 0 for name in args if name not in bounds})
+                limit = _INT64_LIMIT if len(ints) == len(columns) else _FLOAT_EXACT_LIMIT
+                if max(bounds.values()) > _FLOAT_EXACT_LIMIT and limit == _FLOAT_EXACT_LIMIT:
+                    raise _NotLiftable("integer inputs too large to convert to float exactly")
+                if _int_bound(expr, bounds) > min(limit, exact_limit):
+                    raise _NotLiftable("integer result may overflow int64")
+            with np.errstate(all='raise'):
+                return eval(compiled, {'__builtins__': {}}, dict(zip(args, columns)))
+        return lifted
+
+    def uses_self(self, code: str) -> bool:
+        func_def = ast.parse(code).body[0]
+        owner = func_def.args.args[0].arg if func_def.args.args else None
+        return any(isinstance(node, ast.Name) and node.id == owner
+                   for node in ast.walk(func_def))
+
+    def map(self, code: str, columns: Sequence[Sequence], bound: Callable = None):
+        """
+        Applies the patch in `code` row-wise across equally long columns.
+        Lifted patches run as one NumPy expression over flat numeric columns
+        and return an ndarray with one value per row. Bool columns are lifted
+        as ints, as Python does bool arithmetic. When NumPy could not give
+        Python's answer (see lift()), the patch runs row-wise instead, so
+        errors such as ZeroDivisionError surface as they would per call.
+        Row-wise results are a list, computed in chunks across worker
+        processes; patches that touch `self` run in-process via `bound`.
+        """
+        lengths = {len(col) for col in columns}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns must be the same length, got {sorted(lengths)}")
+        n_rows = lengths.pop() if lengths else 0
+
+        lifted = self.lift(code)
+        if lifted is not None:
+            arrays = [np.asarray(col) for col in columns]
+            # Rows that are themselves sequences would add element-wise
+            # instead of concatenating, so only flat columns are lifted
+            if all(arr.dtype.kind in 'biufc' and arr.ndim == 1 for arr in arrays):
+                # NumPy keeps bool + bool a bool and refuses bool - bool, and
+                # narrow or unsigned ints wrap; everything integral is int64
+                if all(arr.dtype.kind != 'u' or not arr.size or arr.max() <= _INT64_LIMIT for arr in arrays):
+                    arrays = [arr.astype(np.int64) if arr.dtype.kind in 'biu' else arr for arr in arrays]
+                    try:
+                        result = np.asarray(lifted(*arrays))
+                    except (ArithmeticError, TypeError, ValueError):
+                        result = None
+                    if result is not None:
+                        if result.shape != (n_rows,):
+                            # e.g. a patch returning a constant
+                            result = np.broadcast_to(result, (n_rows,)).copy()
+                        return result
+
+        # Row-wise calls must see Python scalars, not NumPy ones with NumPy semantics
+        columns = [col.tolist() if isinstance(col, np.ndarray) else col for col in columns]
+        if self.uses_self(code):
+            if bound is None:
+                raise ValueError("Patch uses 'self'; pass the bound method to map it")
+            return [bound(*row) for row in zip(*columns)]
+
+        if self.workers <= 1 or n_rows <= self.chunk_size:
+            func = _function_from(code)
+            return [func(None, *row) for row in zip(*columns)]
+
+        chunks = [[col[start:start + self.chunk_size] for col in columns]
+                  for start in range(0, n_rows, self.chunk_size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks)),
+                                 initializer=_init_worker, initargs=(code,)) as pool:
+            for part in pool.map(_run_chunk, chunks):
+                results.extend(part)
+        return results
+
+# Example usage
+if __name__ == "__main__":
+    vectorizer = PatchVectorizer(chunk_size=4)
+    add = "def add(self, num1, num2):\n    return num1 + num2\n"
+    upper = "def to_uppercase(self, input_str):\n    return input_str.upper()\n"
+    print(vectorizer.map(add, [np.arange(5), np.arange(5)]))
+    print(vectorizer.map(upper, [['tama', 'nacjac', 'aerulith', 'cirreth', 'core']]))